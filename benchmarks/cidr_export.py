@@ -0,0 +1,48 @@
+"""Benchmark CIDR aggregation of Ip/Ip Range exports.
+
+Run with ``python benchmarks/cidr_export.py [entries]`` from the project root.
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from wgui.ipnet import aggregate_cidrs  # noqa: E402
+
+
+def make_entries(n: int, seed: int = 1) -> list[str]:
+    """Mix of clustered IPv4 hosts, IPv4 ranges, CIDRs and IPv6 hosts."""
+    rnd = random.Random(seed)
+    entries = []
+    for i in range(n):
+        kind = i % 10
+        base = rnd.randrange(0, 2000)
+        if kind < 6:
+            # clustered hosts produce many adjacent addresses
+            entries.append(f"10.{base // 256}.{base % 256}.{rnd.randrange(0, 256)}")
+        elif kind < 8:
+            start = rnd.randrange(0, 200)
+            entries.append(f"172.16.{base % 256}.{start}-172.16.{base % 256}.{start + rnd.randrange(1, 55)}")
+        elif kind == 8:
+            entries.append(f"192.168.{base % 256}.0/{rnd.choice([24, 25, 26, 28])}")
+        else:
+            entries.append(f"2001:db8:{base:x}::{rnd.randrange(0, 4096):x}")
+    return entries
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    entries = make_entries(n)
+    start = time.perf_counter()
+    cidrs, invalid = aggregate_cidrs(entries)
+    elapsed = time.perf_counter() - start
+    print(f"entries:      {len(entries)}")
+    print(f"cidr lines:   {len(cidrs)} (+{len(invalid)} invalid)")
+    print(f"reduction:    {100 * (1 - (len(cidrs) + len(invalid)) / len(entries)):.1f}%")
+    print(f"build time:   {elapsed * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark the global search: FTS5 trigram index against a LIKE scan.
+
+Run with ``python benchmarks/global_search.py [items]`` from the project
+root (default 1M items). Uses an in-memory SQLite database; the index is
+filled by the data_list triggers while rows are inserted.
+"""
+import random
+import string
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import or_  # noqa: E402
+
+from wgui import create_app  # noqa: E402
+from wgui.extensions import db  # noqa: E402
+from wgui.models import DataList, ListModel  # noqa: E402
+from wgui.search import search_items  # noqa: E402
+
+QUERIES = ['zqxjv', 'phish', 'example', 'ab']
+WORDS = ['phishing', 'malware', 'spam', 'botnet', 'scanner', 'reported', 'by', 'team', 'ticket']
+REPEAT = 5
+# SEARCH_RANK_TIMEOUT_MS default
+RANK_BUDGET_MS = 300
+
+
+def word(rnd: random.Random, lo: int = 4, hi: int = 12) -> str:
+    return ''.join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(lo, hi)))
+
+
+def timed(fn) -> float:
+    t = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - t) / REPEAT
+
+
+def main() -> None:
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rnd = random.Random(1)
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with app.app_context():
+        lists = [ListModel(name=f'Bench {i}', type='String') for i in range(10)]
+        db.session.add_all(lists)
+        db.session.commit()
+        t = time.perf_counter()
+        for start in range(0, n_items, 50_000):
+            db.session.execute(DataList.__table__.insert(), [
+                {
+                    'list_id': lists[i % 10].id,
+                    'data': f"{word(rnd)}.{'example' if i % 1000 == 0 else word(rnd, 3, 6)}.com#{i}",
+                    'description': ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(0, 6))) or None,
+                    'date': date(2030, 1, 1),
+                }
+                for i in range(start, min(start + 50_000, n_items))
+            ])
+        db.session.commit()
+        load = time.perf_counter() - t
+
+        print(f"items:            {n_items} (insert + index {load:.1f} s)")
+        for q in QUERIES:
+            pattern = f'%{q}%'
+            fts = timed(lambda: search_items(q, rank_budget_ms=RANK_BUDGET_MS))
+            scan = timed(lambda: DataList.query.filter(or_(
+                DataList.data.ilike(pattern), DataList.description.ilike(pattern),
+            )).limit(51).all())
+            unranked = timed(lambda: search_items(q, rank_budget_ms=1))
+            res = search_items(q, rank_budget_ms=RANK_BUDGET_MS)
+            print(f"{q!r:<10} fts {fts * 1000:8.1f} ms ({'ranked' if res.ranked else 'unranked'})   "
+                  f"fts unranked {unranked * 1000:6.1f} ms   like scan {scan * 1000:8.1f} ms   "
+                  f"({len(res.hits)}{'+' if res.has_more else ''} hits)")
+
+
+if __name__ == '__main__':
+    main()
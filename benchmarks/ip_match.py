@@ -0,0 +1,87 @@
+"""Benchmark bulk IP membership checks against per-address SQL lookups.
+
+Run with ``python benchmarks/ip_match.py [entries] [addresses]`` from the
+project root. Uses an in-memory SQLite database.
+"""
+import random
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from wgui import create_app  # noqa: E402
+from wgui.extensions import db  # noqa: E402
+from wgui.ip_index import lookup_address  # noqa: E402
+from wgui.ip_match import IpMatcher  # noqa: E402
+from wgui.ipnet import entry_bounds  # noqa: E402
+from wgui.models import DataList, ListModel  # noqa: E402
+
+# per-address SQL is slow; time this many and extrapolate
+SQL_SAMPLE = 200
+
+
+def make_entries(n: int, rnd: random.Random) -> list[str]:
+    entries = set()
+    while len(entries) < n:
+        kind = rnd.randrange(10)
+        a, b, c = rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)
+        if kind < 7:
+            entries.add(f"10.{a}.{b}.{c}")
+        elif kind < 9:
+            entries.add(f"172.{16 + a % 16}.{b}.0/{rnd.choice([24, 26, 28])}")
+        else:
+            entries.add(f"2001:db8:{a:x}{b:02x}::/48")
+    return sorted(entries)
+
+
+def make_addresses(n: int, rnd: random.Random) -> list[str]:
+    return [
+        f"10.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(256)}" if i % 3
+        else f"172.{16 + rnd.randrange(16)}.{rnd.randrange(256)}.{rnd.randrange(256)}"
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    n_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_addresses = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    rnd = random.Random(1)
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with app.app_context():
+        lists = [ListModel(name=f'Bench {i}', type='Ip Range' if i % 2 else 'Ip') for i in range(4)]
+        db.session.add_all(lists)
+        db.session.commit()
+        rows = []
+        for i, value in enumerate(make_entries(n_entries, rnd)):
+            start, end = entry_bounds(value)
+            rows.append({'list_id': lists[i % 4].id, 'data': value, 'date': date(2030, 1, 1),
+                         'ip_start': start, 'ip_end': end})
+        db.session.execute(DataList.__table__.insert(), rows)
+        db.session.commit()
+        addresses = make_addresses(n_addresses, rnd)
+
+        matcher = IpMatcher()
+        t = time.perf_counter()
+        matcher.match([])
+        build = time.perf_counter() - t
+        t = time.perf_counter()
+        matches, _invalid = matcher.match(addresses)
+        cached = time.perf_counter() - t
+
+        sample = addresses[:SQL_SAMPLE]
+        t = time.perf_counter()
+        sql_hits = sum(1 for a in sample if lookup_address(a))
+        per_sql = (time.perf_counter() - t) / len(sample)
+        assert sql_hits == sum(1 for a in sample if a in matches)
+
+    print(f"entries:          {n_entries}")
+    print(f"addresses:        {n_addresses} ({len(matches)} matched)")
+    print(f"index build:      {build * 1000:.0f} ms")
+    print(f"bulk match:       {cached * 1000:.0f} ms")
+    print(f"per-address SQL:  {per_sql * n_addresses * 1000:.0f} ms (extrapolated from {len(sample)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark String list matching (domain-suffix and substring modes).
+
+Run with ``python benchmarks/string_match.py [entries] [checks]`` from the
+project root. The target is 1M checks per minute on one core.
+"""
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from wgui.string_match import AhoCorasick, DomainTrie, normalize_host  # noqa: E402
+
+TLDS = ['com', 'net', 'org', 'io', 'de', 'co.uk']
+
+
+def word(rnd: random.Random, lo: int = 3, hi: int = 10) -> str:
+    return ''.join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(lo, hi)))
+
+
+def main() -> None:
+    n_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_checks = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    rnd = random.Random(1)
+    domains = [f"{word(rnd)}.{rnd.choice(TLDS)}" for _ in range(n_entries)]
+    keywords = [word(rnd, 5, 9) for _ in range(n_entries // 10)]
+
+    t = time.perf_counter()
+    trie = DomainTrie((d, (1, d)) for d in domains)
+    trie_build = time.perf_counter() - t
+    t = time.perf_counter()
+    automaton = AhoCorasick((k, (2, k)) for k in keywords)
+    ac_build = time.perf_counter() - t
+
+    hosts = [
+        f"https://{word(rnd)}.{rnd.choice(domains) if i % 4 == 0 else word(rnd) + '.com'}/path?q={i}"
+        for i in range(n_checks)
+    ]
+    t = time.perf_counter()
+    domain_hits = sum(1 for h in hosts if trie.search(normalize_host(h)))
+    domain_time = time.perf_counter() - t
+    t = time.perf_counter()
+    substring_hits = sum(1 for h in hosts if automaton.search(h))
+    substring_time = time.perf_counter() - t
+
+    print(f"domain entries:   {n_entries} (trie build {trie_build * 1000:.0f} ms)")
+    print(f"keywords:         {len(keywords)} (automaton build {ac_build * 1000:.0f} ms)")
+    print(f"domain mode:      {n_checks / domain_time * 60 / 1e6:.1f}M checks/min ({domain_hits} hits)")
+    print(f"substring mode:   {n_checks / substring_time * 60 / 1e6:.1f}M checks/min ({substring_hits} hits)")
+
+
+if __name__ == '__main__':
+    main()
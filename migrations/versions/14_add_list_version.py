@@ -0,0 +1,35 @@
+"""add version to list_model and version_counter table
+
+Revision ID: add_list_version
+Revises: add_actor_name_to_auditlog
+Create Date: 2025-09-10 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_list_version'
+down_revision = 'add_actor_name_to_auditlog'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    cols = [c['name'] for c in insp.get_columns('list_model')]
+    if 'version' not in cols:
+        op.add_column('list_model', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+    if not insp.has_table('version_counter'):
+        counter = op.create_table(
+            'version_counter',
+            sa.Column('name', sa.String(length=50), primary_key=True),
+            sa.Column('value', sa.Integer(), nullable=False, server_default='0'),
+        )
+        op.bulk_insert(counter, [{'name': 'lists', 'value': 0}])
+
+
+def downgrade():
+    op.drop_table('version_counter')
+    with op.batch_alter_table('list_model') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,64 @@
+"""add persisted export slugs to list_model
+
+Revision ID: add_list_slugs
+Revises: add_list_version
+Create Date: 2025-09-10 00:10:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_list_slugs'
+down_revision = 'add_list_version'
+branch_labels = None
+depends_on = None
+
+
+def _slugify(text):
+    return (text or '').lower().replace(' ', '-')
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    cols = [c['name'] for c in insp.get_columns('list_model')]
+    if 'type_slug' not in cols:
+        op.add_column('list_model', sa.Column('type_slug', sa.String(length=20), nullable=True))
+    if 'name_slug' not in cols:
+        op.add_column('list_model', sa.Column('name_slug', sa.String(length=50), nullable=True))
+
+    # Backfill; lists whose names slugify identically were previously
+    # unreachable behind the first match, so they get an id suffix.
+    lists = sa.table(
+        'list_model',
+        sa.column('id', sa.Integer),
+        sa.column('name', sa.String),
+        sa.column('type', sa.String),
+        sa.column('type_slug', sa.String),
+        sa.column('name_slug', sa.String),
+    )
+    seen = set()
+    rows = bind.execute(sa.select(lists.c.id, lists.c.name, lists.c.type).order_by(lists.c.id)).fetchall()
+    for row in rows:
+        type_slug = _slugify(row.type)
+        name_slug = _slugify(row.name)
+        if (type_slug, name_slug) in seen:
+            name_slug = f"{name_slug}-{row.id}"
+        seen.add((type_slug, name_slug))
+        bind.execute(
+            lists.update()
+            .where(lists.c.id == row.id)
+            .values(type_slug=type_slug, name_slug=name_slug)
+        )
+
+    with op.batch_alter_table('list_model') as batch_op:
+        batch_op.alter_column('type_slug', existing_type=sa.String(length=20), nullable=False)
+        batch_op.alter_column('name_slug', existing_type=sa.String(length=50), nullable=False)
+        batch_op.create_unique_constraint('uix_list_slug', ['type_slug', 'name_slug'])
+
+
+def downgrade():
+    with op.batch_alter_table('list_model') as batch_op:
+        batch_op.drop_constraint('uix_list_slug', type_='unique')
+        batch_op.drop_column('name_slug')
+        batch_op.drop_column('type_slug')
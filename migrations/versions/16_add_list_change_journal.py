@@ -0,0 +1,42 @@
+"""add list_change journal and journal_floor to list_model
+
+Revision ID: add_list_change_journal
+Revises: add_list_slugs
+Create Date: 2025-09-10 00:20:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_list_change_journal'
+down_revision = 'add_list_slugs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    cols = [c['name'] for c in insp.get_columns('list_model')]
+    if 'journal_floor' not in cols:
+        op.add_column('list_model', sa.Column('journal_floor', sa.Integer(), nullable=False, server_default='0'))
+        # Nothing is journaled yet: deltas must start from the current version
+        op.execute('UPDATE list_model SET journal_floor = version')
+    if not insp.has_table('list_change'):
+        op.create_table(
+            'list_change',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('list_id', sa.Integer(), sa.ForeignKey('list_model.id'), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('op', sa.String(length=1), nullable=False),
+            sa.Column('data', sa.String(length=255), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        )
+        op.create_index('ix_list_change_list_version', 'list_change', ['list_id', 'version'])
+
+
+def downgrade():
+    op.drop_index('ix_list_change_list_version', table_name='list_change')
+    op.drop_table('list_change')
+    with op.batch_alter_table('list_model') as batch_op:
+        batch_op.drop_column('journal_floor')
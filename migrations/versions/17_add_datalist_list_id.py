@@ -0,0 +1,86 @@
+"""link data_list rows to list_model by id instead of name
+
+Revision ID: add_datalist_list_id
+Revises: add_list_change_journal
+Create Date: 2025-09-12 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_datalist_list_id'
+down_revision = 'add_list_change_journal'
+branch_labels = None
+depends_on = None
+
+
+def _slugify(text):
+    return (text or '').lower().replace(' ', '-')
+
+
+def _create_placeholder_lists(bind):
+    """Give items whose list was deleted a String list named after their category.
+
+    Such items were unreachable from any list view; keeping them in a list
+    lets an admin review and delete or move them instead of losing them.
+    """
+    lists = sa.table(
+        'list_model',
+        sa.column('name', sa.String),
+        sa.column('type', sa.String),
+        sa.column('type_slug', sa.String),
+        sa.column('name_slug', sa.String),
+    )
+    orphaned = bind.execute(sa.text(
+        "SELECT DISTINCT category FROM data_list WHERE category NOT IN (SELECT name FROM list_model) "
+        "ORDER BY category"
+    )).scalars().all()
+    slugs = set(bind.execute(sa.select(lists.c.name_slug).where(lists.c.type_slug == 'string')).scalars())
+    for category in orphaned:
+        slug = base = _slugify(category)
+        n = 1
+        while slug in slugs:
+            n += 1
+            slug = f"{base}-{n}"
+        slugs.add(slug)
+        bind.execute(lists.insert().values(name=category, type='String', type_slug='string', name_slug=slug))
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    cols = [c['name'] for c in insp.get_columns('data_list')]
+    if 'list_id' not in cols:
+        op.add_column('data_list', sa.Column('list_id', sa.Integer(), nullable=True))
+
+    if 'category' in cols:
+        _create_placeholder_lists(bind)
+        bind.execute(sa.text(
+            "UPDATE data_list SET list_id = "
+            "(SELECT list_model.id FROM list_model WHERE list_model.name = data_list.category)"
+        ))
+
+    uniques = [u['name'] for u in insp.get_unique_constraints('data_list')]
+    with op.batch_alter_table('data_list') as batch_op:
+        batch_op.alter_column('list_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_data_list_list_id_list_model', 'list_model', ['list_id'], ['id'])
+        if 'uix_category_data' in uniques:
+            batch_op.drop_constraint('uix_category_data', type_='unique')
+        batch_op.create_unique_constraint('uix_list_data', ['list_id', 'data'])
+        if 'category' in cols:
+            batch_op.drop_column('category')
+
+
+def downgrade():
+    with op.batch_alter_table('data_list') as batch_op:
+        batch_op.add_column(sa.Column('category', sa.String(length=20), nullable=True))
+    op.get_bind().execute(sa.text(
+        "UPDATE data_list SET category = "
+        "(SELECT list_model.name FROM list_model WHERE list_model.id = data_list.list_id)"
+    ))
+    with op.batch_alter_table('data_list') as batch_op:
+        batch_op.alter_column('category', existing_type=sa.String(length=20), nullable=False)
+        batch_op.drop_constraint('uix_list_data', type_='unique')
+        batch_op.drop_constraint('fk_data_list_list_id_list_model', type_='foreignkey')
+        batch_op.create_unique_constraint('uix_category_data', ['category', 'data'])
+        batch_op.drop_column('list_id')
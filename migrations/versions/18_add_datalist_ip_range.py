@@ -0,0 +1,119 @@
+"""add numeric ip_start/ip_end range columns to data_list
+
+Revision ID: add_datalist_ip_range
+Revises: add_datalist_list_id
+Create Date: 2025-09-13 00:00:00.000000
+"""
+import socket
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_datalist_ip_range'
+down_revision = 'add_datalist_list_id'
+branch_labels = None
+depends_on = None
+
+# Copied from wgui.ipnet as of this revision, so later changes there
+# cannot alter what this migration writes
+IP_LIST_TYPES = ('Ip', 'Ip Range')
+
+
+def _parse_address(text):
+    for ver, family in ((4, socket.AF_INET), (6, socket.AF_INET6)):
+        try:
+            return ver, int.from_bytes(socket.inet_pton(family, text), 'big')
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def _parse_entry(value):
+    text = (value or '').strip()
+    if not text:
+        return None
+    if '-' in text:
+        left, right = (p.strip() for p in text.split('-', 1))
+        first, last = _parse_address(left), _parse_address(right)
+        if first is None or last is None or first[0] != last[0] or last[1] < first[1]:
+            return None
+        return first[0], first[1], last[1]
+    if '/' in text:
+        addr, _, prefix = text.partition('/')
+        parsed = _parse_address(addr.strip())
+        if parsed is None or not prefix.strip().isdigit():
+            return None
+        ver, value_int = parsed
+        bits = 32 if ver == 4 else 128
+        plen = int(prefix)
+        if plen > bits:
+            return None
+        host = (1 << (bits - plen)) - 1
+        return ver, value_int & ~host, value_int | host
+    parsed = _parse_address(text)
+    if parsed is None:
+        return None
+    return parsed[0], parsed[1], parsed[1]
+
+
+def _address_key(ver, value):
+    if ver == 4:
+        value |= 0xFFFF << 32
+    return value.to_bytes(16, 'big')
+
+
+def entry_bounds(value):
+    parsed = _parse_entry(value)
+    if parsed is None:
+        return None
+    ver, first, last = parsed
+    return _address_key(ver, first), _address_key(ver, last)
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    cols = [c['name'] for c in insp.get_columns('data_list')]
+    with op.batch_alter_table('data_list') as batch_op:
+        if 'ip_start' not in cols:
+            batch_op.add_column(sa.Column('ip_start', sa.LargeBinary(length=16), nullable=True))
+        if 'ip_end' not in cols:
+            batch_op.add_column(sa.Column('ip_end', sa.LargeBinary(length=16), nullable=True))
+    indexes = [i['name'] for i in insp.get_indexes('data_list')]
+    if 'ix_data_list_ip_range' not in indexes:
+        op.create_index('ix_data_list_ip_range', 'data_list', ['ip_start', 'ip_end'])
+
+    items = sa.table(
+        'data_list',
+        sa.column('id', sa.Integer),
+        sa.column('list_id', sa.Integer),
+        sa.column('data', sa.String),
+        sa.column('ip_start', sa.LargeBinary),
+        sa.column('ip_end', sa.LargeBinary),
+    )
+    lists = sa.table('list_model', sa.column('id', sa.Integer), sa.column('type', sa.String))
+    rows = bind.execute(
+        sa.select(items.c.id, items.c.data)
+        .select_from(items.join(lists, lists.c.id == items.c.list_id))
+        .where(lists.c.type.in_(IP_LIST_TYPES))
+    ).fetchall()
+    updates = []
+    for row in rows:
+        bounds = entry_bounds(row.data)
+        if bounds:
+            updates.append({'item_id': row.id, 'start': bounds[0], 'end': bounds[1]})
+    if updates:
+        bind.execute(
+            items.update()
+            .where(items.c.id == sa.bindparam('item_id'))
+            .values(ip_start=sa.bindparam('start'), ip_end=sa.bindparam('end')),
+            updates,
+        )
+
+
+def downgrade():
+    op.drop_index('ix_data_list_ip_range', table_name='data_list')
+    with op.batch_alter_table('data_list') as batch_op:
+        batch_op.drop_column('ip_end')
+        batch_op.drop_column('ip_start')
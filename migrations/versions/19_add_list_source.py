@@ -0,0 +1,38 @@
+"""add list_source table for feed synchronization
+
+Revision ID: add_list_source
+Revises: add_datalist_ip_range
+Create Date: 2025-09-15 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_list_source'
+down_revision = 'add_datalist_ip_range'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if not insp.has_table('list_source'):
+        op.create_table(
+            'list_source',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('list_id', sa.Integer(), sa.ForeignKey('list_model.id'), nullable=False, unique=True),
+            sa.Column('url', sa.String(length=500), nullable=False),
+            sa.Column('csv_format', sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column('interval_minutes', sa.Integer(), nullable=False, server_default='60'),
+            sa.Column('expire_days', sa.Integer(), nullable=False, server_default='365'),
+            sa.Column('enabled', sa.Boolean(), nullable=False, server_default=sa.true()),
+            sa.Column('etag', sa.String(length=255), nullable=True),
+            sa.Column('last_modified', sa.String(length=64), nullable=True),
+            sa.Column('last_sync_at', sa.DateTime(), nullable=True),
+            sa.Column('last_status', sa.String(length=255), nullable=True),
+        )
+
+
+def downgrade():
+    op.drop_table('list_source')
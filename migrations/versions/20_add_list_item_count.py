@@ -0,0 +1,38 @@
+"""add item_count to list_model and keyset pagination indexes on data_list
+
+Revision ID: add_list_item_count
+Revises: add_list_source
+Create Date: 2025-09-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'add_list_item_count'
+down_revision = 'add_list_source'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    cols = [c['name'] for c in insp.get_columns('list_model')]
+    if 'item_count' not in cols:
+        op.add_column('list_model', sa.Column('item_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        'UPDATE list_model SET item_count = '
+        '(SELECT COUNT(*) FROM data_list WHERE data_list.list_id = list_model.id)'
+    )
+    indexes = [i['name'] for i in insp.get_indexes('data_list')]
+    if 'ix_data_list_list_id_id' not in indexes:
+        op.create_index('ix_data_list_list_id_id', 'data_list', ['list_id', 'id'])
+    if 'ix_data_list_list_id_date' not in indexes:
+        op.create_index('ix_data_list_list_id_date', 'data_list', ['list_id', 'date', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_data_list_list_id_date', table_name='data_list')
+    op.drop_index('ix_data_list_list_id_id', table_name='data_list')
+    with op.batch_alter_table('list_model') as batch_op:
+        batch_op.drop_column('item_count')
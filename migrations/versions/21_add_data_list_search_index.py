@@ -0,0 +1,67 @@
+"""add full-text search index over data_list data and description
+
+Revision ID: add_data_list_search_index
+Revises: add_list_item_count
+Create Date: 2025-09-17 00:00:00.000000
+"""
+import sqlite3
+
+from alembic import op
+
+
+revision = 'add_data_list_search_index'
+down_revision = 'add_list_item_count'
+branch_labels = None
+depends_on = None
+
+# NOTE: SQLite batch migrations that recreate data_list drop the triggers
+# below; re-run SQLITE_FTS_DDL and 'rebuild' after any such migration.
+
+# Copied from wgui.search as of this revision
+FTS_TABLE = 'data_list_fts'
+
+# FTS5's trigram tokenizer needs SQLite 3.34+
+FTS_AVAILABLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+SQLITE_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "data, description, content='data_list', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS data_list_fts_ai AFTER INSERT ON data_list BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, data, description) VALUES (new.id, new.data, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS data_list_fts_ad AFTER DELETE ON data_list BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, data, description) "
+    f"VALUES ('delete', old.id, old.data, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS data_list_fts_au AFTER UPDATE OF data, description ON data_list BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, data, description) "
+    f"VALUES ('delete', old.id, old.data, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, data, description) VALUES (new.id, new.data, new.description); END",
+]
+
+POSTGRES_TRGM_DDL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ix_data_list_data_trgm ON data_list USING gin (data gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_data_list_description_trgm ON data_list USING gin (description gin_trgm_ops)',
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite' and FTS_AVAILABLE:
+        for stmt in SQLITE_FTS_DDL:
+            op.execute(stmt)
+        # Index the existing rows
+        op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        for stmt in POSTGRES_TRGM_DDL:
+            op.execute(stmt)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('data_list_fts_ai', 'data_list_fts_ad', 'data_list_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_data_list_description_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_data_list_data_trgm')
@@ -82,7 +82,7 @@ def test_export_list(client):
         db.session.add(lst)
         db.session.flush()
         db.session.add(
-            DataList(category=lst.name, data='1.2.3.4', description='', date=date(2025, 6, 13))
+            DataList(list_id=lst.id, data='1.2.3.4', description='', date=date(2025, 6, 13))
         )
         db.session.commit()
     resp = client.get('/lists/ip/export.txt')
@@ -114,7 +114,7 @@ def test_delete_expired_items_task(client, login):
         db.session.add(lst)
         db.session.flush()
         expired = DataList(
-            category=lst.name,
+            list_id=lst.id,
             data='1.1.1.1',
             description='',
             date=date.today() - timedelta(days=1),
@@ -146,7 +146,7 @@ def test_expiration_notifications(client, login, monkeypatch):
         db.session.add(lst)
         db.session.flush()
         item = DataList(
-            category=lst.name,
+            list_id=lst.id,
             data='9.9.9.9',
             description='',
             date=date.today() + timedelta(days=3),
@@ -176,7 +176,7 @@ def test_removal_notification(client, login, monkeypatch):
         db.session.add(lst)
         db.session.flush()
         item = DataList(
-            category=lst.name,
+            list_id=lst.id,
             data='8.8.8.8',
             description='',
             date=date.today() - timedelta(days=1),
@@ -198,8 +198,8 @@ def test_search_items(client, login):
     from wgui.extensions import db
     with client.application.app_context():
         lst = ListModel.query.filter_by(name='Search').first()
-        db.session.add(DataList(category=lst.name, data='192.168.1.1', description='', date=date(2025, 6, 13)))
-        db.session.add(DataList(category=lst.name, data='10.0.0.1', description='', date=date(2025, 6, 13)))
+        db.session.add(DataList(list_id=lst.id, data='192.168.1.1', description='', date=date(2025, 6, 13)))
+        db.session.add(DataList(list_id=lst.id, data='10.0.0.1', description='', date=date(2025, 6, 13)))
         db.session.commit()
         list_id = lst.id
     resp = client.get(f'/lists/{list_id}/?q=192.168.', follow_redirects=True)
@@ -222,5 +222,1156 @@ def test_unique_item_per_list(client, login):
     resp2 = client.post(f'/lists/{list_id}/add', data=payload, follow_redirects=True)
     assert b'Item already exists' in resp2.data
     with client.application.app_context():
-        items = DataList.query.filter_by(category=lst.name, data='1.2.3.4').all()
+        items = DataList.query.filter_by(list_id=lst.id, data='1.2.3.4').all()
         assert len(items) == 1
+
+
+def test_export_cache_and_etag(client, login):
+    """Unchanged exports are served from cache and honour If-None-Match."""
+    login()
+    client.post('/lists/add', data={'name': 'Feed', 'list_type': 'Ip'}, follow_redirects=True)
+    from wgui.models import ListModel
+    with client.application.app_context():
+        list_id = ListModel.query.filter_by(name='Feed').first().id
+    client.post(f'/lists/{list_id}/add', data={'data': '1.1.1.1', 'description': '', 'date': '2025-06-13'})
+    first = client.get('/lists/ip/feed.txt')
+    assert first.headers['X-Export-Cache'] == 'miss'
+    etag = first.headers['ETag']
+    second = client.get('/lists/ip/feed.txt')
+    assert second.headers['X-Export-Cache'] == 'hit'
+    assert second.data == first.data
+    resp = client.get('/lists/ip/feed.txt', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    # any item change bumps the list version and invalidates the snapshot
+    client.post(f'/lists/{list_id}/add', data={'data': '2.2.2.2', 'description': '', 'date': '2025-06-13'})
+    resp = client.get('/lists/ip/feed.txt', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+    assert b'2.2.2.2' in resp.data
+    stats = client.get('/users/export-cache').get_json()
+    assert stats['hits'] >= 1 and stats['misses'] >= 2
+
+
+def test_slug_collision_rejected(client, login):
+    """Names that map to the same export URL cannot coexist."""
+    login()
+    client.post('/lists/add', data={'name': 'Block List', 'list_type': 'Ip'}, follow_redirects=True)
+    resp = client.post('/lists/add', data={'name': 'block list', 'list_type': 'Ip'}, follow_redirects=True)
+    assert b'Another list already uses this export URL' in resp.data
+    from wgui.models import ListModel
+    with client.application.app_context():
+        assert ListModel.query.count() == 1
+        lst = ListModel.query.first()
+        assert (lst.type_slug, lst.name_slug) == ('ip', 'block-list')
+        list_id = lst.id
+    client.post(f'/lists/{list_id}/edit', data={'name': 'Renamed'}, follow_redirects=True)
+    assert client.get('/lists/ip/renamed.txt').status_code == 200
+    assert client.get('/lists/ip/block-list.txt').status_code == 404
+
+
+def test_export_audit_coalesced(client):
+    """Repeated polls from one client collapse into a single audit row."""
+    from wgui.models import ListModel, AuditLog
+    from wgui.extensions import db
+    with client.application.app_context():
+        db.session.add(ListModel(name='Polled', type='Ip'))
+        db.session.commit()
+    for _ in range(3):
+        assert client.get('/lists/ip/polled.txt').status_code == 200
+    buffer = client.application.extensions['export_audit']
+    assert buffer.flush(force=True) == 1
+    with client.application.app_context():
+        rows = AuditLog.query.filter_by(action='list_exported').all()
+        assert len(rows) == 1
+        assert 'hits=3' in rows[0].details
+
+
+def test_delta_export(client):
+    """?since returns only entries changed after the given version."""
+    from datetime import timedelta
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    from wgui.tasks import delete_expired_items
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Delta', type='Ip')
+        db.session.add(lst)
+        db.session.commit()
+        db.session.add(DataList(list_id=lst.id, data='1.1.1.1', date=date.today() + timedelta(days=60)))
+        db.session.add(DataList(list_id=lst.id, data='2.2.2.2', date=date.today() + timedelta(days=60)))
+        db.session.commit()
+        list_id = lst.id
+    full = client.get('/lists/ip/delta.txt')
+    assert full.headers['X-Export-Mode'] == 'full'
+    since = int(full.headers['X-List-Version'])
+    with app.app_context():
+        db.session.add(DataList(list_id=list_id, data='3.3.3.3', date=date.today() - timedelta(days=1)))
+        db.session.delete(DataList.query.filter_by(data='1.1.1.1').first())
+        db.session.commit()
+        delete_expired_items()
+        version = db.session.get(ListModel, 1).version
+    resp = client.get(f'/lists/ip/delta.txt?since={since}')
+    assert resp.headers['X-Export-Mode'] == 'delta'
+    lines = resp.data.decode().split('\n')
+    assert lines[:2] == ['type=ip', f'version={version}']
+    assert sorted(lines[2:]) == ['-1.1.1.1', '-3.3.3.3']
+    # versions the journal cannot answer fall back to a full export
+    resp = client.get('/lists/ip/delta.txt?since=0')
+    assert resp.headers['X-Export-Mode'] == 'full'
+    assert resp.data == b'type=ip\n2.2.2.2'
+
+
+def test_export_cidr_mode(client):
+    """mode=cidr merges adjacent/overlapping entries into minimal CIDRs."""
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    with client.application.app_context():
+        nets = ListModel(name='Nets', type='Ip Range')
+        db.session.add(nets)
+        db.session.add(ListModel(name='Words', type='String'))
+        db.session.flush()
+        for value in ['10.0.0.0-10.0.0.127', '10.0.0.128/25', '10.0.0.5', '2001:db8::/33', '2001:db8:8000::/33']:
+            db.session.add(DataList(list_id=nets.id, data=value, date=date(2030, 1, 1)))
+        db.session.commit()
+    resp = client.get('/lists/ip-range/nets.txt?mode=cidr')
+    assert resp.status_code == 200
+    assert resp.data.decode().split('\n') == ['type=ip-range', '10.0.0.0/24', '2001:db8::/32']
+    assert client.get('/lists/ip-range/nets.txt?mode=cidr').headers['X-Export-Cache'] == 'hit'
+    assert client.get('/lists/string/words.txt?mode=cidr').status_code == 400
+
+
+def test_export_gzip_negotiation(client):
+    """Precompressed bodies are served to clients accepting gzip; small ones still revalidate."""
+    import gzip
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    with client.application.app_context():
+        lst = ListModel(name='Big', type='Ip')
+        db.session.add(lst)
+        db.session.flush()
+        for i in range(200):
+            db.session.add(DataList(list_id=lst.id, data=f'10.0.{i}.1', date=date(2030, 1, 1)))
+        tiny = ListModel(name='Tiny', type='Ip')
+        db.session.add(tiny)
+        db.session.flush()
+        db.session.add(DataList(list_id=tiny.id, data='10.1.0.1', date=date(2030, 1, 1)))
+        db.session.commit()
+    plain = client.get('/lists/ip/big.txt')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    packed = client.get('/lists/ip/big.txt', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in packed.headers['Vary']
+    assert packed.headers['ETag'] != plain.headers['ETag']
+    assert gzip.decompress(packed.data) == plain.data
+    resp = client.get('/lists/ip/big.txt', headers={'Accept-Encoding': 'gzip', 'If-None-Match': packed.headers['ETag']})
+    assert resp.status_code == 304
+    small = client.get('/lists/ip/tiny.txt', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    resp = client.get('/lists/ip/tiny.txt', headers={'Accept-Encoding': 'gzip', 'If-None-Match': small.headers['ETag']})
+    assert resp.status_code == 304
+    assert resp.headers['ETag'] == small.headers['ETag']
+
+
+def test_materialized_export_files(client, tmp_path):
+    """List changes rewrite export files that are served via X-Accel-Redirect."""
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    from wgui.lists.exports import check_export_files
+    app = client.application
+    app.config.update(EXPORT_MATERIALIZE_DIR=str(tmp_path), EXPORT_SERVE_MODE='accel')
+    with app.app_context():
+        lst = ListModel(name='On Disk', type='Ip')
+        db.session.add(lst)
+        db.session.commit()
+        db.session.add(DataList(list_id=lst.id, data='1.2.3.4', date=date(2030, 1, 1)))
+        db.session.commit()
+    path = tmp_path / 'ip' / 'on-disk.txt'
+    assert path.read_bytes() == b'type=ip\n1.2.3.4'
+    resp = client.get('/lists/ip/on-disk.txt')
+    assert resp.headers['X-Accel-Redirect'] == '/_wgui_exports/ip/on-disk.txt'
+    with app.app_context():
+        lst = ListModel.query.filter_by(name='On Disk').first()
+        lst.name = 'Moved'
+        db.session.commit()
+    assert not path.exists()
+    assert (tmp_path / 'ip' / 'moved.txt').exists()
+    assert check_export_files(app) == {'missing': [], 'stale': [], 'orphaned': []}
+    result = app.test_cli_runner().invoke(args=['exports', 'check'])
+    assert result.exit_code == 0
+
+
+def test_export_formats(client):
+    """Renderers are dispatched by extension and limited to fitting list types."""
+    import json
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    with client.application.app_context():
+        hosts = ListModel(name='Hosts', type='Ip')
+        domains = ListModel(name='Domains', type='String')
+        db.session.add_all([hosts, domains])
+        db.session.flush()
+        db.session.add(DataList(list_id=hosts.id, data='10.0.0.1', description='gw', date=date(2030, 1, 1)))
+        db.session.add(DataList(list_id=hosts.id, data='10.0.0.0/24', description='', date=date(2030, 1, 1)))
+        db.session.add(DataList(list_id=domains.id, data='Example.com', description='', date=date(2030, 1, 1)))
+        db.session.commit()
+    resp = client.get('/lists/ip/hosts.json')
+    assert resp.headers['Content-Type'].startswith('application/json')
+    doc = json.loads(resp.data)
+    assert doc['name'] == 'Hosts'
+    assert {e['data'] for e in doc['entries']} == {'10.0.0.1', '10.0.0.0/24'}
+    assert client.get('/lists/ip/hosts.csv').data.startswith(b'data,description,expires\n')
+    ipset = client.get('/lists/ip/hosts.ipset').data.decode()
+    assert 'add wgui_hosts-v4 10.0.0.0/24 -exist' in ipset
+    assert '10.0.0.1' not in ipset
+    assert 'flags interval' in client.get('/lists/ip/hosts.nft').data.decode()
+    rpz = client.get('/lists/string/domains.rpz').data.decode()
+    assert 'example.com CNAME .' in rpz and '*.example.com CNAME .' in rpz
+    assert client.get('/lists/string/domains.ipset').status_code == 404
+    assert client.get('/lists/ip/hosts.rpz').status_code == 404
+    assert client.get('/lists/ip/hosts.xml').status_code == 404
+
+
+def test_streamed_export_memory_bounded(client):
+    """Large lists are streamed in batches with memory independent of size."""
+    import tracemalloc
+    import zlib
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    count = 500_000
+    with client.application.app_context():
+        lst = ListModel(name='Big', type='Ip')
+        db.session.add(lst)
+        db.session.commit()
+        rows = [{'list_id': lst.id, 'data': f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}',
+                 'description': '', 'date': date(2030, 1, 1)} for i in range(count)]
+        db.session.execute(DataList.__table__.insert(), rows)
+        # raw inserts bypass the item counter the stream threshold reads
+        lst.item_count = count
+        db.session.commit()
+        del rows
+    resp = client.get('/lists/ip/big.txt', buffered=False)
+    assert resp.headers['X-Export-Cache'] == 'stream'
+    lines = 0
+    tracemalloc.start()
+    try:
+        for chunk in resp.response:
+            lines += chunk.count(b'\n')
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        resp.close()
+    assert lines == count
+    assert peak < 4 * 1024 * 1024
+
+    resp = client.get('/lists/ip/big.txt?stream=1', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert zlib.decompress(resp.data, 31).count(b'\n') == count
+
+
+def test_items_follow_list_by_id(client, login):
+    """Renaming a list keeps its items; backups restore by id or by name."""
+    import io
+    import json
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    from wgui.backup_utils import build_backup_payload
+    login()
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Old', type='Ip')
+        db.session.add(lst)
+        db.session.flush()
+        db.session.add(DataList(list_id=lst.id, data='1.2.3.4', date=date(2030, 1, 1)))
+        db.session.commit()
+        list_id = lst.id
+    client.post(f'/lists/{list_id}/edit', data={'name': 'New'})
+    assert client.get('/lists/ip/new.txt').data == b'type=ip\n1.2.3.4'
+
+    with app.app_context():
+        payload = build_backup_payload(app)
+    assert payload['items'][0]['list_id'] == list_id
+    assert payload['items'][0]['category'] == 'New'
+    legacy = json.loads(json.dumps(payload))
+    for item in legacy['items']:
+        del item['list_id']
+    for backup in (payload, legacy):
+        with app.app_context():
+            DataList.query.delete()
+            db.session.commit()
+        resp = client.post('/users/backup/restore', data={
+            'file': (io.BytesIO(json.dumps(backup).encode()), 'backup.json'),
+        }, content_type='multipart/form-data')
+        assert resp.status_code == 302
+        with app.app_context():
+            item = DataList.query.one()
+            assert (item.list_id, item.category) == (list_id, 'New')
+
+    # a legacy item whose category has no list is kept in a placeholder list
+    from wgui.models import AuditLog
+    legacy['items'].append({**legacy['items'][0], 'id': legacy['items'][0]['id'] + 1, 'category': 'Gone List'})
+    resp = client.post('/users/backup/restore', data={
+        'file': (io.BytesIO(json.dumps(legacy).encode()), 'backup.json'),
+    }, content_type='multipart/form-data', follow_redirects=True)
+    assert b'1 items had no list and were kept in new lists: Gone List' in resp.data
+    with app.app_context():
+        placeholder = ListModel.query.filter_by(name='Gone List').one()
+        assert (placeholder.type, placeholder.item_count) == ('String', 1)
+        assert DataList.query.filter_by(list_id=placeholder.id).one().data == '1.2.3.4'
+        assert 'placeholder_lists=Gone List' in AuditLog.query.filter_by(action='backup_restored').one().details
+
+
+def test_ip_lookup(client, login):
+    """Lookup returns every Ip/Ip Range entry covering an address."""
+    from sqlalchemy import event
+    from wgui.ip_index import lookup_address
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    login()
+    app = client.application
+    with app.app_context():
+        ips = ListModel(name='Blocked', type='Ip')
+        ranges = ListModel(name='Ranges', type='Ip Range')
+        words = ListModel(name='Words', type='String')
+        db.session.add_all([ips, ranges, words])
+        db.session.flush()
+        for lst, value in [(ips, '10.1.2.3'), (ips, '10.1.0.0/16'), (ranges, '10.1.2.0-10.1.2.9'),
+                           (ranges, '2001:db8::/32'), (words, '10.1.2.3'), (ips, 'not-an-ip')]:
+            db.session.add(DataList(list_id=lst.id, data=value, date=date(2030, 1, 1)))
+        db.session.commit()
+        item = DataList.query.filter_by(data='10.1.2.3', list_id=ips.id).one()
+        item.data = '10.9.9.9'
+        db.session.commit()
+    resp = client.get('/lists/lookup?ip=10.1.2.3')
+    assert sorted((m['list'], m['data']) for m in resp.get_json()['matches']) == [
+        ('Blocked', '10.1.0.0/16'), ('Ranges', '10.1.2.0-10.1.2.9'),
+    ]
+    assert [m['data'] for m in client.get('/lists/lookup?ip=2001:db8::1').get_json()['matches']] == ['2001:db8::/32']
+    assert client.get('/lists/lookup?ip=10.9.9.9').get_json()['matches'][0]['list'] == 'Blocked'
+    assert client.get('/lists/lookup?ip=nope').status_code == 400
+    result = app.test_cli_runner().invoke(args=['lists', 'lookup', '10.1.2.5'])
+    assert 'Ranges\t10.1.2.0-10.1.2.9' in result.output
+
+    # covering entries come from the prefix trie; only their rows are read, by index
+    plans = []
+    with app.app_context():
+        raw = db.session.connection().connection.dbapi_connection
+
+        def explain(conn, cursor, statement, params, context, executemany):
+            if statement.startswith('SELECT data_list.id'):
+                plans.extend(row[3] for row in raw.execute('EXPLAIN QUERY PLAN ' + statement, params))
+
+        event.listen(db.engine, 'before_cursor_execute', explain)
+        try:
+            assert [i.data for i in lookup_address('10.1.2.3')] == ['10.1.0.0/16', '10.1.2.0-10.1.2.9']
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', explain)
+    assert plans and not any(plan.startswith('SCAN data_list') for plan in plans)
+
+
+def test_bulk_ip_match(client, login):
+    """Batches are matched against cached per-list intervals, refreshed on change."""
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    login()
+    app = client.application
+    with app.app_context():
+        ips = ListModel(name='Blocked', type='Ip')
+        ranges = ListModel(name='Ranges', type='Ip Range')
+        db.session.add_all([ips, ranges])
+        db.session.flush()
+        for lst, value in [(ips, '10.1.0.0/16'), (ips, '192.0.2.7'), (ranges, '10.1.2.0-10.1.2.9'),
+                           (ranges, '2001:db8::/32')]:
+            db.session.add(DataList(list_id=lst.id, data=value, date=date(2030, 1, 1)))
+        db.session.commit()
+        ips_id = ips.id
+    resp = client.post('/lists/match', data='10.1.2.3\n10.1.9.9\n8.8.8.8\n2001:db8::5\nbogus\n',
+                       content_type='text/plain')
+    body = resp.get_json()
+    assert body['checked'] == 5
+    assert body['matches'] == {
+        '10.1.2.3': ['Blocked', 'Ranges'],
+        '10.1.9.9': ['Blocked'],
+        '2001:db8::5': ['Ranges'],
+    }
+    assert body['invalid'] == ['bogus']
+    with app.app_context():
+        db.session.add(DataList(list_id=ips_id, data='8.8.8.8', date=date(2030, 1, 1)))
+        db.session.commit()
+    resp = client.post('/lists/match', json={'addresses': ['8.8.8.8', '192.0.2.8']})
+    assert resp.get_json()['matches'] == {'8.8.8.8': ['Blocked']}
+    assert client.post('/lists/match', json={'addresses': 'nope'}).status_code == 400
+
+
+def test_longest_prefix_match(client, login):
+    """The lookup API reports the most specific entry and follows list changes."""
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    login()
+    app = client.application
+    with app.app_context():
+        wide = ListModel(name='Wide', type='Ip')
+        narrow = ListModel(name='Narrow', type='Ip Range')
+        db.session.add_all([wide, narrow])
+        db.session.flush()
+        db.session.add(DataList(list_id=wide.id, data='10.1.0.0/16', description='site', date=date(2030, 1, 1)))
+        db.session.add(DataList(list_id=narrow.id, data='10.1.2.0-10.1.2.255', description='lab', date=date(2030, 1, 1)))
+        db.session.commit()
+        narrow_id = narrow.id
+    best = client.get('/lists/lookup?ip=10.1.2.3').get_json()['longest']
+    assert best['prefix'] == '10.1.2.0/24'
+    assert [(e['list'], e['description'], e['expires']) for e in best['entries']] == [('Narrow', 'lab', '2030-01-01')]
+    with app.app_context():
+        db.session.add(DataList(list_id=narrow_id, data='10.1.2.3', description='host', date=date(2031, 1, 1)))
+        db.session.commit()
+    best = client.get('/lists/lookup?ip=10.1.2.3').get_json()['longest']
+    assert best['prefix'] == '10.1.2.3/32'
+    assert best['entries'][0]['description'] == 'host'
+    with app.app_context():
+        for item in DataList.query.filter_by(list_id=narrow_id).all():
+            db.session.delete(item)
+        db.session.commit()
+    best = client.get('/lists/lookup?ip=10.1.2.3').get_json()['longest']
+    assert best['prefix'] == '10.1.0.0/16'
+    assert best['entries'][0]['list'] == 'Wide'
+    assert client.get('/lists/lookup?ip=192.0.2.1').get_json()['longest'] is None
+
+
+def test_prefix_trie_prunes_removed_prefixes():
+    """Removing prefixes frees their nodes, so churn does not grow the trie."""
+    from wgui.ip_trie import PrefixTrie
+    trie = PrefixTrie()
+    base = 0xFFFF << 32 | 10 << 24
+    trie.insert(base, 104, (1, '10.0.0.0/8'))
+    kept = trie.node_count
+    allocated = []
+    for _ in range(3):
+        for i in range(256):
+            trie.insert(base | i << 8, 120, (2, f'10.0.{i}.0/24'))
+        assert trie.node_count > kept
+        for i in range(256):
+            trie.remove(base | i << 8, 120, (2, f'10.0.{i}.0/24'))
+        assert trie.node_count == kept
+        allocated.append(len(trie.left))
+    # freed slots are reused rather than appended
+    assert allocated[0] == allocated[-1]
+    assert trie.covering(base | 5 << 8) == {(1, '10.0.0.0/8')}
+
+
+def test_string_match_modes(client, login):
+    """Domain mode matches label suffixes; substring mode matches anywhere."""
+    from wgui.models import ListModel, DataList
+    from wgui.extensions import db
+    login()
+    app = client.application
+    with app.app_context():
+        domains = ListModel(name='Domains', type='String')
+        words = ListModel(name='Words', type='String')
+        db.session.add_all([domains, words])
+        db.session.flush()
+        for lst, value in [(domains, 'Example.com'), (domains, '*.ads.net'), (words, 'casino'), (words, 'bet')]:
+            db.session.add(DataList(list_id=lst.id, data=value, date=date(2030, 1, 1)))
+        db.session.commit()
+        words_id = words.id
+    resp = client.post('/lists/match/strings', data='www.example.com\nhttps://user@EXAMPLE.com:8443/x\n'
+                       'notexample.com\nads.net\ncdn.ads.net\n', content_type='text/plain')
+    assert resp.get_json()['matches'] == {
+        'www.example.com': [{'list': 'Domains', 'data': 'Example.com'}],
+        'https://user@EXAMPLE.com:8443/x': [{'list': 'Domains', 'data': 'Example.com'}],
+        'cdn.ads.net': [{'list': 'Domains', 'data': '*.ads.net'}],
+    }
+    body = client.post('/lists/match/strings', json={'mode': 'substring', 'items': ['BET365-casino.example', 'safe']}).get_json()
+    assert body['matches'] == {'BET365-casino.example': [
+        {'list': 'Words', 'data': 'bet'}, {'list': 'Words', 'data': 'casino'},
+    ]}
+    with app.app_context():
+        db.session.add(DataList(list_id=words_id, data='safe', date=date(2030, 1, 1)))
+        db.session.commit()
+    body = client.post('/lists/match/strings?mode=substring', json=['safe']).get_json()
+    assert body['matches'] == {'safe': [{'list': 'Words', 'data': 'safe'}]}
+    assert client.post('/lists/match/strings?mode=regex', json=[]).status_code == 400
+
+
+def test_bulk_import(client, login, tmp_path, monkeypatch):
+    """Imports canonicalize, de-duplicate, journal and audit in one pass."""
+    import io
+    from wgui.models import AuditLog, ListModel, DataList
+    from wgui.extensions import db
+    login()
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Feed', type='Ip')
+        db.session.add(lst)
+        db.session.flush()
+        db.session.add(DataList(list_id=lst.id, data='10.0.0.1', date=date(2030, 1, 1)))
+        db.session.commit()
+        list_id, since = lst.id, lst.version
+    feed = b'# feed\n10.0.0.1\n10.0.0.2\n 10.0.0.2 \n10.0.1.7/24\nnot-an-ip\n1.1.1.1-1.1.1.5\n2001:DB8::1\n'
+    resp = client.post(f'/lists/{list_id}/import', data={
+        'file': (io.BytesIO(feed), 'feed.txt'),
+        'date': '2030-06-01',
+    }, content_type='multipart/form-data', follow_redirects=True)
+    assert b'Imported 3 entries (2 duplicates, 2 invalid skipped)' in resp.data
+    with app.app_context():
+        rows = {i.data: i for i in DataList.query.filter_by(list_id=list_id).all()}
+        assert set(rows) == {'10.0.0.1', '10.0.0.2', '10.0.1.0/24', '2001:db8::1'}
+        assert rows['10.0.1.0/24'].ip_start is not None
+        audits = AuditLog.query.filter_by(action='items_imported').all()
+        assert len(audits) == 1 and 'added=3' in audits[0].details
+        assert audits[0].actor_name == 'admin'
+    delta = client.get(f'/lists/ip/feed.txt?since={since}').data.decode().split('\n')
+    assert sorted(delta[2:]) == ['+10.0.0.2', '+10.0.1.0/24', '+2001:db8::1']
+    assert client.get('/lists/lookup?ip=10.0.1.9').get_json()['matches'][0]['data'] == '10.0.1.0/24'
+
+    csv_file = tmp_path / 'feed.csv'
+    csv_file.write_text('data,description,expires\n10.0.0.3,from csv,2031-01-01\n10.0.0.2,,\n')
+    result = app.test_cli_runner().invoke(args=['lists', 'import', 'Feed', str(csv_file), '--expires', '2030-01-01'])
+    assert 'Imported 1 entries (1 duplicates, 0 invalid skipped)' in result.output
+    with app.app_context():
+        item = DataList.query.filter_by(data='10.0.0.3').one()
+        assert (item.description, item.date) == ('from csv', date(2031, 1, 1))
+
+    # an entry another writer adds mid-import is skipped by the insert and not counted
+    from wgui.lists import bulk
+    real_insert = bulk._insert_new
+
+    def racing_insert(values):
+        db.session.add(DataList(list_id=list_id, data='10.0.0.4', date=date(2030, 1, 1)))
+        db.session.flush()
+        return real_insert(values)
+
+    with app.app_context():
+        lst = db.session.get(ListModel, list_id)
+        count, version = lst.item_count, lst.version
+        monkeypatch.setattr(bulk, '_insert_new', racing_insert)
+        result = bulk.import_entries(lst, [('10.0.0.4', None, date(2030, 1, 1)), ('10.0.0.5', None, date(2030, 1, 1))])
+        db.session.commit()
+        assert (result.added, result.duplicates) == (1, 1)
+        assert lst.item_count == count + 2 == DataList.query.filter_by(list_id=list_id).count()
+    delta = client.get(f'/lists/ip/feed.txt?since={version}').data.decode().split('\n')
+    assert '+10.0.0.5' in delta
+
+    # single adds and edits store the same canonical form, so they dedup against imports
+    resp = client.post(f'/lists/{list_id}/add', data={'data': '2001:DB8:0::1', 'date': '2030-01-01'},
+                       follow_redirects=True)
+    assert b'Item already exists' in resp.data
+    resp = client.post(f'/lists/{list_id}/add', data={'data': '10.000.0.9', 'date': '2030-01-01'},
+                       follow_redirects=True)
+    assert b'Not a valid Ip entry' in resp.data
+    client.post(f'/lists/{list_id}/add', data={'data': ' 10.9.9.9/16 ', 'date': '2030-01-01'})
+    with app.app_context():
+        item = DataList.query.filter_by(list_id=list_id, data='10.9.0.0/16').one()
+        item_id = item.id
+    client.post(f'/lists/edit/{item_id}', data={'data': '2001:0db8::0002', 'date': '2030-01-01'})
+    with app.app_context():
+        assert db.session.get(DataList, item_id).data == '2001:db8::2'
+
+
+def test_bulk_delete_and_extend(client, login):
+    """Bulk actions run set-based, audit every entry and bump the version once."""
+    from wgui.models import AuditLog, ListModel, DataList
+    from wgui.extensions import db
+    login()
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Many', type='String')
+        db.session.add(lst)
+        db.session.flush()
+        for i in range(1200):
+            db.session.add(DataList(list_id=lst.id, data=f'host{i}.example', date=date(2030, 1, 1 + i % 28)))
+        db.session.commit()
+        list_id, since = lst.id, lst.version
+        ids = [i.id for i in DataList.query.filter(DataList.data.in_(['host1.example', 'host2.example'])).all()]
+    resp = client.post(f'/lists/{list_id}/bulk', data={'action': 'delete', 'scope': 'regex', 'pattern': r'^host1\d{2,3}\.'},
+                       follow_redirects=True)
+    assert b'Deleted 300 entries' in resp.data
+    resp = client.post(f'/lists/{list_id}/bulk', data={'action': 'extend', 'scope': 'selected', 'ids': ids,
+                                                      'new_date': '2031-12-31'}, follow_redirects=True)
+    assert b'Updated expiry of 2 entries' in resp.data
+    resp = client.post(f'/lists/{list_id}/bulk', data={'action': 'delete', 'scope': 'window',
+                                                      'date_from': '2030-01-28', 'date_to': '2030-01-28'},
+                       follow_redirects=True)
+    assert b'Deleted 31 entries' in resp.data
+    assert b'Invalid regex' in client.post(f'/lists/{list_id}/bulk', data={'action': 'delete', 'scope': 'regex',
+                                                                           'pattern': '('}, follow_redirects=True).data
+    with app.app_context():
+        assert DataList.query.filter_by(list_id=list_id).count() == 869
+        assert db.session.get(DataList, ids[0]).date == date(2031, 12, 31)
+        assert AuditLog.query.filter_by(action='item_deleted', list_id=list_id).count() == 331
+        assert AuditLog.query.filter_by(action='item_deleted').first().actor_name == 'admin'
+    delta = client.get(f'/lists/string/many.txt?since={since}').data.decode().split('\n')
+    assert len(delta) == 2 + 331 and all(line.startswith('-') for line in delta[2:])
+
+
+def test_feed_sync(client, login, tmp_path):
+    """Feeds are diffed into the list and skipped when the server says 304."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from wgui.extensions import db, scheduler
+    from wgui.lists.feeds import sync_source
+    from wgui.models import DataList, ListModel, ListSource
+
+    feed = {'body': b'10.0.0.1\n10.0.0.2\n# comment\nbogus\n', 'etag': '"v1"', 'statuses': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get('If-None-Match') == feed['etag']:
+                feed['statuses'].append(304)
+                self.send_response(304)
+                self.end_headers()
+                return
+            feed['statuses'].append(200)
+            self.send_response(200)
+            self.send_header('ETag', feed['etag'])
+            self.send_header('Content-Length', str(len(feed['body'])))
+            self.end_headers()
+            self.wfile.write(feed['body'])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        login()
+        app = client.application
+        with app.app_context():
+            lst = ListModel(name='Feed', type='Ip')
+            db.session.add(lst)
+            db.session.flush()
+            db.session.add(DataList(list_id=lst.id, data='10.0.0.9', date=date(2030, 1, 1)))
+            db.session.commit()
+            list_id = lst.id
+        url = f'http://127.0.0.1:{server.server_port}/feed.txt'
+        client.post(f'/lists/{list_id}/source', data={'url': url, 'interval_minutes': 15,
+                                                     'expire_days': 30, 'enabled': 'y'})
+        assert scheduler.get_job(f'feed_sync_{list_id}') is not None
+
+        resp = client.post(f'/lists/{list_id}/source/sync', follow_redirects=True)
+        assert b'added=2; removed=1; invalid=1' in resp.data
+        with app.app_context():
+            lst = db.session.get(ListModel, list_id)
+            assert sorted(i.data for i in DataList.query.filter_by(list_id=list_id)) == ['10.0.0.1', '10.0.0.2']
+            assert lst.source.etag == '"v1"'
+            version = lst.version
+            assert sync_source(lst.source).status == 'unchanged'
+            assert db.session.get(ListModel, list_id).version == version
+        assert feed['statuses'] == [200, 304]
+
+        feed.update(body=b'10.0.0.2\n10.0.0.3\n', etag='"v2"')
+        with app.app_context():
+            result = sync_source(db.session.get(ListModel, list_id).source, chunk_size=1)
+            assert (result.added, result.removed) == (1, 1)
+        delta = client.get(f'/lists/ip/feed.txt?since={version}').data.decode().split('\n')
+        assert sorted(delta[2:]) == ['+10.0.0.3', '-10.0.0.1']
+
+        path = tmp_path / 'feed.txt'
+        path.write_text('10.0.0.3\n')
+        with app.app_context():
+            source = db.session.get(ListModel, list_id).source
+            source.url = str(path)
+            source.etag = None
+            db.session.commit()
+            assert sync_source(source).removed == 1
+            assert sync_source(source).status == 'unchanged'
+
+        client.post(f'/lists/{list_id}/source/delete')
+        assert scheduler.get_job(f'feed_sync_{list_id}') is None
+        with app.app_context():
+            assert ListSource.query.count() == 0
+    finally:
+        server.shutdown()
+
+
+def test_list_items_keyset_pagination(client, login):
+    """List pages seek by cursor and take the total from the maintained counter."""
+    import re
+    from sqlalchemy import event
+    from wgui.extensions import db
+    from wgui.lists.bulk import bulk_delete, import_entries, select_items
+    from wgui.models import DataList, ListModel
+    login()
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Paged', type='String')
+        db.session.add(lst)
+        db.session.flush()
+        for i in range(240):
+            db.session.add(DataList(list_id=lst.id, data=f'entry{i:03d}', date=date(2030, 1, 1 + i % 28)))
+        db.session.commit()
+        list_id = lst.id
+        assert lst.item_count == 240
+        import_entries(lst, [(f'bulk{i}', None, date(2030, 1, 1)) for i in range(10)])
+        bulk_delete(lst, select_items(lst, pattern='^bulk[0-4]$'))
+        db.session.delete(DataList.query.filter_by(data='entry239').one())
+        db.session.commit()
+        assert db.session.get(ListModel, list_id).item_count == 244 == DataList.query.filter_by(list_id=list_id).count()
+
+    def rows(resp):
+        return re.findall(r'<td>((?:entry|bulk)\w+)</td>', resp.data.decode())
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2].lower()))
+    first = client.get(f'/lists/{list_id}/?per_page=100')
+    assert rows(first) == [f'entry{i:03d}' for i in range(100)]
+    assert b'244 Entries' in first.data
+    assert not any('count(' in s for s in statements)
+
+    seen, resp = [], first
+    while True:
+        seen += rows(resp)
+        nxt = re.search(r'href="([^"]+after=[^"]+)"', resp.data.decode())
+        if not nxt:
+            break
+        resp = client.get(nxt.group(1).replace('&amp;', '&'))
+    assert len(seen) == 244 and len(set(seen)) == 244
+    prev = re.search(r'href="([^"]+before=[^"]+)"', resp.data.decode()).group(1).replace('&amp;', '&')
+    assert rows(client.get(prev)) == [f'entry{i:03d}' for i in range(100, 200)]
+
+    by_data = client.get(f'/lists/{list_id}/?sort=data&per_page=3')
+    assert rows(by_data) == ['bulk5', 'bulk6', 'bulk7']
+    by_date = client.get(f'/lists/{list_id}/?sort=date&per_page=20')
+    assert rows(by_date)[:10] == ['entry000', 'entry028', 'entry056', 'entry084', 'entry112', 'entry140',
+                                  'entry168', 'entry196', 'entry224', 'bulk5']
+
+    searched = client.get(f'/lists/{list_id}/?q=entry1[0-9]5&per_page=4')
+    assert rows(searched) == ['entry105', 'entry115', 'entry125', 'entry135']
+    nxt = re.search(r'href="([^"]+after=[^"]+)"', searched.data.decode()).group(1).replace('&amp;', '&')
+    assert rows(client.get(nxt)) == ['entry145', 'entry155', 'entry165', 'entry175']
+    assert rows(client.get(f'/lists/{list_id}/?q=entry(')) == []
+    assert client.get(f'/lists/{list_id}/?after=garbage').status_code == 200
+
+
+def test_search_runs_in_database(client, login):
+    """The q filter is applied in SQL (REGEXP/instr) under a time budget."""
+    import re
+    from sqlalchemy import event
+    from wgui.extensions import db
+    from wgui.models import DataList, ListModel
+    from wgui.sql_regex import _compile
+    login()
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Searched', type='String')
+        db.session.add(lst)
+        db.session.commit()
+        list_id = lst.id
+        db.session.execute(DataList.__table__.insert(), [
+            {'list_id': list_id, 'data': f'entry{i:05d}', 'description': 'tagged' if i % 1000 == 7 else None,
+             'date': date(2030, 1, 1)}
+            for i in range(50000)
+        ])
+        db.session.commit()
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2].lower()))
+
+    def rows(resp):
+        return re.findall(r'<td>(entry\d+)</td>', resp.data.decode())
+
+    _compile.cache_clear()
+    assert rows(client.get(f'/lists/{list_id}/?q=^entry0012[05]$')) == ['entry00120', 'entry00125']
+    assert _compile.cache_info().hits > 0
+    assert any('regexp' in s and 'limit' in s for s in statements)
+    statements.clear()
+    assert rows(client.get(f'/lists/{list_id}/?q=tagged&per_page=3')) == ['entry00007', 'entry01007', 'entry02007']
+    assert any('instr(' in s for s in statements) and not any('regexp' in s for s in statements)
+    # invalid regexes are searched for literally, as before
+    assert rows(client.get(f'/lists/{list_id}/?q=entry(')) == []
+    assert b'too complex' in client.get(f'/lists/{list_id}/?q=(e%2B)%2B$').data
+
+    app.config['SEARCH_TIMEOUT_MS'] = 1
+    resp = client.get(f'/lists/{list_id}/?q=x$')
+    assert b'Search took too long' in resp.data and rows(resp) == []
+    resp = client.post(f'/lists/{list_id}/bulk', data={'action': 'delete', 'scope': 'regex', 'pattern': 'x$'},
+                       follow_redirects=True)
+    assert b'Regex took too long' in resp.data
+    with app.app_context():
+        assert DataList.query.filter_by(list_id=list_id).count() == 50000
+
+
+def test_regex_complexity_check():
+    """Bounded nesting is allowed; ambiguous repetition is rejected before it runs."""
+    import pytest
+    from wgui.sql_regex import PatternTooComplex, compile_pattern
+    for pattern in (r'^(\d{1,3}\.){3}\d{1,3}$', r'(com|net)+', r'(x|y)*z', r'^entry0012[05]$'):
+        compile_pattern(pattern)
+    for pattern in (r'(a|aa)+c', r'(a+)+', r'(\w*)*', r'(a{1,3})+', r'(a|b|)+'):
+        with pytest.raises(PatternTooComplex):
+            compile_pattern(pattern)
+
+
+def test_global_search_index(client, login, monkeypatch):
+    """Home search uses the FTS index over data and description, ranked and paged."""
+    import contextlib
+    from wgui import search
+    from wgui.sql_regex import SearchTimeout
+    from wgui.extensions import db
+    from wgui.lists.bulk import bulk_delete, import_entries, select_items
+    from wgui.models import DataList, ListModel
+    login()
+    app = client.application
+    with app.app_context():
+        a, b = ListModel(name='Alpha', type='String'), ListModel(name='Beta', type='String')
+        db.session.add_all([a, b])
+        db.session.flush()
+        db.session.add_all([
+            DataList(list_id=a.id, data='evil.example.com', description='phishing', date=date(2030, 1, 1)),
+            DataList(list_id=b.id, data='benign.org', description='seen with EVIL payloads', date=date(2030, 1, 1)),
+            DataList(list_id=b.id, data='<b>evil</b>', date=date(2030, 1, 1)),
+            DataList(list_id=a.id, data='unrelated.net', date=date(2030, 1, 1)),
+        ])
+        db.session.commit()
+        import_entries(b, [('bulk-evil.test', None, date(2030, 1, 1)), ('gone-evil.test', None, date(2030, 1, 1))])
+        db.session.commit()
+        bulk_delete(b, select_items(b, pattern='^gone'))
+        item = DataList.query.filter_by(data='unrelated.net').one()
+        item.description = 'now evil too'
+        db.session.commit()
+
+    html = client.get('/?q=evil').data.decode()
+    assert '<mark>evil</mark>.example.com' in html
+    assert 'seen with <mark>EVIL</mark> payloads' in html
+    assert '&lt;b&gt;<mark>evil</mark>&lt;/b&gt;' in html and '<b>evil' not in html
+    assert 'bulk-<mark>evil</mark>.test' in html and 'gone-evil' not in html
+    assert 'now <mark>evil</mark> too' in html
+    # entries matching on data rank above description-only matches
+    assert html.index('.example.com') < html.index('payloads')
+
+    app.config['SEARCH_PAGE_SIZE'] = 2
+    first = client.get('/?q=evil').data.decode()
+    assert first.count('<mark>') == 2 and 'page=2' in first
+    last = client.get('/?q=evil&page=3').data.decode()
+    assert last.count('<mark>') == 1 and 'page=2' in last and 'page=4' not in last
+    # too short for the trigram index: falls back to a scan
+    assert '<mark>ph</mark>ishing' in client.get('/?q=ph').data.decode()
+    assert 'unordered' not in first
+
+    @contextlib.contextmanager
+    def exhausted(ms):
+        raise SearchTimeout()
+        yield
+
+    # ranking over budget: same matches, served in index order
+    monkeypatch.setattr(search, 'time_budget', exhausted)
+    unranked = client.get('/?q=evil').data.decode()
+    assert 'unordered' in unranked and unranked.count('<mark>') == 2
+
+
+def test_home_dashboard_cached(client, login):
+    """Expiry buckets come from one window query and are cached until a list changes."""
+    from datetime import timedelta
+    from sqlalchemy import event
+    from wgui.dashboard import get_dashboard_cache
+    from wgui.extensions import db
+    from wgui.models import DataList, ListModel
+    login()
+    app = client.application
+    today = date.today()
+    with app.app_context():
+        lst, other = ListModel(name='Soon', type='String'), ListModel(name='Other List', type='String')
+        db.session.add_all([lst, other])
+        db.session.flush()
+        for i, days in enumerate([0, 2, 3, 5, 7, 20, 30, 31, 90, -1]):
+            db.session.add(DataList(list_id=lst.id, data=f'exp{i}-d{days}', date=today + timedelta(days=days)))
+        db.session.commit()
+        list_id, other_id = lst.id, other.id
+
+        dashboard = get_dashboard_cache().get()
+        assert [e.data for e in dashboard.buckets[3]] == ['exp0-d0', 'exp1-d2', 'exp2-d3']
+        assert dashboard.counts == {3: 3, 7: 5, 30: 7}
+        # fewer than ten inside the window: the top list reaches past it
+        assert [e.data for e in dashboard.upcoming][-2:] == ['exp7-d31', 'exp8-d90']
+        assert 'exp9-d-1' not in [e.data for e in dashboard.upcoming]
+
+        # past the row cap the bucket sizes still count everything
+        app.config['DASHBOARD_MAX_ROWS'] = 4
+        db.session.add(DataList(list_id=other_id, data='extra', date=today + timedelta(days=1)))
+        db.session.commit()
+        capped = get_dashboard_cache().get()
+        assert len(capped.buckets[30]) == 4 and capped.counts == {3: 4, 7: 6, 30: 8}
+        assert capped.buckets[3][1].list_name == 'Other List'
+        app.config['DASHBOARD_MAX_ROWS'] = 1000
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2].lower()))
+    html = client.get('/').data.decode()
+    assert 'string.soon' in html and 'string.otherlist' in html
+    # still cached from above: only the version counter is read
+    assert not any('data_list' in s for s in statements)
+
+    with app.app_context():
+        db.session.add(DataList(list_id=list_id, data='fresh-entry', date=today + timedelta(days=1)))
+        db.session.commit()
+    statements.clear()
+    assert 'fresh-entry' in client.get('/').data.decode()
+    assert sum('from data_list join list_model' in s for s in statements) == 2
+
+    client.post(f'/lists/{other_id}/delete', follow_redirects=True)
+    html = client.get('/').data.decode()
+    assert 'string.otherlist' not in html and 'fresh-entry' in html
+
+    with app.app_context():
+        cache = get_dashboard_cache()
+        cache.get()
+        # the next day is a new key even with no list changes
+        tomorrow = cache.get(today + timedelta(days=1))
+        assert [e.data for e in tomorrow.buckets[3]][0] == 'fresh-entry'
+        assert 'exp0-d0' not in [e.data for e in tomorrow.upcoming]
+
+
+def test_sidebar_cached_by_list_version(client, login):
+    """The sidebar is built once per list version and shows entry counts."""
+    import re
+    from sqlalchemy import event
+    from wgui.extensions import db
+    from wgui.lists.bulk import import_entries
+    from wgui.models import ListModel
+    app = client.application
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2].lower()))
+    client.get('/login')
+    # signed out: no sidebar, no list queries
+    assert not any('list_model' in s for s in statements)
+
+    login()
+    with app.app_context():
+        lst = ListModel(name='Sidebar Hosts', type='String')
+        db.session.add(lst)
+        db.session.commit()
+        import_entries(lst, [(f'h{i}.test', None, date(2030, 1, 1)) for i in range(7)])
+        db.session.commit()
+        list_id = lst.id
+
+    def sidebar(html):
+        return re.findall(r'>(Sidebar[\w ]+) <span class="badge[^"]*">(\d+)</span>', html)
+
+    assert sidebar(client.get('/').data.decode()) == [('Sidebar Hosts', '7')]
+    statements.clear()
+    client.get('/')
+    client.get('/no-such-page')
+    assert not any('from list_model' in s and 'item_count' in s for s in statements)
+
+    client.post(f'/lists/{list_id}/edit', data={'name': 'Sidebar Renamed'}, follow_redirects=True)
+    assert sidebar(client.get('/').data.decode()) == [('Sidebar Renamed', '7')]
+    client.post(f'/lists/{list_id}/add', data={'data': 'one-more.test', 'date': '2030-01-01'}, follow_redirects=True)
+    assert sidebar(client.get('/').data.decode()) == [('Sidebar Renamed', '8')]
+    client.post(f'/lists/{list_id}/delete', follow_redirects=True)
+    assert sidebar(client.get('/').data.decode()) == []
+
+
+def test_audit_service_queue(client, login):
+    """Audit rows follow their transaction; async mode queues them and writes in batches."""
+    from sqlalchemy import event
+    from wgui.audit import AuditService, audit
+    from wgui.extensions import db
+    from wgui.models import AuditLog, ListModel
+    login()
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Audited', type='String')
+        db.session.add(lst)
+        db.session.commit()
+        list_id = lst.id
+        # sync mode (tests, in-memory databases): inserted by the committing transaction
+        audit('feed_synced', 'list', list_id=list_id, details='kept')
+        db.session.commit()
+        audit('feed_synced', 'list', list_id=list_id, details='rolled back')
+        db.session.rollback()
+        db.session.commit()
+        assert [a.details for a in AuditLog.query.filter_by(action='feed_synced')] == ['kept']
+
+    service = AuditService(app, async_mode=True, max_queue=3, max_batch=100, flush_seconds=60)
+    app.extensions['audit'] = service
+    try:
+        assert client.post(f'/lists/{list_id}/add', data={'data': 'queued.test', 'date': '2030-01-01'}).status_code == 302
+        with app.app_context():
+            # the request committed without the audit insert
+            assert AuditLog.query.filter_by(action='item_added').count() == 0
+            assert service.stats()['depth'] == 1
+
+            inserts = []
+            event.listen(db.engine, 'before_cursor_execute',
+                         lambda conn, cur, stmt, params, ctx, many: inserts.append((stmt, many, len(params)))
+                         if stmt.startswith('INSERT INTO audit_log') else None)
+            for i in range(4):
+                audit('feed_synced', 'list', list_id=list_id, details=f'burst {i}')
+            db.session.commit()
+            # two rows fit in the queue, the other two were written by the committer
+            stats = service.stats()
+            assert stats['depth'] == 3 and stats['inline'] == 2 and stats['high_water'] == 3
+            assert inserts == [(inserts[0][0], True, 2)]
+
+            assert service.flush() == 3
+            assert inserts[1][1:] == (True, 3)
+            assert AuditLog.query.filter_by(action='item_added').one().actor_name == 'admin'
+            assert AuditLog.query.filter(AuditLog.details.like('burst%')).count() == 4
+        stats = client.get('/users/audit-queue').get_json()
+        assert stats['written'] == 5 and stats['batches'] == 2 and stats['depth'] == 0
+    finally:
+        service.stop()
+
+
+def test_audit_writes_retried(client, monkeypatch):
+    """Failed audit writes are retried and only dropped after max_attempts."""
+    from wgui import audit as audit_module, export_audit
+    from wgui.audit import AuditService, audit_row
+    from wgui.extensions import db
+    from wgui.models import AuditLog, ListModel
+    app = client.application
+    with app.app_context():
+        db.session.add(ListModel(name='Flaky', type='Ip'))
+        db.session.commit()
+    real_insert, real_row = audit_module._insert, export_audit.audit_row
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('database unavailable')
+
+    service = AuditService(app, async_mode=False, max_attempts=2)
+    app.extensions['audit'] = service
+    monkeypatch.setattr(audit_module, '_insert', broken)
+    with app.app_context():
+        assert service.write([audit_row('feed_synced', 'list', details='kept')]) == 0
+        assert service.stats()['retrying'] == 1
+        service.write([audit_row('feed_synced', 'list', details='dropped')], attempt=2)
+        assert service.stats()['failed'] == 1
+    monkeypatch.setattr(audit_module, '_insert', real_insert)
+    assert service.flush() == 1
+    assert service.stats()['retrying'] == 0
+
+    buffer = app.extensions['export_audit']
+    for _ in range(2):
+        assert client.get('/lists/ip/flaky.txt').status_code == 200
+    monkeypatch.setattr(export_audit, 'audit_row', broken)
+    assert buffer.flush(force=True) == 0
+    assert client.get('/lists/ip/flaky.txt').status_code == 200
+    monkeypatch.setattr(export_audit, 'audit_row', real_row)
+    assert buffer.flush(force=True) == 1
+    with app.app_context():
+        assert [a.details for a in AuditLog.query.filter_by(action='feed_synced')] == ['kept']
+        assert 'hits=3' in AuditLog.query.filter_by(action='list_exported').one().details
+
+
+def test_feed_sync_renews_expiry(client, login, tmp_path):
+    """Entries a feed still lists survive the expiry cleanup, even if the feed is unchanged."""
+    from datetime import timedelta
+    from wgui.extensions import db
+    from wgui.lists.feeds import sync_source
+    from wgui.models import DataList, ListModel, ListSource
+    from wgui.tasks import delete_expired_items
+    path = tmp_path / 'feed.txt'
+    path.write_text('10.1.0.1\n10.1.0.2\n')
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Stable Feed', type='Ip')
+        db.session.add(lst)
+        db.session.flush()
+        db.session.add(ListSource(list=lst, url=str(path), expire_days=30))
+        db.session.commit()
+        list_id = lst.id
+        assert sync_source(lst.source).added == 2
+
+        def age_entries():
+            # as if the expiry period had passed since the last sync
+            DataList.query.filter_by(list_id=list_id).update({'date': date.today() - timedelta(days=1)})
+            db.session.commit()
+
+        age_entries()
+        version = db.session.get(ListModel, list_id).version
+        assert sync_source(db.session.get(ListModel, list_id).source).status == 'unchanged'
+        assert db.session.get(ListModel, list_id).version > version
+        delete_expired_items()
+        entries = DataList.query.filter_by(list_id=list_id).all()
+        assert sorted(e.data for e in entries) == ['10.1.0.1', '10.1.0.2']
+        assert {e.date for e in entries} == {date.today() + timedelta(days=30)}
+
+        # without a sync they do expire
+        age_entries()
+        delete_expired_items()
+        assert DataList.query.filter_by(list_id=list_id).count() == 0
+
+
+def test_feed_sync_keeps_csv_dates(client, login, tmp_path):
+    """Dates from a CSV feed's expires column are stored and followed; only undated rows are renewed."""
+    from datetime import timedelta
+    from wgui.extensions import db
+    from wgui.lists.feeds import sync_source
+    from wgui.models import DataList, ListModel, ListSource
+    path = tmp_path / 'feed.csv'
+    path.write_text('data,description,expires\n10.2.0.1,,2026-11-01\n10.2.0.2,,2027-06-30\n10.2.0.3,,\n')
+    renewed = date.today() + timedelta(days=365)
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Dated Feed', type='Ip')
+        db.session.add(lst)
+        db.session.flush()
+        db.session.add(ListSource(list=lst, url=str(path), csv_format=True, expire_days=365))
+        db.session.commit()
+        list_id = lst.id
+
+        def dates():
+            return {e.data: e.date for e in DataList.query.filter_by(list_id=list_id)}
+
+        expected = {'10.2.0.1': date(2026, 11, 1), '10.2.0.2': date(2027, 6, 30), '10.2.0.3': renewed}
+        assert sync_source(lst.source).added == 3
+        assert dates() == expected
+        DataList.query.filter_by(list_id=list_id, data='10.2.0.3').update({'date': date(2026, 1, 1)})
+        db.session.commit()
+        assert sync_source(db.session.get(ListModel, list_id).source).status == 'updated'
+        assert dates() == expected
+
+        path.write_text('data,description,expires\n10.2.0.1,,2026-12-24\n10.2.0.2,,2027-06-30\n10.2.0.3,,\n')
+        sync_source(db.session.get(ListModel, list_id).source)
+        assert dates() == dict(expected, **{'10.2.0.1': date(2026, 12, 24)})
+
+
+def test_feed_source_admin_only_and_capped(client, login, tmp_path):
+    """Only admins choose what the server fetches, and oversized feeds are refused."""
+    import pytest
+    from wgui.extensions import db
+    from wgui.lists.feeds import FeedTooLarge, sync_source
+    from wgui.models import DataList, ListModel, ListSource
+    login()
+    client.post('/users/add', data={'username': 'carol', 'email': 'carol@example.com',
+                                     'password': 'pw123456', 'confirm_password': 'pw123456'})
+    app = client.application
+    with app.app_context():
+        lst = ListModel(name='Guarded', type='Ip')
+        db.session.add(lst)
+        db.session.commit()
+        list_id = lst.id
+    client.get('/logout')
+    login('carol', 'pw123456')
+    resp = client.post(f'/lists/{list_id}/source', data={
+        'url': 'http://169.254.169.254/latest/meta-data/', 'interval_minutes': 15, 'expire_days': 30,
+    }, follow_redirects=True)
+    assert b'Only admins can configure feed sources' in resp.data
+    with app.app_context():
+        assert ListSource.query.count() == 0
+
+    path = tmp_path / 'big.txt'
+    path.write_text(''.join(f'10.2.{i // 256}.{i % 256}\n' for i in range(1000)))
+    app.config['FEED_MAX_BYTES'] = 1024
+    with app.app_context():
+        db.session.add(ListSource(list_id=list_id, url=str(path)))
+        db.session.commit()
+        with pytest.raises(FeedTooLarge):
+            sync_source(db.session.get(ListModel, list_id).source)
+        db.session.rollback()
+        assert DataList.query.filter_by(list_id=list_id).count() == 0
+    assert client.post(f'/lists/{list_id}/source/delete', follow_redirects=True).status_code == 200
+    with app.app_context():
+        assert ListSource.query.count() == 1
+
+    # the admin's changes are audited under the request's user
+    from wgui.models import AuditLog
+    client.get('/logout')
+    login()
+    client.post(f'/lists/{list_id}/source', data={'url': str(path), 'interval_minutes': 15, 'expire_days': 30})
+    client.post(f'/lists/{list_id}/source/delete')
+    with app.app_context():
+        assert ListSource.query.count() == 0
+        rows = AuditLog.query.filter(AuditLog.details.like('source%')).all()
+        assert len(rows) == 2 and {row.actor_name for row in rows} == {'admin'}
@@ -142,3 +142,97 @@ def test_email_settings_update(client, login):
         settings = EmailSettings.query.first()
         assert settings.smtp_server == 'smtp.example.com'
         assert settings.to_email == 'b@example.com, c@example.com'
+
+
+def test_auth_context_resolved_once_per_request(client, login, monkeypatch):
+    import flask_jwt_extended.view_decorators as jwt_views
+    from sqlalchemy import event
+    from wgui.extensions import db
+    from wgui.models import ListModel
+
+    login()
+    with client.application.app_context():
+        lst = ListModel(name='Auth Ctx', type='String')
+        db.session.add(lst)
+        db.session.commit()
+        list_id = lst.id
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2].lower()))
+
+    decodes = []
+    real_decode = jwt_views.decode_token
+    monkeypatch.setattr(jwt_views, 'decode_token', lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+
+    def user_queries():
+        return sum(s.lstrip().startswith('select') and 'from user' in s for s in statements)
+
+    # view, blueprint guard, sidebar and account menu all share one context
+    resp = client.get(f'/lists/{list_id}/')
+    assert resp.status_code == 200 and b'Account' in resp.data
+    assert len(decodes) == 1 and user_queries() == 1
+
+    # audited write: the actor name is already cached from the page above
+    decodes.clear()
+    statements.clear()
+    resp = client.post(f'/lists/{list_id}/add', data={'data': 'ctx.test', 'date': '2030-01-01'})
+    assert resp.status_code == 302
+    assert len(decodes) == 1 and user_queries() == 0
+
+    decodes.clear()
+    client.get('/users/')
+    assert len(decodes) == 1
+
+    client.get('/logout')
+    decodes.clear()
+    assert client.get(f'/lists/{list_id}/').status_code == 302
+    assert decodes == []
+
+
+def test_actor_name_cache(client, login, monkeypatch):
+    import time
+    from datetime import date
+    from sqlalchemy import event
+    from wgui.actor_names import ActorNameCache, get_actor_names
+    from wgui.audit import audit
+    from wgui.extensions import db
+    from wgui.lists.bulk import import_entries
+    from wgui.models import AuditLog, ListModel, User
+
+    login()
+    client.post('/users/add', data={
+        'username': 'bob', 'email': 'bob@example.com', 'password': 'pw123456', 'confirm_password': 'pw123456',
+    }, follow_redirects=True)
+    app = client.application
+    with app.app_context():
+        bob = User.query.filter_by(username='bob').one()
+        bob_id = bob.id
+        lst = ListModel(name='Actors', type='String')
+        db.session.add(lst)
+        db.session.commit()
+        names = get_actor_names()
+        assert names.get(bob_id) == 'bob'
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2].lower()))
+        import_entries(lst, [('a.test', None, date(2030, 1, 1))], user_id=bob_id)
+        audit('user_promoted', 'user', user_id=bob_id)
+        db.session.commit()
+        assert not any('from user' in s for s in statements)
+        assert {a.actor_name for a in AuditLog.query.filter_by(user_id=bob_id)} == {'bob'}
+
+        # a rename elsewhere is picked up once the cached name expires
+        bob.username = 'robert'
+        db.session.commit()
+        assert names.get(bob_id) == 'bob'
+        monkeypatch.setattr(time, 'monotonic', lambda real=time.monotonic: real() + names.ttl + 1)
+        assert names.get(bob_id) == 'robert'
+        monkeypatch.undo()
+    client.post(f'/users/delete/{bob_id}', follow_redirects=True)
+    with app.app_context():
+        assert db.session.get(User, bob_id) is None
+        assert get_actor_names().get(bob_id) is None
+
+    small = ActorNameCache(max_size=2)
+    for uid, name in [(1, 'a'), (2, 'b'), (3, 'c')]:
+        small.put(uid, name)
+    assert small.get_many([2, 3]) == {2: 'b', 3: 'c'} and 1 not in small._names
@@ -5,6 +5,18 @@ from .lists import lists_bp
 from .logs import logs_bp
 from .extensions import db, migrate, jwt, init_scheduler
 from .error_handlers import register_error_handlers
+from .cli import register_cli
+from .export_cache import init_export_cache
+from .audit import init_audit
+from .export_audit import init_export_audit
+from .ip_match import init_ip_matcher
+from .ip_trie import init_prefix_index
+from .string_match import init_string_matcher
+from .dashboard import init_dashboard_cache
+from .sidebar import init_sidebar_cache
+from .auth_context import load_auth_context
+from .actor_names import init_actor_names
+from .sql_regex import init_sql_regex
 from flask_migrate import upgrade
 from .models import User, ListModel, EmailSettings
 from werkzeug.security import generate_password_hash
@@ -28,9 +40,22 @@ def create_app(config_overrides=None):
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    init_sql_regex(app)
     init_scheduler(app)
     # Import audit event listeners so they register with SQLAlchemy
     from . import audit_events  # noqa: F401
+    from . import list_versions  # noqa: F401
+    from . import ip_index  # noqa: F401
+    from . import search  # noqa: F401
+    init_export_cache(app)
+    init_audit(app)
+    init_export_audit(app)
+    init_ip_matcher(app)
+    init_prefix_index(app)
+    init_string_matcher(app)
+    init_dashboard_cache(app)
+    init_sidebar_cache(app)
+    init_actor_names(app)
 
     with app.app_context():
         if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:///:memory:'):
@@ -76,6 +101,7 @@ def create_app(config_overrides=None):
     app.register_blueprint(logs_bp)
 
     register_error_handlers(app)
+    register_cli(app)
     _inject_i18n(app)
 
     # Register scheduled cleanup task
@@ -93,15 +119,8 @@ def create_app(config_overrides=None):
 
     @app.before_request
     def _capture_user_for_audit():
-        """Capture current user id from JWT (optional) for auditing."""
-        try:
-            from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-
-            verify_jwt_in_request(optional=True)
-            uid = get_jwt_identity()
-            g.user_id = int(uid) if uid else None
-        except Exception:
-            g.user_id = None
+        """Resolve the JWT once; views, hooks and templates read g.auth."""
+        load_auth_context()
 
     if app.config.get('TESTING'):
         @app.route('/raise-validation-error')
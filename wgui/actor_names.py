@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
+from flask import current_app
+
+from .extensions import db
+from .models import User
+
+
+class ActorNameCache:
+    """Bounded, expiring user id -> username map for audit rows.
+
+    Entries live for ``ttl`` seconds so renames made by another worker
+    show up eventually; this process drops them at once through
+    ``invalidate``. Unknown ids are not cached.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0) -> None:
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._names: OrderedDict[int, Tuple[str, float]] = OrderedDict()
+
+    def _cached(self, user_id: int, now: float) -> str | None:
+        entry = self._names.get(user_id)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._names[user_id]
+            return None
+        self._names.move_to_end(user_id)
+        return entry[0]
+
+    def put(self, user_id: int, name: str) -> None:
+        with self._lock:
+            self._names[user_id] = (name, time.monotonic() + self.ttl)
+            self._names.move_to_end(user_id)
+            while len(self._names) > self.max_size:
+                self._names.popitem(last=False)
+
+    def get_many(self, user_ids: Iterable[int], session=None) -> Dict[int, str]:
+        """Usernames of the given ids that exist, loading misses in one query."""
+        now = time.monotonic()
+        found: Dict[int, str] = {}
+        with self._lock:
+            for uid in set(user_ids):
+                name = self._cached(uid, now)
+                if name is not None:
+                    found[uid] = name
+        missing = {uid for uid in user_ids if uid not in found}
+        if missing:
+            session = session or db.session
+            rows = session.execute(db.select(User.id, User.username).where(User.id.in_(missing))).all()
+            for uid, name in rows:
+                found[uid] = name
+                self.put(uid, name)
+        return found
+
+    def get(self, user_id: int | None, session=None) -> str | None:
+        if not user_id:
+            return None
+        return self.get_many([int(user_id)], session).get(int(user_id))
+
+    def invalidate(self, user_id: int | None = None) -> None:
+        """Forget one user (after a rename or delete), or everyone."""
+        with self._lock:
+            if user_id is None:
+                self._names.clear()
+            else:
+                self._names.pop(int(user_id), None)
+
+
+def init_actor_names(app) -> None:
+    app.extensions['actor_names'] = ActorNameCache(
+        max_size=app.config.get('ACTOR_NAME_CACHE_SIZE', 1024),
+        ttl=app.config.get('ACTOR_NAME_CACHE_TTL', 300),
+    )
+
+
+def get_actor_names() -> ActorNameCache:
+    return current_app.extensions['actor_names']
+
+
+def actor_name(user_id: int | None, session=None) -> str | None:
+    """Username for an audit row, or None for unknown/anonymous users."""
+    return get_actor_names().get(user_id, session)
@@ -7,8 +7,9 @@ from flask import (
     request,
     abort,
     Response,
+    jsonify,
 )
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from ..auth_context import get_auth
 from werkzeug.security import generate_password_hash
 
 from ..models import (
@@ -20,8 +21,11 @@ from ..models import (
     DataList,
     AuditSettings,
     BackupSettings,
+    ListChange,
+    ListSource,
 )
 from ..extensions import db
+from ..audit import audit, get_audit
 from .forms import (
     AddUserForm,
     DeleteForm,
@@ -34,7 +38,7 @@ from .forms import (
     BackupRestoreForm,
 )
 from .models import AddUserData, EmailSettingsData
-from ..tasks import update_cleanup_schedule, update_backup_schedule
+from ..tasks import update_cleanup_schedule, update_backup_schedule, remove_feed_schedule
 from flask import current_app
 from datetime import datetime, timedelta
 import os
@@ -42,17 +46,15 @@ import json
 from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional
 from ..backup_utils import build_backup_payload, write_backup_file, prune_backups, get_latest_backup
+from ..export_cache import get_export_cache
+from ..list_versions import next_version
+from ..actor_names import get_actor_names
 
 admin_bp = Blueprint('users', __name__, url_prefix='/users')
 
 
 def admin_required():
-    try:
-        verify_jwt_in_request()
-        claims = get_jwt()
-        return claims.get('is_admin') is True
-    except Exception:
-        return False
+    return get_auth().is_admin
 
 
 @admin_bp.before_request
@@ -90,21 +92,13 @@ def add_user():
         db.session.add(user)
         db.session.flush()
         # Audit: user added
-        try:
-            verify_jwt_in_request()
-            from flask_jwt_extended import get_jwt_identity
-
-            uid = get_jwt_identity()
-        except Exception:
-            uid = None
-        db.session.add(
-            AuditLog(
-                user_id=int(uid) if uid else None,
-                action='user_added',
-                target_type='user',
-                target_id=user.id,
-                details=f"username={user.username}; email={user.email}; is_admin={user.is_admin}",
-            )
+        uid = get_auth().user_id
+        audit(
+            user_id=uid,
+            action='user_added',
+            target_type='user',
+            target_id=user.id,
+            details=f"username={user.username}; email={user.email}; is_admin={user.is_admin}",
         )
         db.session.commit()
         flash('User added', 'success')
@@ -127,24 +121,17 @@ def delete_user(user_id: int):
             flash('Cannot delete admin user', 'danger')
         else:
             # Audit before deletion
-            try:
-                verify_jwt_in_request()
-                from flask_jwt_extended import get_jwt_identity
-
-                uid = get_jwt_identity()
-            except Exception:
-                uid = None
-            db.session.add(
-                AuditLog(
-                    user_id=int(uid) if uid else None,
-                    action='user_deleted',
-                    target_type='user',
-                    target_id=user.id,
-                    details=f"username={user.username}; email={user.email}",
-                )
+            uid = get_auth().user_id
+            audit(
+                user_id=uid,
+                action='user_deleted',
+                target_type='user',
+                target_id=user.id,
+                details=f"username={user.username}; email={user.email}",
             )
             db.session.delete(user)
             db.session.commit()
+            get_actor_names().invalidate(user_id)
             flash('User deleted', 'info')
     return redirect(url_for('users.list_users'))
 
@@ -163,21 +150,13 @@ def make_admin(user_id: int):
         return redirect(url_for('users.list_users'))
     user.is_admin = True
     # Audit: user promoted
-    try:
-        verify_jwt_in_request()
-        from flask_jwt_extended import get_jwt_identity
-
-        uid = get_jwt_identity()
-    except Exception:
-        uid = None
-    db.session.add(
-        AuditLog(
-            user_id=int(uid) if uid else None,
-            action='user_promoted',
-            target_type='user',
-            target_id=user.id,
-            details=f"username={user.username}; email={user.email}",
-        )
+    uid = get_auth().user_id
+    audit(
+        user_id=uid,
+        action='user_promoted',
+        target_type='user',
+        target_id=user.id,
+        details=f"username={user.username}; email={user.email}",
     )
     db.session.commit()
     flash('User promoted to admin', 'success')
@@ -214,13 +193,7 @@ def revoke_admin(user_id: int):
         pass
 
     # Prevent self-demotion (current user cannot revoke their own admin)
-    try:
-        verify_jwt_in_request()
-        from flask_jwt_extended import get_jwt_identity
-
-        acting_uid = get_jwt_identity()
-    except Exception:
-        acting_uid = None
+    acting_uid = get_auth().user_id
     if acting_uid and int(acting_uid) == int(user.id):
         flash('You cannot revoke your own admin privileges', 'danger')
         return redirect(url_for('users.list_users'))
@@ -235,14 +208,12 @@ def revoke_admin(user_id: int):
     # Audit: user demoted
     # Acting user id for audit (may be None)
     uid = acting_uid if acting_uid is not None else None
-    db.session.add(
-        AuditLog(
-            user_id=int(uid) if uid else None,
-            action='user_demoted',
-            target_type='user',
-            target_id=user.id,
-            details=f"username={user.username}; email={user.email}",
-        )
+    audit(
+        user_id=uid,
+        action='user_demoted',
+        target_type='user',
+        target_id=user.id,
+        details=f"username={user.username}; email={user.email}",
     )
     db.session.commit()
     flash('Admin rights revoked', 'success')
@@ -299,21 +270,13 @@ def email_settings():
         if bool(data.smtp_pass) != bool(old['smtp_pass']):
             changes.append("smtp_pass:updated")
         # Audit: email settings updated
-        try:
-            verify_jwt_in_request()
-            from flask_jwt_extended import get_jwt_identity
-
-            uid = get_jwt_identity()
-        except Exception:
-            uid = None
-        db.session.add(
-            AuditLog(
-                user_id=int(uid) if uid else None,
-                action='email_settings_updated',
-                target_type='email',
-                target_id=settings.id,
-                details='; '.join(changes)[:255],
-            )
+        uid = get_auth().user_id
+        audit(
+            user_id=uid,
+            action='email_settings_updated',
+            target_type='email',
+            target_id=settings.id,
+            details='; '.join(changes)[:255],
         )
         db.session.commit()
         flash('Settings saved', 'success')
@@ -435,30 +398,16 @@ def run_cleanup_now():
         app = current_app._get_current_object()
         with app.app_context():
             # attribute deletions to the initiating user
-            try:
-                verify_jwt_in_request()
-                from flask_jwt_extended import get_jwt_identity
-
-                uid_del = get_jwt_identity()
-            except Exception:
-                uid_del = None
-            delete_expired_items(initiator_user_id=int(uid_del) if uid_del else None)
+            uid_del = get_auth().user_id
+            delete_expired_items(initiator_user_id=uid_del)
             # Audit: manual job run
-            try:
-                verify_jwt_in_request()
-                from flask_jwt_extended import get_jwt_identity
-
-                uid = get_jwt_identity()
-            except Exception:
-                uid = None
-            db.session.add(
-                AuditLog(
-                    user_id=int(uid) if uid else None,
-                    action='cleanup_job_run',
-                    target_type='job',
-                    target_id=None,
-                    details='trigger=manual',
-                )
+            uid = get_auth().user_id
+            audit(
+                user_id=uid,
+                action='cleanup_job_run',
+                target_type='job',
+                target_id=None,
+                details='trigger=manual',
             )
             db.session.commit()
         flash('Cleanup job executed', 'info')
@@ -478,20 +427,15 @@ def save_cleanup_schedule():
             return redirect(url_for('users.schedule_settings'))
         settings.hour = nh
         settings.minute = nm
-        try:
-            verify_jwt_in_request()
-            from flask_jwt_extended import get_jwt_identity
-            uid = get_jwt_identity()
-        except Exception:
-            uid = None
+        uid = get_auth().user_id
         if (old_hour != settings.hour) or (old_minute != settings.minute):
-            db.session.add(AuditLog(
-                user_id=int(uid) if uid else None,
+            audit(
+                user_id=uid,
                 action='schedule_updated',
                 target_type='schedule',
                 target_id=settings.id,
                 details=f"time:{old_hour:02d}:{old_minute:02d}->{settings.hour:02d}:{settings.minute:02d}",
-            ))
+            )
         db.session.commit()
         update_cleanup_schedule(current_app._get_current_object())
         flash('Cleanup schedule saved', 'success')
@@ -524,28 +468,23 @@ def save_backup_schedule():
             db.session.add(bkp_cfg)
         else:
             bkp_cfg.keep = nkeep
-        try:
-            verify_jwt_in_request()
-            from flask_jwt_extended import get_jwt_identity
-            uid = get_jwt_identity()
-        except Exception:
-            uid = None
+        uid = get_auth().user_id
         if (old_bh != settings.backup_hour) or (old_bm != settings.backup_minute):
-            db.session.add(AuditLog(
-                user_id=int(uid) if uid else None,
+            audit(
+                user_id=uid,
                 action='backup_schedule_updated',
                 target_type='schedule',
                 target_id=settings.id,
                 details=f"time:{old_bh:02d}:{old_bm:02d}->{settings.backup_hour:02d}:{settings.backup_minute:02d}",
-            ))
+            )
         if old_keep is not None and old_keep != bkp_cfg.keep:
-            db.session.add(AuditLog(
-                user_id=int(uid) if uid else None,
+            audit(
+                user_id=uid,
                 action='backup_settings_updated',
                 target_type='backup',
                 target_id=bkp_cfg.id,
                 details=f"keep:{old_keep}->{bkp_cfg.keep}",
-            ))
+            )
         db.session.commit()
         update_backup_schedule(current_app._get_current_object())
         flash('Backup schedule saved', 'success')
@@ -573,28 +512,23 @@ def save_audit_schedule():
             db.session.add(audit_cfg)
         else:
             audit_cfg.retention_days = nret
-        try:
-            verify_jwt_in_request()
-            from flask_jwt_extended import get_jwt_identity
-            uid = get_jwt_identity()
-        except Exception:
-            uid = None
+        uid = get_auth().user_id
         if (old_ah != settings.audit_hour) or (old_am != settings.audit_minute):
-            db.session.add(AuditLog(
-                user_id=int(uid) if uid else None,
+            audit(
+                user_id=uid,
                 action='audit_schedule_updated',
                 target_type='schedule',
                 target_id=settings.id,
                 details=f"time:{old_ah:02d}:{old_am:02d}->{settings.audit_hour:02d}:{settings.audit_minute:02d}",
-            ))
+            )
         if old_ret is not None and old_ret != audit_cfg.retention_days:
-            db.session.add(AuditLog(
-                user_id=int(uid) if uid else None,
+            audit(
+                user_id=uid,
                 action='audit_retention_updated',
                 target_type='audit',
                 target_id=audit_cfg.id,
                 details=f"retention_days:{old_ret}->{audit_cfg.retention_days}",
-            ))
+            )
         db.session.commit()
         from ..tasks import update_audit_purge_schedule as _uaps
         _uaps(current_app._get_current_object())
@@ -621,20 +555,13 @@ def run_backup_now():
                 bkeep = cfg.keep if cfg else None
                 path = write_backup_file(app, directory=bdir)
                 # attribute backup creation to the initiating user
-                try:
-                    verify_jwt_in_request()
-                    from flask_jwt_extended import get_jwt_identity
-                    uid = get_jwt_identity()
-                except Exception:
-                    uid = None
-                db.session.add(
-                    AuditLog(
-                        user_id=int(uid) if uid else None,
-                        action='backup_created',
-                        target_type='backup',
-                        target_id=None,
-                        details=f"path={path}; trigger=manual",
-                    )
+                uid = get_auth().user_id
+                audit(
+                    user_id=uid,
+                    action='backup_created',
+                    target_type='backup',
+                    target_id=None,
+                    details=f"path={path}; trigger=manual",
                 )
                 db.session.commit()
                 prune_backups(app, directory=bdir, keep=bkeep)
@@ -645,6 +572,18 @@ def run_backup_now():
     return redirect(url_for('users.schedule_settings'))
 
 
+@admin_bp.route('/export-cache', methods=['GET'])
+def export_cache_stats():
+    """Hit/miss counters of the in-memory list export cache."""
+    return jsonify(get_export_cache().stats())
+
+
+@admin_bp.route('/audit-queue', methods=['GET'])
+def audit_queue_stats():
+    """Depth and throughput counters of the audit writer."""
+    return jsonify(get_audit().stats())
+
+
 # -------------------- Backup & Restore --------------------
 
 
@@ -665,7 +604,9 @@ class BackupList(BaseModel):
 
 class BackupItem(BaseModel):
     id: int
-    category: str
+    # Older backups link items to lists by name only
+    list_id: Optional[int] = None
+    category: Optional[str] = None
     data: str
     description: Optional[str] = None
     date: datetime | str
@@ -748,21 +689,14 @@ def backup_download():
     data = payload.model_dump(mode='json')
     fname = f"wgui-backup-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
     # Audit: backup downloaded
+    uid = get_auth().user_id
     try:
-        verify_jwt_in_request()
-        from flask_jwt_extended import get_jwt_identity
-        uid = get_jwt_identity()
-    except Exception:
-        uid = None
-    try:
-        db.session.add(
-            AuditLog(
-                user_id=int(uid) if uid else None,
-                action='backup_downloaded',
-                target_type='backup',
-                target_id=None,
-                details=f"filename={fname}",
-            )
+        audit(
+            user_id=uid,
+            action='backup_downloaded',
+            target_type='backup',
+            target_id=None,
+            details=f"filename={fname}",
         )
         db.session.commit()
     except Exception:
@@ -792,15 +726,21 @@ def backup_restore():
 
     # Restore transactionally
     try:
+        # Feed sources are not part of backups; their jobs go with them
+        synced_list_ids = [list_id for (list_id,) in db.session.query(ListSource.list_id)]
         # Clear dependent tables first (items, audits), then lists/users/settings
         db.session.query(DataList).delete()
         db.session.query(AuditLog).delete()
+        db.session.query(ListChange).delete()
+        db.session.query(ListSource).delete()
         db.session.query(ListModel).delete()
         db.session.query(User).delete()
         db.session.query(EmailSettings).delete()
         db.session.query(ScheduleSettings).delete()
         db.session.query(AuditSettings).delete()
         db.session.query(BackupSettings).delete()
+        # Bulk deletes bypass the flush hook; invalidate version-keyed caches
+        next_version(db.session)
         db.session.flush()
 
         # Users
@@ -824,7 +764,29 @@ def backup_restore():
 
         # Items
         from datetime import date as _date
+        list_ids = {l.name: l.id for l in payload.lists}
+        # Legacy items whose category has no list get a String list named
+        # after it, as migration 17 does, instead of being dropped
+        placeholders = sorted({
+            it.category for it in payload.items
+            if it.list_id is None and it.category and it.category not in list_ids
+        })
+        slugs = {(lst.type_slug, lst.name_slug) for lst in ListModel.query}
+        for category in placeholders:
+            placeholder = ListModel(name=category, type='String')
+            base, n = placeholder.name_slug, 1
+            while (placeholder.type_slug, placeholder.name_slug) in slugs:
+                n += 1
+                placeholder.name_slug = f"{base}-{n}"
+            slugs.add((placeholder.type_slug, placeholder.name_slug))
+            db.session.add(placeholder)
+            db.session.flush()
+            list_ids[category] = placeholder.id
+        orphaned = sum(1 for it in payload.items if it.list_id is None and it.category in placeholders)
         for it in payload.items:
+            list_id = it.list_id if it.list_id is not None else list_ids.get(it.category)
+            if list_id is None:
+                continue
             # Allow string or datetime for date
             dval = it.date
             if isinstance(dval, str):
@@ -838,7 +800,7 @@ def backup_restore():
             db.session.add(
                 DataList(
                     id=it.id,
-                    category=it.category,
+                    list_id=list_id,
                     data=it.data,
                     description=it.description,
                     date=d,
@@ -904,36 +866,41 @@ def backup_restore():
             )
 
         db.session.commit()
+        # Restored users may reuse ids under other names
+        get_actor_names().invalidate()
         # reschedule background tasks according to restored settings
         app_obj = current_app._get_current_object()
         update_cleanup_schedule(app_obj)
         update_backup_schedule(app_obj)
+        for list_id in synced_list_ids:
+            remove_feed_schedule(list_id)
         try:
             from ..tasks import update_audit_purge_schedule as _uaps
             _uaps(app_obj)
         except Exception:
             pass
         # audit restore summary
+        uid = get_auth().user_id
         try:
-            verify_jwt_in_request()
-            from flask_jwt_extended import get_jwt_identity
-            uid = get_jwt_identity()
-        except Exception:
-            uid = None
-        try:
-            db.session.add(
-                AuditLog(
-                    user_id=int(uid) if uid else None,
-                    action='backup_restored',
-                    target_type='backup',
-                    target_id=None,
-                    details=f"users={len(payload.users)}; lists={len(payload.lists)}; items={len(payload.items)}; audits={len(payload.audits)}",
-                )
+            audit(
+                user_id=uid,
+                action='backup_restored',
+                target_type='backup',
+                target_id=None,
+                details=(
+                    f"users={len(payload.users)}; lists={len(payload.lists)}; items={len(payload.items)}; "
+                    f"audits={len(payload.audits)}; placeholder_lists={','.join(placeholders)}"
+                )[:255],
             )
             db.session.commit()
         except Exception:
             db.session.rollback()
         flash('Backup restored successfully', 'success')
+        if placeholders:
+            flash(
+                f"{orphaned} items had no list and were kept in new lists: {', '.join(placeholders)}",
+                'warning',
+            )
     except Exception as e:
         db.session.rollback()
         flash(f'Failed to restore backup: {e}', 'danger')
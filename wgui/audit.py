@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Iterable, List
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, insert
+
+from .actor_names import actor_name as _lookup_actor
+from .extensions import db
+from .models import AuditLog
+
+_PENDING = 'audit_rows'
+_COMMITTED = 'audit_committed'
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def audit_row(action: str, target_type: str, *, user_id: int | None = None, actor_name: str | None = None,
+              target_id: int | None = None, list_id: int | None = None, details: str | None = None,
+              created_at: datetime | None = None, session=None) -> dict:
+    """A complete AuditLog row (every column set, so batches share one executemany).
+
+    The actor name falls back to the request's user, or 'system'.
+    """
+    if actor_name is None:
+        uid = user_id or (g.get('user_id') if has_app_context() else None)
+        actor_name = _lookup_actor(uid, session) if uid else 'system'
+    return {
+        'created_at': created_at or _utcnow(),
+        'user_id': user_id,
+        'actor_name': actor_name,
+        'action': action,
+        'target_type': target_type,
+        'target_id': target_id,
+        'list_id': list_id,
+        'details': details[:255] if details else details,
+    }
+
+
+def _pending(session) -> list:
+    if not session.in_transaction():
+        # so a rollback before the first statement still discards the rows
+        session.begin()
+    return session.info.setdefault(_PENDING, [])
+
+
+def audit(action: str, target_type: str, *, session=None, **fields) -> None:
+    """Record an audit event as part of the current transaction.
+
+    The row is written when the transaction commits (see AuditService)
+    and dropped if it rolls back.
+    """
+    session = session or db.session()
+    _pending(session).append(audit_row(action, target_type, session=session, **fields))
+
+
+def audit_many(rows: Iterable[dict], session=None) -> None:
+    """Like ``audit`` for prebuilt rows (bulk operations)."""
+    session = session or db.session()
+    _pending(session).extend(audit_row(session=session, **row) for row in rows)
+
+
+def _insert(session, rows: List[dict], batch_size: int) -> int:
+    """executemany INSERTs of ``batch_size`` rows; returns the number of batches."""
+    for i in range(0, len(rows), batch_size):
+        session.execute(insert(AuditLog.__table__), rows[i:i + batch_size])
+    return -(-len(rows) // batch_size)
+
+
+class AuditService:
+    """Writes committed audit rows with batched executemany inserts.
+
+    In async mode rows go to a bounded queue drained by a background
+    thread every ``flush_seconds`` or once ``max_batch`` rows wait. When
+    the queue is full the committing request writes its own rows
+    (backpressure) and ``stats()`` counts it. Sync mode inserts the rows
+    in the committing transaction itself, which tests rely on. A batch that
+    fails to insert is kept and retried on later flushes; it is dropped
+    (and logged) only after ``max_attempts`` tries.
+    """
+
+    def __init__(self, app, async_mode: bool = True, max_queue: int = 10000,
+                 max_batch: int = 500, flush_seconds: float = 1.0, max_attempts: int = 5) -> None:
+        self.app = app
+        self.async_mode = bool(async_mode)
+        self.max_batch = max(1, int(max_batch))
+        self.max_attempts = max(1, int(max_attempts))
+        self.flush_seconds = float(flush_seconds)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+        # (rows, attempt) of batches waiting for another try
+        self._retry: List[tuple] = []
+        self._stats = {'queued': 0, 'written': 0, 'batches': 0, 'inline': 0, 'failed': 0, 'high_water': 0}
+
+    def _count(self, **deltas) -> None:
+        with self._lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['retrying'] = sum(len(rows) for rows, _attempt in self._retry)
+        stats.update(mode='async' if self.async_mode else 'sync', depth=self._queue.qsize(),
+                     capacity=self._queue.maxsize)
+        return stats
+
+    def write(self, rows: List[dict], session=None, attempt: int = 1) -> int:
+        """Insert ``rows`` now, in ``session`` or else in a transaction of their own.
+
+        Failures inside ``session`` propagate to its commit; otherwise the
+        rows are held for a retry. Returns the rows written.
+        """
+        if not rows:
+            return 0
+        if session is not None:
+            batches = _insert(session, rows, self.max_batch)
+            self._count(written=len(rows), batches=batches)
+            return len(rows)
+        with self._flush_lock, self.app.app_context():
+            try:
+                batches = _insert(db.session, rows, self.max_batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                if attempt < self.max_attempts:
+                    with self._lock:
+                        self._retry.append((rows, attempt + 1))
+                    self.app.logger.warning('Failed to write %d audit rows (attempt %d of %d), will retry',
+                                            len(rows), attempt, self.max_attempts, exc_info=True)
+                else:
+                    self._count(failed=len(rows))
+                    self.app.logger.exception('Dropping %d audit rows after %d failed attempts',
+                                              len(rows), attempt)
+                return 0
+        self._count(written=len(rows), batches=batches)
+        return len(rows)
+
+    def submit(self, rows: List[dict]) -> None:
+        """Hand over committed rows: queue them, or write them if that is not possible."""
+        if not rows:
+            return
+        if not self.async_mode or self._stopped:
+            self._write_retries()
+            self.write(rows)
+            return
+        overflow = []
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                overflow.append(row)
+        depth = self._queue.qsize()
+        with self._lock:
+            self._stats['queued'] += len(rows) - len(overflow)
+            self._stats['high_water'] = max(self._stats['high_water'], depth)
+        self._ensure_thread()
+        if overflow:
+            self._count(inline=len(overflow))
+            self.write(overflow)
+        if depth >= self.max_batch:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write everything queued so far, retrying failed batches first. Returns rows written."""
+        written = self._write_retries()
+        while True:
+            batch = []
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return written
+            written += self.write(batch)
+
+    def _write_retries(self) -> int:
+        # one more try for each held batch; failures are held again
+        with self._lock:
+            held, self._retry = self._retry, []
+        return sum(self.write(rows, attempt=attempt) for rows, attempt in held)
+
+    def stop(self) -> None:
+        """Stop the flusher thread and write everything still queued."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='wgui-audit', daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            if self._stopped:
+                break
+            self.flush()
+
+
+def init_audit(app) -> None:
+    # In-memory SQLite shares one connection between threads; write inline
+    in_memory = app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:///:memory:')
+    app.extensions['audit'] = AuditService(
+        app,
+        async_mode=app.config.get('AUDIT_ASYNC', True) and not in_memory,
+        max_queue=app.config.get('AUDIT_QUEUE_SIZE', 10000),
+        max_batch=app.config.get('AUDIT_BATCH_SIZE', 500),
+        flush_seconds=app.config.get('AUDIT_FLUSH_SECONDS', 1.0),
+        max_attempts=app.config.get('AUDIT_MAX_ATTEMPTS', 5),
+    )
+
+
+def get_audit() -> AuditService:
+    return current_app.extensions['audit']
+
+
+@event.listens_for(db.session, 'before_commit')
+def _write_or_hold(session):
+    if session.in_nested_transaction() or not session.info.get(_PENDING):
+        return
+    # edits audited by the before_flush hook must be collected first
+    session.flush()
+    rows = session.info.pop(_PENDING, [])
+    service = current_app.extensions.get('audit')
+    if service is None:
+        _insert(session, rows, 500)
+    elif service.async_mode:
+        session.info[_COMMITTED] = rows
+    else:
+        service.write(rows, session)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _submit(session):
+    rows = session.info.pop(_COMMITTED, None)
+    if rows:
+        get_audit().submit(rows)
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def _discard(session, transaction):
+    # Rows of a transaction that was rolled back or closed are dropped
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+        session.info.pop(_COMMITTED, None)
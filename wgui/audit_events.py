@@ -2,42 +2,28 @@ from flask import g
 from sqlalchemy import event
 from sqlalchemy.orm.attributes import get_history
 from .extensions import db
-from .models import AuditLog, DataList, ListModel, User
+from .audit import audit
+from .models import DataList, ListModel
 
 
 @event.listens_for(db.session, 'before_flush')
 def audit_edits(session, flush_context, instances):
     """Automatically log edits to DataList and ListModel before flush.
 
-    Creates an AuditLog with action 'item_edited' or 'list_edited' when fields change.
-    Relies on g.user_id set by a Flask before_request.
+    Records an 'item_edited' or 'list_edited' audit event when fields change.
+    Relies on g.user_id, set with g.auth by a Flask before_request.
     """
     try:
         user_id = int(getattr(g, 'user_id', None)) if getattr(g, 'user_id', None) else None
     except Exception:
         user_id = None
 
-    # Populate actor_name for new AuditLog rows if missing
-    for obj in list(session.new):
-        if isinstance(obj, AuditLog) and not getattr(obj, 'actor_name', None):
-            try:
-                # Prefer explicit user_id on the log; else fallback to g.user_id
-                uid = getattr(obj, 'user_id', None) or (int(getattr(g, 'user_id', None)) if getattr(g, 'user_id', None) else None)
-                if uid:
-                    u = session.get(User, int(uid))
-                    obj.actor_name = u.username if u else obj.actor_name
-                else:
-                    # System or anonymous
-                    obj.actor_name = obj.actor_name or 'system'
-            except Exception:
-                pass
-
     for obj in session.dirty.copy():
         # Skip if the row is being deleted
         if session.is_modified(obj, include_collections=False):
             if isinstance(obj, DataList):
                 changes = []
-                for attr in ['data', 'description', 'date', 'category']:
+                for attr in ['data', 'description', 'date', 'list_id']:
                     hist = get_history(obj, attr)
                     if hist.has_changes():
                         old = hist.deleted[0] if hist.deleted else None
@@ -45,22 +31,14 @@ def audit_edits(session, flush_context, instances):
                         if old != new:
                             changes.append(f"{attr}:{old}->{new}")
                 if changes:
-                    # Resolve list_id from category if possible
-                    list_id = None
-                    try:
-                        lst = ListModel.query.filter_by(name=obj.category).first()
-                        list_id = lst.id if lst else None
-                    except Exception:
-                        list_id = None
-                    session.add(
-                        AuditLog(
-                            user_id=user_id,
-                            action='item_edited',
-                            target_type='item',
-                            target_id=obj.id,
-                            list_id=list_id,
-                            details='; '.join(changes)[:255],
-                        )
+                    audit(
+                        session=session,
+                        user_id=user_id,
+                        action='item_edited',
+                        target_type='item',
+                        target_id=obj.id,
+                        list_id=obj.list_id,
+                        details='; '.join(changes)[:255],
                     )
             elif isinstance(obj, ListModel):
                 changes = []
@@ -72,13 +50,12 @@ def audit_edits(session, flush_context, instances):
                         if old != new:
                             changes.append(f"{attr}:{old}->{new}")
                 if changes:
-                    session.add(
-                        AuditLog(
-                            user_id=user_id,
-                            action='list_edited',
-                            target_type='list',
-                            target_id=obj.id,
-                            list_id=obj.id,
-                            details='; '.join(changes)[:255],
-                        )
+                    audit(
+                        session=session,
+                        user_id=user_id,
+                        action='list_edited',
+                        target_type='list',
+                        target_id=obj.id,
+                        list_id=obj.id,
+                        details='; '.join(changes)[:255],
                     )
@@ -11,15 +11,16 @@ from flask_jwt_extended import (
     create_access_token,
     set_access_cookies,
     unset_jwt_cookies,
-    verify_jwt_in_request,
-    get_jwt_identity,
-    get_jwt,
 )
 from werkzeug.security import check_password_hash, generate_password_hash
-from ..models import User, DataList, ListModel, AuditLog
+from ..models import User
 from ..extensions import db
+from ..audit import audit
 from flask import current_app
 from ..log_throttle import should_log_login_failure
+from ..search import search_items
+from ..dashboard import get_dashboard_cache
+from ..auth_context import get_auth
 from .forms import LoginForm, ChangeEmailForm, ChangePasswordForm
 from .models import LoginData, ChangeEmailData, ChangePasswordData
 
@@ -29,19 +30,10 @@ auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.app_context_processor
 def inject_current_user():
-    user = None
-    claims = {}
-    try:
-        verify_jwt_in_request(optional=True)
-        user_id = get_jwt_identity()
-        claims = get_jwt()
-        if user_id:
-            user = db.session.get(User, int(user_id))
-    except Exception:
-        pass
+    auth = get_auth()
     return {
-        'current_user': user,
-        'current_claims': claims,
+        'current_user': auth.user,
+        'current_claims': auth.claims,
         'password_form': ChangePasswordForm(),
         'email_form': ChangeEmailForm(),
     }
@@ -49,64 +41,31 @@ def inject_current_user():
 
 @auth_bp.route('/', methods=['GET'])
 def index():
-    try:
-        verify_jwt_in_request()
-    except Exception:
+    if not get_auth().authenticated:
         return redirect(url_for('auth.login'))
     # Optional global search across all lists
     q = request.args.get('q', '').strip()
 
-    # Build upcoming deletion summaries
-    from datetime import date, timedelta
-
-    today = date.today()
-    td3 = timedelta(days=3)
-    td7 = timedelta(days=7)
-    td30 = timedelta(days=30)
+    # Upcoming deletion summaries, cached until the next list change
+    dashboard = get_dashboard_cache().get()
 
-    upcoming_top10 = (
-        DataList.query.filter(DataList.date >= today)
-        .order_by(DataList.date.asc())
-        .limit(10)
-        .all()
-    )
-    in_3_days = (
-        DataList.query.filter(DataList.date >= today, DataList.date <= today + td3)
-        .order_by(DataList.date.asc())
-        .all()
-    )
-    # Overlapping ranges: 1 week includes items in 3 days; 1 month includes all up to 30 days
-    in_1_week = (
-        DataList.query.filter(DataList.date >= today, DataList.date <= today + td7)
-        .order_by(DataList.date.asc())
-        .all()
-    )
-    in_1_month = (
-        DataList.query.filter(DataList.date >= today, DataList.date <= today + td30)
-        .order_by(DataList.date.asc())
-        .all()
-    )
-
-    # Map list name to type/id for nice labels and links
-    lists = ListModel.query.all()
-    types_by_name = {l.name: l.type for l in lists}
-    ids_by_name = {l.name: l.id for l in lists}
-
-    # Global search results (substring match)
-    search_results = []
+    # Global search results (ranked substring match over data and description)
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    results = None
     if q:
-        search_results = DataList.query.filter(DataList.data.contains(q)).all()
+        results = search_items(
+            q,
+            page=page,
+            per_page=current_app.config.get('SEARCH_PAGE_SIZE', 50),
+            rank_budget_ms=current_app.config.get('SEARCH_RANK_TIMEOUT_MS'),
+        )
 
     return render_template(
         'home.html',
         q=q,
-        search_results=search_results,
-        upcoming_top10=upcoming_top10,
-        in_3_days=in_3_days,
-        in_1_week=in_1_week,
-        in_1_month=in_1_month,
-        types_by_name=types_by_name,
-        ids_by_name=ids_by_name,
+        page=page,
+        results=results,
+        dashboard=dashboard,
     )
 
 
@@ -125,14 +84,14 @@ def login():
             set_access_cookies(resp, access_token)
             # Audit login success
             try:
-                db.session.add(AuditLog(
+                audit(
                     user_id=int(user.id),
                     actor_name=user.username,
                     action='login_success',
                     target_type='auth',
                     target_id=None,
                     details=f"username={user.username}; ip={request.remote_addr}",
-                ))
+                )
                 db.session.commit()
             except Exception:
                 db.session.rollback()
@@ -142,14 +101,14 @@ def login():
         try:
             app = current_app._get_current_object()
             if should_log_login_failure(app, data.username, request.remote_addr):
-                db.session.add(AuditLog(
+                audit(
                     user_id=None,
                     actor_name=data.username,
                     action='login_failed',
                     target_type='auth',
                     target_id=None,
                     details=f"username={data.username}; ip={request.remote_addr}",
-                ))
+                )
                 db.session.commit()
         except Exception:
             db.session.rollback()
@@ -162,20 +121,16 @@ def logout():
     resp = redirect(url_for('auth.login'))
     unset_jwt_cookies(resp)
     # Audit logout
+    uid = get_auth().user_id
     try:
-        verify_jwt_in_request(optional=True)
-        uid = get_jwt_identity()
-    except Exception:
-        uid = None
-    try:
-        db.session.add(AuditLog(
-            user_id=int(uid) if uid else None,
-            actor_name=(db.session.get(User, int(uid)).username if uid else None),
+        audit(
+            user_id=uid,
+            actor_name=get_auth().username,
             action='logout',
             target_type='auth',
             target_id=None,
             details=f"ip={request.remote_addr}",
-        ))
+        )
         db.session.commit()
     except Exception:
         db.session.rollback()
@@ -185,15 +140,7 @@ def logout():
 
 
 def _get_logged_in_user():
-    try:
-        verify_jwt_in_request()
-    except Exception:
-        return None
-    user_id = get_jwt_identity()
-    if not user_id:
-        return None
-    user = db.session.get(User, int(user_id))
-    return user
+    return get_auth().user
 
 
 @auth_bp.route('/account/email', methods=['POST'])
@@ -210,14 +157,14 @@ def update_email():
         db.session.commit()
         # Audit: user email change
         try:
-            db.session.add(AuditLog(
+            audit(
                 user_id=int(user.id),
                 actor_name=user.username,
                 action='user_email_changed',
                 target_type='user',
                 target_id=user.id,
                 details=f"email:{old_email}->{user.email}",
-            ))
+            )
             db.session.commit()
         except Exception:
             db.session.rollback()
@@ -241,14 +188,14 @@ def update_password():
         db.session.commit()
         # Audit: password changed (no details)
         try:
-            db.session.add(AuditLog(
+            audit(
                 user_id=int(user.id),
                 actor_name=user.username,
                 action='user_password_changed',
                 target_type='user',
                 target_id=user.id,
                 details=None,
-            ))
+            )
             db.session.commit()
         except Exception:
             db.session.rollback()
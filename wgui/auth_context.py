@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+
+from .actor_names import actor_name, get_actor_names
+from .extensions import db
+from .models import User
+
+
+@dataclass
+class AuthContext:
+    """Who is making the current request, resolved once from the JWT cookie."""
+
+    identity: str | None = None
+    claims: dict = field(default_factory=dict)
+    # Why a token was rejected (expired, bad signature, ...), if one was sent
+    error: Exception | None = None
+    _user: User | None = field(default=None, repr=False)
+    _user_loaded: bool = field(default=False, repr=False)
+
+    @property
+    def authenticated(self) -> bool:
+        return self.user_id is not None
+
+    @property
+    def user_id(self) -> int | None:
+        try:
+            return int(self.identity) if self.identity else None
+        except ValueError:
+            return None
+
+    @property
+    def is_admin(self) -> bool:
+        return self.authenticated and self.claims.get('is_admin') is True
+
+    @property
+    def user(self) -> User | None:
+        """The signed-in User row, loaded on first use."""
+        if not self._user_loaded:
+            self._user = db.session.get(User, self.user_id) if self.authenticated else None
+            self._user_loaded = True
+            if self._user is not None:
+                get_actor_names().put(self._user.id, self._user.username)
+        return self._user
+
+    @property
+    def username(self) -> str | None:
+        """Name for audit rows; does not need the User row."""
+        if self._user_loaded:
+            return self._user.username if self._user else None
+        return actor_name(self.user_id)
+
+
+def load_auth_context() -> AuthContext:
+    """Verify the request's JWT (if any) and store the result on ``g.auth``."""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        ctx = AuthContext(identity=str(identity) if identity else None, claims=dict(get_jwt()))
+    except Exception as exc:
+        ctx = AuthContext(error=exc)
+    g.auth = ctx
+    # kept for the audit event hooks
+    g.user_id = ctx.user_id
+    return ctx
+
+
+def get_auth() -> AuthContext:
+    """The current request's AuthContext, computed on first use."""
+    ctx = g.get('auth')
+    return ctx if ctx is not None else load_auth_context()
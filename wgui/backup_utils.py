@@ -39,6 +39,8 @@ def build_backup_payload(app) -> dict:
         items = [
             {
                 'id': i.id,
+                'list_id': i.list_id,
+                # kept so older releases can still restore this file
                 'category': i.category,
                 'data': i.data,
                 'description': i.description,
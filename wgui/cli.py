@@ -0,0 +1,106 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+
+exports_cli = AppGroup('exports', help='Manage materialized list export files.')
+
+
+@exports_cli.command('rebuild')
+def rebuild_exports():
+    """Rewrite every materialized export file from the database."""
+    from .lists.exports import rebuild_export_files
+
+    app = current_app._get_current_object()
+    if not app.config.get('EXPORT_MATERIALIZE_DIR'):
+        raise click.ClickException('EXPORT_MATERIALIZE_DIR is not configured')
+    count = rebuild_export_files(app)
+    click.echo(f"Rebuilt {count} export file(s) in {app.config['EXPORT_MATERIALIZE_DIR']}")
+
+
+@exports_cli.command('check')
+def check_exports():
+    """Compare materialized export files with the database."""
+    from .lists.exports import check_export_files
+
+    app = current_app._get_current_object()
+    if not app.config.get('EXPORT_MATERIALIZE_DIR'):
+        raise click.ClickException('EXPORT_MATERIALIZE_DIR is not configured')
+    report = check_export_files(app)
+    problems = 0
+    for kind in ('missing', 'stale', 'orphaned'):
+        for path in report[kind]:
+            click.echo(f"{kind}: {path}")
+            problems += 1
+    if problems:
+        raise click.ClickException(f"{problems} export file(s) out of sync")
+    click.echo('All export files are consistent')
+
+
+lists_cli = AppGroup('lists', help='Query list entries.')
+
+
+@lists_cli.command('lookup')
+@click.argument('address')
+def lookup(address):
+    """Show every Ip/Ip Range entry covering ADDRESS, most specific first."""
+    from .ip_index import lookup_address
+    from .ip_trie import get_prefix_index
+
+    items = lookup_address(address)
+    if items is None:
+        raise click.ClickException(f'{address} is not a valid IP address')
+    best = get_prefix_index().longest_match(address)
+    if best is not None:
+        click.echo(f"longest match: {best[0]}")
+    for item in items:
+        click.echo(f"{item.list.name}\t{item.data}\t{item.date.isoformat()}")
+    if not items:
+        click.echo(f'{address} is not in any list')
+
+
+@lists_cli.command('import')
+@click.argument('list_name')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--expires', required=True, type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Expiry date for entries without one.')
+@click.option('--description', default=None, help='Description for entries without one.')
+@click.option('--csv', 'csv_format', is_flag=True, help='Parse PATH as CSV (default: by extension).')
+def import_file(list_name, path, expires, description, csv_format):
+    """Bulk add entries from PATH to the list named LIST_NAME."""
+    from .extensions import db
+    from .lists.bulk import import_entries, parse_import
+    from .models import ListModel
+
+    lst = ListModel.query.filter_by(name=list_name).first()
+    if lst is None:
+        raise click.ClickException(f'No list named {list_name!r}')
+    with open(path, 'rb') as f:
+        rows = parse_import(f, expires.date(), description, csv_format or path.lower().endswith('.csv'))
+        result = import_entries(lst, rows, source=path)
+        db.session.commit()
+    click.echo(f"Imported {result.added} entries ({result.duplicates} duplicates, {result.invalid} invalid skipped)")
+
+
+@lists_cli.command('sync')
+@click.argument('list_name', required=False)
+def sync_feeds(list_name):
+    """Synchronize LIST_NAME (default: every enabled list) with its feed."""
+    from .lists.feeds import sync_source
+    from .models import ListModel, ListSource
+
+    if list_name:
+        lst = ListModel.query.filter_by(name=list_name).first()
+        if lst is None or lst.source is None:
+            raise click.ClickException(f'No list named {list_name!r} with a source')
+        sources = [lst.source]
+    else:
+        sources = ListSource.query.filter_by(enabled=True).all()
+    for source in sources:
+        result = sync_source(source)
+        click.echo(f"{source.list.name}: {result.summary()}")
+
+
+def register_cli(app):
+    app.cli.add_command(exports_cli)
+    app.cli.add_command(lists_cli)
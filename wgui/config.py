@@ -25,9 +25,54 @@ class Config:
     # Audit logging throttle for login failures
     LOGIN_FAIL_LOG_WINDOW_SECONDS = int(os.environ.get('LOGIN_FAIL_LOG_WINDOW_SECONDS', '60'))
     LOGIN_FAIL_LOG_MAX_PER_WINDOW = int(os.environ.get('LOGIN_FAIL_LOG_MAX_PER_WINDOW', '5'))
+    # Usernames cached for audit rows (entries, seconds)
+    ACTOR_NAME_CACHE_SIZE = int(os.environ.get('ACTOR_NAME_CACHE_SIZE', '1024'))
+    ACTOR_NAME_CACHE_TTL = int(os.environ.get('ACTOR_NAME_CACHE_TTL', '300'))
     # Backups
     BACKUP_DIR = os.environ.get('BACKUP_DIR') or os.path.join(
         os.environ.get('INSTANCE_PATH', os.path.join(os.getcwd(), 'instance')),
         'backups',
     )
     BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', '3'))
+    # In-memory export snapshots (one per list and representation)
+    EXPORT_CACHE_MAX_ENTRIES = int(os.environ.get('EXPORT_CACHE_MAX_ENTRIES', '256'))
+    # Audit rows are queued at commit and inserted in batches by a background
+    # thread; the queue is bounded and a full queue makes requests write inline
+    AUDIT_ASYNC = os.environ.get('AUDIT_ASYNC', '1').lower() not in ('0', 'false', 'no')
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', '10000'))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '500'))
+    AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', '1'))
+    # Tries per audit batch before a failing write is dropped (and logged)
+    AUDIT_MAX_ATTEMPTS = int(os.environ.get('AUDIT_MAX_ATTEMPTS', '5'))
+    # Export audit rows are coalesced per (list, ip, window) and written in bulk
+    EXPORT_AUDIT_BUFFERED = os.environ.get('EXPORT_AUDIT_BUFFERED', '1').lower() not in ('0', 'false', 'no')
+    EXPORT_AUDIT_WINDOW_SECONDS = int(os.environ.get('EXPORT_AUDIT_WINDOW_SECONDS', '60'))
+    EXPORT_AUDIT_MAX_BATCH = int(os.environ.get('EXPORT_AUDIT_MAX_BATCH', '500'))
+    EXPORT_AUDIT_FLUSH_SECONDS = float(os.environ.get('EXPORT_AUDIT_FLUSH_SECONDS', '5'))
+    # Delta exports: how long list change journal entries are kept
+    LIST_JOURNAL_RETENTION_DAYS = int(os.environ.get('LIST_JOURNAL_RETENTION_DAYS', '30'))
+    # Materialized export files, rewritten on every list change. Serve mode:
+    # 'app' (in-process), 'accel' (nginx X-Accel-Redirect) or 'sendfile'.
+    EXPORT_MATERIALIZE_DIR = os.environ.get('EXPORT_MATERIALIZE_DIR') or None
+    EXPORT_SERVE_MODE = os.environ.get('EXPORT_SERVE_MODE', 'app')
+    EXPORT_ACCEL_PREFIX = os.environ.get('EXPORT_ACCEL_PREFIX', '/_wgui_exports')
+    # Exports of lists at least this large are streamed instead of cached, which
+    # bounds memory but re-reads the list on every download that is not a 304
+    EXPORT_STREAM_MIN_ROWS = int(os.environ.get('EXPORT_STREAM_MIN_ROWS', '50000'))
+    # Largest batch accepted by the POST /lists/match endpoints
+    MATCH_MAX_BATCH = int(os.environ.get('MATCH_MAX_BATCH', '200000'))
+    # Timeout (seconds) for fetching HTTP list feeds
+    FEED_SYNC_TIMEOUT = int(os.environ.get('FEED_SYNC_TIMEOUT', '30'))
+    # Larger feeds fail to sync; the whole feed is held in memory while diffing
+    FEED_MAX_BYTES = int(os.environ.get('FEED_MAX_BYTES', str(50 * 1024 * 1024)))
+    # Entries per list page (overridable with ?per_page= up to the maximum)
+    LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', '100'))
+    LIST_PAGE_SIZE_MAX = int(os.environ.get('LIST_PAGE_SIZE_MAX', '1000'))
+    # Time budget (ms) for list searches and bulk regex selections in the database
+    SEARCH_TIMEOUT_MS = int(os.environ.get('SEARCH_TIMEOUT_MS', '2000'))
+    # Results per page of the global search on the home page
+    SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', '50'))
+    # Relevance ranking budget (ms); slower searches are shown in index order
+    SEARCH_RANK_TIMEOUT_MS = int(os.environ.get('SEARCH_RANK_TIMEOUT_MS', '300'))
+    # Most rows listed in the home page expiry buckets
+    DASHBOARD_MAX_ROWS = int(os.environ.get('DASHBOARD_MAX_ROWS', '1000'))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from flask import current_app
+from sqlalchemy import case, func
+
+from .extensions import db
+from .list_versions import current_version
+from .models import DataList, ListModel
+
+# Bucket horizons in days; the largest one is the window fetched
+BUCKET_DAYS = (3, 7, 30)
+TOP_N = 10
+
+
+@dataclass(frozen=True)
+class DashboardEntry:
+    id: int
+    data: str
+    date: date
+    list_id: int
+    list_type: str
+    list_name: str
+
+
+@dataclass
+class Dashboard:
+    upcoming: List[DashboardEntry] = field(default_factory=list)
+    # days -> entries expiring within that many days (overlapping)
+    buckets: dict = field(default_factory=dict)
+    # days -> number of such entries, which can exceed the rows shown
+    counts: dict = field(default_factory=dict)
+
+
+def _entries(query) -> List[DashboardEntry]:
+    return [DashboardEntry(*row) for row in query]
+
+
+def build_dashboard(today: date, max_rows: int = 1000) -> Dashboard:
+    """Expiry summary: the next TOP_N entries and the BUCKET_DAYS buckets.
+
+    The 30-day window is read once (plain columns, no ORM objects) and
+    split into the overlapping buckets here. At most ``max_rows`` rows are
+    kept; past that the bucket sizes come from one aggregate query.
+    """
+    horizon = today + timedelta(days=max(BUCKET_DAYS))
+    columns = db.select(
+        DataList.id, DataList.data, DataList.date, DataList.list_id, ListModel.type, ListModel.name,
+    ).join(ListModel, ListModel.id == DataList.list_id).order_by(DataList.date, DataList.id)
+    window = _entries(db.session.execute(
+        columns.where(DataList.date >= today, DataList.date <= horizon).limit(max_rows + 1)
+    ))
+    truncated = len(window) > max_rows
+    window = window[:max_rows]
+
+    dashboard = Dashboard()
+    for days in BUCKET_DAYS:
+        limit = today + timedelta(days=days)
+        dashboard.buckets[days] = [e for e in window if e.date <= limit]
+        dashboard.counts[days] = len(dashboard.buckets[days])
+    if truncated:
+        row = db.session.execute(
+            db.select(*(
+                func.sum(case((DataList.date <= today + timedelta(days=days), 1), else_=0))
+                for days in BUCKET_DAYS
+            )).where(DataList.date >= today, DataList.date <= horizon)
+        ).one()
+        dashboard.counts = {days: int(n or 0) for days, n in zip(BUCKET_DAYS, row)}
+
+    if len(window) >= TOP_N:
+        dashboard.upcoming = window[:TOP_N]
+    else:
+        # Fewer than TOP_N within the window: look further ahead
+        dashboard.upcoming = _entries(db.session.execute(columns.where(DataList.date >= today).limit(TOP_N)))
+    return dashboard
+
+
+class DashboardCache:
+    """Latest dashboard, valid until any list changes or the date rolls over.
+
+    Changes are detected through the shared list version counter, so every
+    worker notices mutations made by the others with a one-row read.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key: Tuple[date, int] | None = None
+        self._value: Dashboard | None = None
+
+    def get(self, today: date | None = None) -> Dashboard:
+        today = today or date.today()
+        key = (today, current_version(db.session))
+        with self._lock:
+            if key == self._key and self._value is not None:
+                return self._value
+        value = build_dashboard(today, current_app.config.get('DASHBOARD_MAX_ROWS', 1000))
+        with self._lock:
+            self._key, self._value = key, value
+        return value
+
+
+def init_dashboard_cache(app) -> None:
+    app.extensions['dashboard_cache'] = DashboardCache()
+
+
+def get_dashboard_cache() -> DashboardCache:
+    return current_app.extensions['dashboard_cache']
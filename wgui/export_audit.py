@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Tuple
+
+from flask import current_app
+
+from .actor_names import get_actor_names
+from .audit import audit_row, get_audit
+from .extensions import db
+
+
+class _Pending:
+    __slots__ = ("first_seen", "hits", "list_name", "list_type", "attempts")
+
+    def __init__(self, first_seen: datetime, list_name: str, list_type: str) -> None:
+        self.first_seen = first_seen
+        self.hits = 0
+        self.attempts = 0
+        self.list_name = list_name
+        self.list_type = list_type
+
+
+_Key = Tuple[int, str, int | None, int]
+
+
+class ExportAuditBuffer:
+    """Coalescing, in-process writer for list_exported audit rows.
+
+    Hits are grouped per (list, client ip, user, time window) and written as
+    one row with a hit count. A background thread hands closed windows to
+    the audit service every ``flush_seconds``; a full buffer or shutdown
+    hands over everything. With ``buffered=False`` every hit is passed on
+    immediately. Rows that cannot be built are merged back and retried on
+    the next flush, up to ``max_attempts`` times.
+    """
+
+    def __init__(self, app, window_seconds: int = 60, max_batch: int = 500,
+                 flush_seconds: float = 5.0, buffered: bool = True, max_attempts: int = 5) -> None:
+        self.app = app
+        self.window = max(1, int(window_seconds))
+        self.max_batch = max(1, int(max_batch))
+        self.max_attempts = max(1, int(max_attempts))
+        self.flush_seconds = float(flush_seconds)
+        self.buffered = bool(buffered)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[_Key, _Pending] = {}
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    def record(self, list_id: int, list_name: str, list_type: str,
+               ip: str | None, user_id: int | None) -> None:
+        now = time.time()
+        key = (list_id, ip or '', user_id, int(now // self.window))
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = _Pending(datetime.utcfromtimestamp(now), list_name, list_type)
+            entry.hits += 1
+            full = len(self._pending) >= self.max_batch
+        if not self.buffered:
+            self.flush(force=True)
+            return
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def flush(self, force: bool = False) -> int:
+        """Pass pending rows to the audit service; only closed windows unless ``force``. Returns the row count."""
+        current = int(time.time() // self.window)
+        with self._lock:
+            if force or len(self._pending) >= self.max_batch:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {k: v for k, v in self._pending.items() if k[3] < current}
+                for k in batch:
+                    del self._pending[k]
+        if not batch:
+            return 0
+        with self._flush_lock, self.app.app_context():
+            try:
+                names = get_actor_names().get_many({k[2] for k in batch if k[2]})
+                rows = [
+                    audit_row(
+                        'list_exported', 'list',
+                        created_at=p.first_seen,
+                        user_id=uid,
+                        actor_name=names.get(uid, 'system') if uid else 'system',
+                        target_id=list_id,
+                        list_id=list_id,
+                        details=f"name={p.list_name}; type={p.list_type}; ip={ip}; hits={p.hits}",
+                    )
+                    for (list_id, ip, uid, _w), p in batch.items()
+                ]
+            except Exception:
+                db.session.rollback()
+                self._requeue(batch)
+                return 0
+            # already committed activity: straight to the audit writer
+            get_audit().submit(rows)
+        return len(batch)
+
+    def _requeue(self, batch: Dict[_Key, _Pending]) -> None:
+        """Merge a batch that failed back into the buffer, dropping entries out of attempts."""
+        dropped = 0
+        with self._lock:
+            for key, failed in batch.items():
+                failed.attempts += 1
+                if failed.attempts >= self.max_attempts:
+                    dropped += failed.hits
+                    continue
+                entry = self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = failed
+                else:
+                    entry.hits += failed.hits
+                    entry.first_seen = min(entry.first_seen, failed.first_seen)
+                    entry.attempts = max(entry.attempts, failed.attempts)
+        if dropped:
+            self.app.logger.exception('Dropping %d export audit hits after %d failed attempts',
+                                      dropped, self.max_attempts)
+        else:
+            self.app.logger.warning('Failed to write %d export audit rows, will retry', len(batch), exc_info=True)
+
+    def stop(self) -> None:
+        """Stop the flusher thread and write everything still buffered."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush(force=True)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='wgui-export-audit', daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            if self._stopped:
+                break
+            self.flush()
+
+
+def init_export_audit(app) -> None:
+    app.extensions['export_audit'] = ExportAuditBuffer(
+        app,
+        window_seconds=app.config.get('EXPORT_AUDIT_WINDOW_SECONDS', 60),
+        max_batch=app.config.get('EXPORT_AUDIT_MAX_BATCH', 500),
+        flush_seconds=app.config.get('EXPORT_AUDIT_FLUSH_SECONDS', 5),
+        buffered=app.config.get('EXPORT_AUDIT_BUFFERED', True),
+        max_attempts=app.config.get('AUDIT_MAX_ATTEMPTS', 5),
+    )
+
+
+def get_export_audit() -> ExportAuditBuffer:
+    return current_app.extensions['export_audit']
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from flask import current_app
+
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 256
+
+
+class ExportSnapshot:
+    """Rendered export body for one list at one version.
+
+    Compressed variants are produced at most once per snapshot, i.e. once
+    per list version, and kept alongside the plain body.
+    """
+
+    __slots__ = ("list_id", "version", "variant", "etag", "body", "_encoded")
+
+    def __init__(self, list_id: int, version: int, variant: str, body: bytes) -> None:
+        self.list_id = list_id
+        self.version = version
+        self.variant = variant
+        self.etag = export_etag(list_id, version, variant)
+        self.body = body
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            if encoding != 'gzip':
+                raise ValueError(f"unsupported encoding {encoding!r}")
+            data = gzip.compress(self.body, compresslevel=6, mtime=0)
+            self._encoded[encoding] = data
+        return data
+
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self._encoded.values())
+
+
+def export_etag(list_id: int, version: int, variant: str = 'txt', encoding: str | None = None) -> str:
+    """Strong ETag (unquoted) for a list export representation."""
+    tag = f"{list_id}-{version}-{variant}"
+    return f"{tag}-{encoding}" if encoding else tag
+
+
+class ExportCache:
+    """In-process cache of export snapshots keyed by (list_id, variant).
+
+    Only the latest version of each list is kept; a lookup with a newer
+    version counts as a miss and the caller replaces the stale entry.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[int, str], ExportSnapshot] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, list_id: int, version: int, variant: str = 'txt') -> ExportSnapshot | None:
+        key = (list_id, variant)
+        with self._lock:
+            snap = self._entries.get(key)
+            if snap is None or snap.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return snap
+
+    def put(self, snap: ExportSnapshot) -> ExportSnapshot:
+        key = (snap.list_id, snap.variant)
+        with self._lock:
+            self._entries[key] = snap
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snap
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': sum(s.size() for s in self._entries.values()),
+            }
+
+
+def init_export_cache(app) -> None:
+    """Attach a fresh export cache to the app."""
+    app.extensions['export_cache'] = ExportCache(app.config.get('EXPORT_CACHE_MAX_ENTRIES', 256))
+
+
+def get_export_cache() -> ExportCache:
+    return current_app.extensions['export_cache']
@@ -34,6 +34,21 @@ _STRINGS = {
         "Make Admin": "Yönetici Yap",
         "Revoke Admin": "Yöneticiliği Kaldır",
         "Search": "Ara",
+        "Export formats": "Dışa aktarma biçimleri",
+        "Import": "İçe Aktar",
+        "Apply": "Uygula",
+        "Apply to all matching entries?": "Eşleşen tüm kayıtlara uygulansın mı?",
+        "Source": "Kaynak",
+        "Last sync": "Son eşitleme",
+        "Sync now": "Şimdi eşitle",
+        "Remove source": "Kaynağı kaldır",
+        "Only admins can change the source.": "Kaynağı yalnızca yöneticiler değiştirebilir.",
+        "Sort by": "Sırala",
+        "Id": "Kimlik",
+        "Previous": "Önceki",
+        "The list is kept identical to the feed: entries missing from it are removed.": "Liste kaynakla aynı tutulur: kaynakta olmayan kayıtlar silinir.",
+        "Entries": "Kayıtlar",
+        "One entry per line, or a CSV file with data, description and expires columns.": "Her satırda bir kayıt ya da data, description ve expires sütunlu bir CSV dosyası.",
         "Clear": "Temizle",
         "Cleanup Schedule (Daily)": "Temizlik Zamanlaması (Günlük)",
         "Save Cleanup Schedule": "Temizlik Zamanlamasını Kaydet",
@@ -67,7 +82,7 @@ _STRINGS = {
         "Open": "Aç",
         "Home": "Ana Sayfa",
         "Search all lists": "Tüm listelerde ara",
-        "Searches by substring across all entries": "Tüm girdilerde alt dizeye göre arar",
+        "Searches entries and descriptions across all lists": "Tüm listelerde girdi ve açıklamalarda arar",
         "Search Results for": "Arama Sonuçları",
         "Entry": "Kayıt",
         "List": "Liste",
@@ -94,6 +109,7 @@ _STRINGS = {
         "of": "toplam",
         "Prev": "Önceki",
         "Next": "Sonraki",
+        "Too many matches to rank; showing them unordered.": "Sıralanamayacak kadar çok sonuç var; sırasız gösteriliyor.",
         "Page": "Sayfa",
         "Separate multiple addresses with commas.": "Birden fazla adresi virgülle ayırın.",
         "Delete this list and all its items?": "Bu listeyi ve tüm öğelerini silmek istiyor musunuz?",
@@ -134,6 +150,8 @@ _STRINGS = {
         "backup downloaded": "yedek indirildi",
         "backup restored": "yedek geri yüklendi",
         "list exported": "liste dışa aktarıldı",
+        "items imported": "öğeler içe aktarıldı",
+        "feed synced": "kaynak eşitlendi",
         "user promoted to admin": "kullanıcı yönetici yapıldı",
         "user demoted from admin": "kullanıcının yöneticiliği kaldırıldı",
     },
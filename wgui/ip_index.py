@@ -0,0 +1,49 @@
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import get_history
+from .extensions import db
+from .ip_trie import get_prefix_index
+from .ipnet import IP_LIST_TYPES, entry_bounds
+from .models import DataList, ListModel
+
+
+def index_entry(item: DataList, list_type: str | None) -> None:
+    """Set the numeric range columns of ``item`` from its data."""
+    bounds = entry_bounds(item.data) if list_type in IP_LIST_TYPES else None
+    item.ip_start, item.ip_end = bounds or (None, None)
+
+
+@event.listens_for(db.session, 'before_flush')
+def index_ip_entries(session, flush_context, instances):
+    """Keep ip_start/ip_end in sync for added and edited items.
+
+    Bulk inserts and query updates bypass this hook and must call
+    ``index_entry``/``entry_bounds`` themselves.
+    """
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, DataList) or obj in session.deleted:
+            continue
+        if obj not in session.new and not (
+            get_history(obj, 'data').has_changes() or get_history(obj, 'list_id').has_changes()
+        ):
+            continue
+        lst = obj.list if obj.list_id is None else session.get(ListModel, obj.list_id)
+        index_entry(obj, lst.type if lst is not None else None)
+
+
+def lookup_address(address: str) -> list[DataList] | None:
+    """Every Ip/Ip Range entry covering ``address``; None if it is not an IP.
+
+    The covering entries come from the in-memory prefix trie (one walk of
+    at most 128 nodes); only those rows are then read, through the
+    (list_id, data) unique index.
+    """
+    found = get_prefix_index().covering(address)
+    if not found:
+        return found
+    wanted = set(found)
+    items = DataList.query.filter(
+        DataList.list_id.in_({list_id for list_id, _data in found}),
+        DataList.data.in_({data for _list_id, data in found}),
+    ).all()
+    items = [item for item in items if (item.list_id, item.data) in wanted]
+    return sorted(items, key=lambda item: (item.list_id, item.ip_start))
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+from flask import current_app
+
+from .extensions import db
+from .ipnet import IP_LIST_TYPES, parse_address
+from .models import DataList, ListModel
+
+
+class _Index:
+    """Disjoint address segments, each mapped to the lists covering it."""
+
+    __slots__ = ("starts", "owners", "names")
+
+    def __init__(self, starts: List[int], owners: List[Tuple[int, ...]], names: Dict[int, str]) -> None:
+        self.starts = starts
+        self.owners = owners
+        self.names = names
+
+    def lists_for(self, key: int) -> Tuple[int, ...]:
+        i = bisect_right(self.starts, key) - 1
+        return self.owners[i] if i >= 0 else ()
+
+
+def _key(ver: int, value: int) -> int:
+    """Integer form of ipnet.address_key."""
+    return value | (0xFFFF << 32) if ver == 4 else value
+
+
+def _merge(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def _build_index(per_list: Dict[int, List[Tuple[int, int]]], names: Dict[int, str]) -> _Index:
+    events: List[Tuple[int, int, int]] = []
+    for list_id, intervals in per_list.items():
+        for first, last in intervals:
+            events.append((first, 1, list_id))
+            events.append((last + 1, -1, list_id))
+    events.sort()
+    starts: List[int] = []
+    owners: List[Tuple[int, ...]] = []
+    active: Dict[int, int] = {}
+    i = 0
+    while i < len(events):
+        pos = events[i][0]
+        while i < len(events) and events[i][0] == pos:
+            _pos, delta, list_id = events[i]
+            active[list_id] = active.get(list_id, 0) + delta
+            if not active[list_id]:
+                del active[list_id]
+            i += 1
+        current = tuple(sorted(active))
+        if owners and owners[-1] == current:
+            continue
+        starts.append(pos)
+        owners.append(current)
+    return _Index(starts, owners, names)
+
+
+class IpMatcher:
+    """Answers "which lists contain this address" for large batches.
+
+    Each Ip/Ip Range list's entries are merged into sorted intervals and
+    cached under the list's version, so only lists that changed are read
+    again. The per-list intervals are combined into one segment index and
+    each address costs a single bisect.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._intervals: Dict[int, Tuple[int, List[Tuple[int, int]]]] = {}
+        self._key: frozenset | None = None
+        self._index = _Index([], [], {})
+
+    def _refresh(self) -> _Index:
+        lists = db.session.execute(
+            db.select(ListModel.id, ListModel.name, ListModel.version)
+            .where(ListModel.type.in_(IP_LIST_TYPES))
+        ).all()
+        key = frozenset((row.id, row.version) for row in lists)
+        if key == self._key:
+            return self._index
+        with self._lock:
+            if key == self._key:
+                return self._index
+            stale = [row.id for row in lists if self._intervals.get(row.id, (None,))[0] != row.version]
+            fresh: Dict[int, List[Tuple[int, int]]] = {list_id: [] for list_id in stale}
+            if stale:
+                rows = db.session.execute(
+                    db.select(DataList.list_id, DataList.ip_start, DataList.ip_end)
+                    .where(DataList.list_id.in_(stale), DataList.ip_start.is_not(None))
+                )
+                for list_id, start, end in rows:
+                    fresh[list_id].append((int.from_bytes(start, 'big'), int.from_bytes(end, 'big')))
+            versions = {row.id: row.version for row in lists}
+            intervals = {
+                list_id: cached for list_id, cached in self._intervals.items() if list_id in versions
+            }
+            for list_id, values in fresh.items():
+                intervals[list_id] = (versions[list_id], _merge(values))
+            self._intervals = intervals
+            self._index = _build_index(
+                {list_id: iv for list_id, (_v, iv) in intervals.items()},
+                {row.id: row.name for row in lists},
+            )
+            self._key = key
+            return self._index
+
+    def match(self, addresses: Iterable[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+        """Return ({address: [list names]} for covered addresses, invalid inputs)."""
+        index = self._refresh()
+        matches: Dict[str, List[str]] = {}
+        invalid: List[str] = []
+        for address in addresses:
+            parsed = parse_address(address)
+            if parsed is None:
+                invalid.append(address)
+                continue
+            owners = index.lists_for(_key(*parsed))
+            if owners:
+                matches[address] = [index.names[list_id] for list_id in owners]
+        return matches, invalid
+
+
+def init_ip_matcher(app) -> None:
+    app.extensions['ip_matcher'] = IpMatcher()
+
+
+def get_ip_matcher() -> IpMatcher:
+    return current_app.extensions['ip_matcher']
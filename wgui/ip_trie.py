@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import threading
+from array import array
+from typing import Dict, Iterable, List, Set, Tuple
+
+from flask import current_app
+
+from .extensions import db
+from .ipnet import IP_LIST_TYPES, entry_bounds, format_address, interval_to_prefixes, parse_address
+from .list_versions import changes_since
+from .models import DataList, ListModel
+
+# (list_id, entry data) stored at a trie node
+_Value = Tuple[int, str]
+
+_V4_MAPPED = 0xFFFF << 32
+
+
+class PrefixTrie:
+    """Binary trie over 128-bit keys (IPv4 as IPv4-mapped IPv6).
+
+    Children live in two flat ``array`` buffers indexed by node number, so
+    a node costs a few bytes instead of a Python object; only nodes that
+    terminate a prefix carry a payload set. Removing the last value of a
+    prefix prunes the nodes left without values or children, and their
+    slots are reused by later inserts.
+    """
+
+    def __init__(self) -> None:
+        self.left = array('l', [0])
+        self.right = array('l', [0])
+        self.payload: Dict[int, Set[_Value]] = {}
+        self._free: List[int] = []
+
+    @property
+    def node_count(self) -> int:
+        return len(self.left) - len(self._free)
+
+    def _new_node(self) -> int:
+        if self._free:
+            return self._free.pop()
+        self.left.append(0)
+        self.right.append(0)
+        return len(self.left) - 1
+
+    def _node(self, key: int, plen: int, create: bool) -> int:
+        node = 0
+        for bit in range(127, 127 - plen, -1):
+            children = self.right if key >> bit & 1 else self.left
+            child = children[node]
+            if not child:
+                if not create:
+                    return -1
+                child = children[node] = self._new_node()
+            node = child
+        return node
+
+    def insert(self, key: int, plen: int, value: _Value) -> None:
+        self.payload.setdefault(self._node(key, plen, True), set()).add(value)
+
+    def remove(self, key: int, plen: int, value: _Value) -> None:
+        path = [0]
+        for bit in range(127, 127 - plen, -1):
+            child = (self.right if key >> bit & 1 else self.left)[path[-1]]
+            if not child:
+                return
+            path.append(child)
+        values = self.payload.get(path[-1])
+        if values is None:
+            return
+        values.discard(value)
+        if values:
+            return
+        del self.payload[path[-1]]
+        # unlink the now empty tail of the path, deepest node first
+        for depth in range(plen, 0, -1):
+            node = path[depth]
+            if node in self.payload or self.left[node] or self.right[node]:
+                break
+            bit = 127 - (depth - 1)
+            (self.right if key >> bit & 1 else self.left)[path[depth - 1]] = 0
+            self._free.append(node)
+
+    def covering(self, key: int) -> Set[_Value]:
+        """Values of every prefix covering ``key``."""
+        found: Set[_Value] = set(self.payload.get(0, ()))
+        node = 0
+        for bit in range(127, -1, -1):
+            node = (self.right if key >> bit & 1 else self.left)[node]
+            if not node:
+                break
+            found.update(self.payload.get(node, ()))
+        return found
+
+    def longest_match(self, key: int) -> Tuple[int, Set[_Value]] | None:
+        """(prefix length, values) of the most specific prefix covering ``key``."""
+        node, best = 0, None
+        if 0 in self.payload:
+            best = (0, self.payload[0])
+        for depth, bit in enumerate(range(127, -1, -1), 1):
+            node = (self.right if key >> bit & 1 else self.left)[node]
+            if not node:
+                break
+            if node in self.payload:
+                best = (depth, self.payload[node])
+        return best
+
+
+def _prefixes(data: str) -> List[Tuple[int, int]]:
+    bounds = entry_bounds(data)
+    if bounds is None:
+        return []
+    first, last = (int.from_bytes(b, 'big') for b in bounds)
+    return interval_to_prefixes(6, first, last)
+
+
+def format_prefix(key: int, plen: int) -> str:
+    if plen >= 96 and key >> 32 == 0xFFFF:
+        return f"{format_address(4, key & 0xFFFFFFFF)}/{plen - 96}"
+    return f"{format_address(6, key)}/{plen}"
+
+
+class PrefixIndex:
+    """Longest-prefix match across all Ip/Ip Range lists.
+
+    Entries are decomposed into CIDR prefixes. On each lookup, lists whose
+    version moved are brought up to date from the change journal; lists
+    the journal cannot answer for are reloaded in full.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._trie = PrefixTrie()
+        # list_id -> (version, entries currently in the trie)
+        self._lists: Dict[int, Tuple[int, Set[str]]] = {}
+        self._key: frozenset | None = None
+
+    def _apply(self, list_id: int, data: str, add: bool) -> None:
+        for key, plen in _prefixes(data):
+            if add:
+                self._trie.insert(key, plen, (list_id, data))
+            else:
+                self._trie.remove(key, plen, (list_id, data))
+
+    def _replace(self, list_id: int, entries: Iterable[str]) -> Set[str]:
+        _version, old = self._lists.get(list_id, (None, set()))
+        for data in old:
+            self._apply(list_id, data, False)
+        new = {data for data in entries if entry_bounds(data) is not None}
+        for data in new:
+            self._apply(list_id, data, True)
+        return new
+
+    def sync(self) -> None:
+        lists = db.session.execute(
+            db.select(ListModel.id, ListModel.version, ListModel.journal_floor)
+            .where(ListModel.type.in_(IP_LIST_TYPES))
+        ).all()
+        key = frozenset((row.id, row.version) for row in lists)
+        if key == self._key:
+            return
+        current = {row.id: row for row in lists}
+        with self._lock:
+            if key == self._key:
+                return
+            for list_id in set(self._lists) - set(current):
+                self._replace(list_id, ())
+                del self._lists[list_id]
+            for list_id, row in current.items():
+                cached = self._lists.get(list_id)
+                if cached is not None and cached[0] == row.version:
+                    continue
+                delta = changes_since(row, cached[0]) if cached is not None else None
+                if delta is None:
+                    entries = db.session.execute(
+                        db.select(DataList.data).where(DataList.list_id == list_id)
+                    ).scalars()
+                    self._lists[list_id] = (row.version, self._replace(list_id, entries))
+                    continue
+                entries = cached[1]
+                for op, data in delta:
+                    if op == '+' and data not in entries and entry_bounds(data) is not None:
+                        entries.add(data)
+                        self._apply(list_id, data, True)
+                    elif op == '-' and data in entries:
+                        entries.discard(data)
+                        self._apply(list_id, data, False)
+                self._lists[list_id] = (row.version, entries)
+            self._key = key
+
+    def covering(self, address: str) -> List[_Value] | None:
+        """(list_id, data) of every entry covering ``address``; None if it is not an IP."""
+        parsed = parse_address(address.strip())
+        if parsed is None:
+            return None
+        ver, value = parsed
+        self.sync()
+        with self._lock:
+            return sorted(self._trie.covering(value | _V4_MAPPED if ver == 4 else value))
+
+    def longest_match(self, address: str) -> Tuple[str, List[_Value]] | None:
+        """Most specific prefix covering ``address`` and the (list_id, data) entries at it."""
+        parsed = parse_address(address.strip())
+        if parsed is None:
+            return None
+        ver, value = parsed
+        key = value | _V4_MAPPED if ver == 4 else value
+        self.sync()
+        with self._lock:
+            found = self._trie.longest_match(key)
+            if found is None:
+                return None
+            plen, values = found
+            values = sorted(values)
+        host = 128 - plen
+        return format_prefix(key >> host << host, plen), values
+
+
+def init_prefix_index(app) -> None:
+    app.extensions['prefix_index'] = PrefixIndex()
+
+
+def get_prefix_index() -> PrefixIndex:
+    return current_app.extensions['prefix_index']
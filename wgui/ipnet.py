@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import socket
+from typing import Iterable, List, Tuple
+
+
+IP_LIST_TYPES = ('Ip', 'Ip Range')
+
+
+_FAMILIES = ((4, socket.AF_INET), (6, socket.AF_INET6))
+
+
+def parse_address(text: str) -> Tuple[int, int] | None:
+    """Parse a single IPv4/IPv6 address into (ip_version, integer)."""
+    for ver, family in _FAMILIES:
+        try:
+            return ver, int.from_bytes(socket.inet_pton(family, text), 'big')
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def parse_entry(value: str) -> Tuple[int, int, int] | None:
+    """Parse an Ip/Ip Range entry into (ip_version, first, last) integers.
+
+    Accepts a single address, a CIDR network (host bits ignored) or a
+    ``first-last`` range. Returns None for anything else.
+    """
+    text = (value or '').strip()
+    if not text:
+        return None
+    if '-' in text:
+        left, right = (p.strip() for p in text.split('-', 1))
+        first, last = parse_address(left), parse_address(right)
+        if first is None or last is None or first[0] != last[0] or last[1] < first[1]:
+            return None
+        return first[0], first[1], last[1]
+    if '/' in text:
+        addr, _, prefix = text.partition('/')
+        parsed = parse_address(addr.strip())
+        if parsed is None or not prefix.strip().isdigit():
+            return None
+        ver, value_int = parsed
+        bits = 32 if ver == 4 else 128
+        plen = int(prefix)
+        if plen > bits:
+            return None
+        host = (1 << (bits - plen)) - 1
+        return ver, value_int & ~host, value_int | host
+    parsed = parse_address(text)
+    if parsed is None:
+        return None
+    return parsed[0], parsed[1], parsed[1]
+
+
+def format_address(ver: int, value: int) -> str:
+    if ver == 4:
+        return socket.inet_ntop(socket.AF_INET, value.to_bytes(4, 'big'))
+    return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, 'big'))
+
+
+def address_key(ver: int, value: int) -> bytes:
+    """16-byte big-endian key; IPv4 sorts as its IPv4-mapped IPv6 address."""
+    if ver == 4:
+        value |= 0xFFFF << 32
+    return value.to_bytes(16, 'big')
+
+
+def entry_bounds(value: str) -> Tuple[bytes, bytes] | None:
+    """(start, end) keys of an Ip/Ip Range entry, or None if unparseable."""
+    parsed = parse_entry(value)
+    if parsed is None:
+        return None
+    ver, first, last = parsed
+    return address_key(ver, first), address_key(ver, last)
+
+
+def merge_intervals(intervals: Iterable[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Merge overlapping and adjacent (version, first, last) intervals."""
+    merged: List[Tuple[int, int, int]] = []
+    for ver, first, last in sorted(intervals):
+        if merged:
+            pver, pfirst, plast = merged[-1]
+            if pver == ver and first <= plast + 1:
+                if last > plast:
+                    merged[-1] = (ver, pfirst, last)
+                continue
+        merged.append((ver, first, last))
+    return merged
+
+
+def interval_to_prefixes(ver: int, first: int, last: int) -> List[Tuple[int, int]]:
+    """Split [first, last] into the minimal list of (network, prefix_len) blocks."""
+    bits = 32 if ver == 4 else 128
+    blocks = []
+    while first <= last:
+        # largest block aligned at ``first`` that does not run past ``last``
+        size = (first & -first).bit_length() - 1 if first else bits
+        size = min(size, (last - first + 1).bit_length() - 1)
+        blocks.append((first, bits - size))
+        first += 1 << size
+    return blocks
+
+
+def interval_to_cidrs(ver: int, first: int, last: int) -> List[str]:
+    return [
+        f"{format_address(ver, net)}/{plen}"
+        for net, plen in interval_to_prefixes(ver, first, last)
+    ]
+
+
+def aggregate_cidrs(entries: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Collapse entries into the minimal CIDR set (IPv4 first, then IPv6).
+
+    Returns (cidrs, invalid) where ``invalid`` keeps unparseable entries.
+    """
+    intervals = []
+    invalid = []
+    for entry in entries:
+        parsed = parse_entry(entry)
+        if parsed is None:
+            invalid.append(entry)
+        else:
+            intervals.append(parsed)
+    cidrs: List[str] = []
+    for ver, first, last in merge_intervals(intervals):
+        cidrs.extend(interval_to_cidrs(ver, first, last))
+    return cidrs, invalid
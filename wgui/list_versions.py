@@ -0,0 +1,159 @@
+from sqlalchemy import event, select
+from sqlalchemy.orm.attributes import get_history
+from .extensions import db
+from .models import DataList, ListChange, ListModel, VersionCounter
+
+
+def next_version(session, name: str = 'lists') -> int:
+    """Atomically increment the named counter and return its new value.
+
+    Versions come from a single shared counter so they never repeat, even
+    when a list is deleted and another one later reuses its id.
+    """
+    table = VersionCounter.__table__
+    conn = session.connection()
+    stmt = table.update().where(table.c.name == name).values(value=table.c.value + 1)
+    if conn.dialect.update_returning:
+        value = conn.execute(stmt.returning(table.c.value)).scalar()
+    else:
+        value = conn.execute(select(table.c.value).where(table.c.name == name)).scalar()
+        if value is not None:
+            conn.execute(stmt)
+            value += 1
+    if value is None:
+        conn.execute(table.insert().values(name=name, value=1))
+        value = 1
+    return value
+
+
+def current_version(session, name: str = 'lists') -> int:
+    """Latest value of the named counter; changes whenever any list does."""
+    table = VersionCounter.__table__
+    return session.execute(select(table.c.value).where(table.c.name == name)).scalar() or 0
+
+
+def adjust_item_count(session, lst: ListModel, delta: int) -> None:
+    """Add ``delta`` to the entry counter of ``lst`` with an atomic UPDATE."""
+    if not delta:
+        return
+    if lst.id is None:
+        lst.item_count = (lst.item_count or 0) + delta
+        return
+    table = ListModel.__table__
+    session.connection().execute(
+        table.update().where(table.c.id == lst.id).values(item_count=table.c.item_count + delta)
+    )
+    session.expire(lst, ['item_count'])
+
+
+def _owner(session, obj: DataList, list_id: int | None = None) -> ListModel | None:
+    """The list an item belongs to, preferring objects already in the session."""
+    list_id = obj.list_id if list_id is None else list_id
+    if list_id is None:
+        # pending item attached through the relationship only
+        return obj.list
+    return session.get(ListModel, list_id)
+
+
+@event.listens_for(db.session, 'before_flush')
+def bump_list_versions(session, flush_context, instances):
+    """Give every list touched by this flush a fresh version number.
+
+    Covers item add/edit/delete (including expiry cleanup) and list
+    create/rename, keeps the per-list entry counters in step and journals
+    entry additions/removals under the new version for delta exports.
+    Bulk query updates bypass this hook.
+    """
+    changed: dict[int, ListModel] = {}
+    created: list[ListModel] = []
+    # (list, op, data); removals are journaled before additions
+    entries: list[tuple[ListModel | None, str, str]] = []
+
+    for obj in session.new:
+        if isinstance(obj, DataList):
+            entries.append((_owner(session, obj), '+', obj.data))
+        elif isinstance(obj, ListModel):
+            changed[id(obj)] = obj
+            created.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, DataList):
+            entries.append((_owner(session, obj), '-', obj.data))
+        elif isinstance(obj, ListModel) and obj.id is not None:
+            session.query(ListChange).filter(ListChange.list_id == obj.id).delete(synchronize_session=False)
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, DataList):
+            list_hist = get_history(obj, 'list_id')
+            data_hist = get_history(obj, 'data')
+            if list_hist.has_changes() or data_hist.has_changes():
+                old_list = _owner(session, obj, list_hist.deleted[0]) if list_hist.deleted else _owner(session, obj)
+                old_data = data_hist.deleted[0] if data_hist.deleted else obj.data
+                entries.append((old_list, '-', old_data))
+                entries.append((_owner(session, obj), '+', obj.data))
+            else:
+                # description/date edits change exports but not the entry set
+                entries.append((_owner(session, obj), '', obj.data))
+        elif isinstance(obj, ListModel):
+            if get_history(obj, 'name').has_changes() or get_history(obj, 'type').has_changes():
+                changed[id(obj)] = obj
+
+    for lst, _op, _data in entries:
+        if lst is not None:
+            changed[id(lst)] = lst
+    removed = session.info.setdefault('removed_export_slugs', set())
+    for obj in session.deleted:
+        if isinstance(obj, ListModel):
+            removed.add((obj.type_slug, obj.name_slug))
+    targets = [lst for lst in changed.values() if lst not in session.deleted]
+    # A deleted list has no version left to bump, but the counter must move
+    lists_deleted = any(isinstance(obj, ListModel) for obj in session.deleted)
+    for lst in targets:
+        old_type = get_history(lst, 'type_slug').deleted
+        old_name = get_history(lst, 'name_slug').deleted
+        if old_type or old_name:
+            removed.add((old_type[0] if old_type else lst.type_slug, old_name[0] if old_name else lst.name_slug))
+    if not targets:
+        if lists_deleted:
+            next_version(session)
+        return
+    version = next_version(session)
+    for lst in targets:
+        lst.version = version
+    for lst in created:
+        lst.journal_floor = version
+    # Picked up after commit, e.g. to rewrite materialized export files
+    session.info.setdefault('changed_lists', set()).update(targets)
+    counts: dict[int, int] = {}
+    for lst, op, _data in entries:
+        if op and lst is not None and lst not in session.deleted:
+            counts[id(lst)] = counts.get(id(lst), 0) + (1 if op == '+' else -1)
+    for lst in targets:
+        adjust_item_count(session, lst, counts.get(id(lst), 0))
+    entries.sort(key=lambda e: e[1] != '-')
+    for lst, op, data in entries:
+        if not op or lst is None or lst in session.deleted or lst in created:
+            continue
+        session.add(ListChange(list_id=lst.id, version=version, op=op, data=data))
+
+
+def changes_since(lst: ListModel, since: int) -> list[tuple[str, str]] | None:
+    """Net entry changes of ``lst`` after version ``since``.
+
+    Returns (op, data) pairs where the last operation per entry wins, or
+    None when the journal cannot answer (compacted past ``since`` or a
+    version this list never had) and a full export is required.
+    """
+    if since < lst.journal_floor or since > lst.version:
+        return None
+    rows = (
+        db.session.query(ListChange.op, ListChange.data)
+        .filter(ListChange.list_id == lst.id, ListChange.version > since)
+        .order_by(ListChange.id.asc())
+        .all()
+    )
+    net: dict[str, str] = {}
+    for op, data in rows:
+        net.pop(data, None)
+        net[data] = op
+    return [(op, data) for data, op in net.items()]
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass
+from datetime import date
+from typing import IO, Iterable, Iterator, Tuple
+
+from sqlalchemy import insert
+
+from ..actor_names import actor_name
+from ..audit import audit, audit_many
+from ..extensions import db
+from ..ipnet import IP_LIST_TYPES, entry_bounds, format_address, parse_address, parse_entry
+from ..list_versions import adjust_item_count, next_version
+from ..models import DataList, ListChange, ListModel
+from ..sql_regex import compile_pattern
+
+IMPORT_CHUNK_SIZE = 1000
+
+# (data, description, expires)
+ImportRow = Tuple[str, str | None, date]
+
+
+@dataclass
+class ImportResult:
+    added: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    version: int | None = None
+
+
+def canonicalize(list_type: str, value: str) -> str | None:
+    """Normalized form of an entry for ``list_type``, or None if invalid."""
+    value = (value or '').strip()
+    if not value or len(value) > 255:
+        return None
+    if list_type not in IP_LIST_TYPES:
+        return value
+    if list_type == 'Ip' and '-' in value:
+        return None
+    parsed = parse_entry(value)
+    if parsed is None:
+        return None
+    ver, first, last = parsed
+    if '-' in value:
+        return f"{format_address(ver, first)}-{format_address(ver, last)}"
+    if '/' in value:
+        bits = 32 if ver == 4 else 128
+        return f"{format_address(ver, first)}/{bits - (last - first).bit_length()}"
+    return format_address(*parse_address(value))
+
+
+def parse_import(stream: IO[bytes], default_date: date | None, description: str | None = None,
+                 csv_format: bool = False) -> Iterator[ImportRow | None]:
+    """Yield rows from an uploaded file without reading it into memory.
+
+    Plain text holds one entry per line (``#`` comments allowed). CSV rows
+    are ``data[,description[,expires]]`` as produced by the .csv export; a
+    ``data`` header row is skipped. Unparseable rows yield None.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='')
+    if not csv_format:
+        for line in text:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line, description, default_date
+        return
+    for i, row in enumerate(csv.reader(text)):
+        if not row or not row[0].strip():
+            continue
+        if i == 0 and row[0].strip().lower() == 'data':
+            continue
+        expires = default_date
+        if len(row) > 2 and row[2].strip():
+            try:
+                expires = date.fromisoformat(row[2].strip()[:10])
+            except ValueError:
+                yield None
+                continue
+        yield row[0], (row[1] if len(row) > 1 and row[1] else description), expires
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def insert_ignore(table):
+    """INSERT that skips rows violating a unique constraint, where supported."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(table).prefix_with('IGNORE') if dialect in ('mysql', 'mariadb') else insert(table)
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+def _insert_new(values: list) -> Tuple[list, int]:
+    """INSERT ``values`` skipping existing entries.
+
+    Returns the data to journal and the number of rows inserted. Without
+    RETURNING (MySQL) only the count is exact and every value is
+    journaled; an extra ``+`` for an entry that exists is harmless.
+    """
+    stmt = insert_ignore(DataList.__table__)
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        added = list(db.session.execute(stmt.returning(DataList.__table__.c.data), values).scalars())
+        return added, len(added)
+    inserted = db.session.execute(stmt, values).rowcount
+    return [v['data'] for v in values], max(inserted, 0)
+
+
+def import_entries(lst: ListModel, rows: Iterable[ImportRow | None], user_id: int | None = None,
+                   source: str = '', chunk_size: int = IMPORT_CHUNK_SIZE,
+                   actor_name: str | None = None) -> ImportResult:
+    """Add ``rows`` to ``lst`` with chunked set-based inserts.
+
+    Entries are canonicalized for the list type and de-duplicated against
+    the file and the list (one ``IN`` query per chunk). The list version is
+    bumped once, added entries are journaled under it and a single
+    ``items_imported`` audit row records the counts. The caller commits.
+    """
+    result = ImportResult()
+    seen: set[str] = set()
+    is_ip = lst.type in IP_LIST_TYPES
+    for chunk in _chunks(rows, chunk_size):
+        batch = {}
+        for row in chunk:
+            data = canonicalize(lst.type, row[0]) if row is not None else None
+            if data is None:
+                result.invalid += 1
+            elif data in seen:
+                result.duplicates += 1
+            else:
+                seen.add(data)
+                batch[data] = row
+        if not batch:
+            continue
+        existing = set(db.session.execute(
+            db.select(DataList.data).where(DataList.list_id == lst.id, DataList.data.in_(list(batch)))
+        ).scalars())
+        result.duplicates += len(existing)
+        values = []
+        for data, (_raw, description, expires) in batch.items():
+            if data in existing:
+                continue
+            start, end = entry_bounds(data) if is_ip else (None, None)
+            values.append({
+                'list_id': lst.id,
+                'data': data,
+                'description': (description or '')[:255] or None,
+                'date': expires,
+                'creator_id': user_id,
+                'ip_start': start,
+                'ip_end': end,
+            })
+        if not values:
+            continue
+        if result.version is None:
+            result.version = next_version(db.session)
+        journal, inserted = _insert_new(values)
+        # rows another writer added since the IN query above were skipped
+        result.duplicates += len(values) - inserted
+        if not inserted:
+            continue
+        db.session.execute(insert(ListChange.__table__), [
+            {'list_id': lst.id, 'version': result.version, 'op': '+', 'data': data} for data in journal
+        ])
+        result.added += inserted
+    if result.added:
+        lst.version = result.version
+        adjust_item_count(db.session, lst, result.added)
+        # Bulk inserts bypass the before_flush hook; queue the export refresh
+        db.session.info.setdefault('changed_lists', set()).add(lst)
+    audit(
+        user_id=user_id,
+        actor_name=actor_name,
+        action='items_imported',
+        target_type='list',
+        target_id=lst.id,
+        list_id=lst.id,
+        details=(
+            f"name={lst.name}; added={result.added}; duplicates={result.duplicates}; "
+            f"invalid={result.invalid}; source={source}"
+        )[:255],
+    )
+    return result
+
+
+BULK_CHUNK_SIZE = 500
+
+
+def select_items(lst: ListModel, ids: Iterable[int] | None = None, pattern: str | None = None,
+                 date_from: date | None = None, date_to: date | None = None) -> list:
+    """(id, data, date) rows of ``lst`` picked by ids, a regex on data or an expiry window.
+
+    The regex runs in the database; raises ``re.error`` or
+    ``PatternTooComplex`` for an unusable pattern.
+    """
+    cols = db.select(DataList.id, DataList.data, DataList.date).where(DataList.list_id == lst.id)
+    if ids is not None:
+        rows = []
+        for chunk in _chunks(sorted(set(ids)), BULK_CHUNK_SIZE):
+            rows.extend(db.session.execute(cols.where(DataList.id.in_(chunk))).all())
+        return rows
+    if pattern is not None:
+        compile_pattern(pattern)
+        return db.session.execute(cols.where(DataList.data.regexp_match(pattern))).all()
+    if date_from is not None:
+        cols = cols.where(DataList.date >= date_from)
+    if date_to is not None:
+        cols = cols.where(DataList.date <= date_to)
+    return db.session.execute(cols).all()
+
+
+def _actor_name(user_id: int | None) -> str:
+    return actor_name(user_id) or 'system'
+
+
+def _finish_bulk(lst: ListModel, audits: list, changes: list | None = None) -> int:
+    """Bump the list version once, journal ``changes`` and record ``audits``."""
+    version = next_version(db.session)
+    lst.version = version
+    db.session.info.setdefault('changed_lists', set()).add(lst)
+    for chunk in _chunks(changes or [], BULK_CHUNK_SIZE):
+        for change in chunk:
+            change['version'] = version
+        db.session.execute(insert(ListChange.__table__), chunk)
+    audit_many(audits)
+    return version
+
+
+def bulk_delete(lst: ListModel, rows: list, user_id: int | None = None, reason: str = 'bulk',
+                actor_name: str | None = None) -> int:
+    """Delete ``rows`` from ``lst`` in chunked DELETE statements. The caller commits."""
+    if not rows:
+        return 0
+    for chunk in _chunks([row.id for row in rows], BULK_CHUNK_SIZE):
+        db.session.execute(DataList.__table__.delete().where(DataList.__table__.c.id.in_(chunk)))
+    actor = actor_name or _actor_name(user_id)
+    adjust_item_count(db.session, lst, -len(rows))
+    _finish_bulk(
+        lst,
+        [
+            {
+                'user_id': user_id,
+                'actor_name': actor,
+                'action': 'item_deleted',
+                'target_type': 'item',
+                'target_id': row.id,
+                'list_id': lst.id,
+                'details': f"category={lst.name}; data={row.data}; reason={reason}"[:255],
+            }
+            for row in rows
+        ],
+        [{'list_id': lst.id, 'op': '-', 'data': row.data} for row in rows],
+    )
+    return len(rows)
+
+
+def renew_expiry(lst: ListModel, expires: date, ids: Iterable[int] | None = None) -> int:
+    """Push entries of ``lst`` (all, or ``ids``) expiring before ``expires`` out to it. The caller commits.
+
+    Used by feed syncs, so entries a feed still lists are not removed by
+    the expiry cleanup; no per-entry audit rows are written.
+    """
+    table = DataList.__table__
+    stmt = table.update().where(table.c.list_id == lst.id, table.c.date < expires).values(date=expires)
+    if ids is None:
+        renewed = db.session.execute(stmt).rowcount
+    else:
+        renewed = sum(
+            db.session.execute(stmt.where(table.c.id.in_(chunk))).rowcount
+            for chunk in _chunks(ids, BULK_CHUNK_SIZE)
+        )
+    if renewed:
+        # entries are unchanged, so nothing to journal; the version bump refreshes exports
+        _finish_bulk(lst, [])
+    return renewed
+
+
+def set_feed_dates(lst: ListModel, dates: dict) -> int:
+    """Set the expiry of entries of ``lst`` to the date their feed gives (id -> date). The caller commits."""
+    if not dates:
+        return 0
+    table = DataList.__table__
+    by_date: dict = {}
+    for item_id, expires in dates.items():
+        by_date.setdefault(expires, []).append(item_id)
+    for expires, ids in by_date.items():
+        for chunk in _chunks(ids, BULK_CHUNK_SIZE):
+            db.session.execute(table.update().where(table.c.id.in_(chunk)).values(date=expires))
+    _finish_bulk(lst, [])
+    return len(dates)
+
+
+def bulk_set_expiry(lst: ListModel, rows: list, new_date: date, user_id: int | None = None,
+                    actor_name: str | None = None) -> int:
+    """Move the expiry of ``rows`` to ``new_date`` in chunked UPDATE statements. The caller commits."""
+    rows = [row for row in rows if row.date != new_date]
+    if not rows:
+        return 0
+    table = DataList.__table__
+    for chunk in _chunks([row.id for row in rows], BULK_CHUNK_SIZE):
+        db.session.execute(table.update().where(table.c.id.in_(chunk)).values(date=new_date))
+    actor = actor_name or _actor_name(user_id)
+    # entries are unchanged, so nothing to journal; the version bump refreshes exports
+    _finish_bulk(lst, [
+        {
+            'user_id': user_id,
+            'actor_name': actor,
+            'action': 'item_edited',
+            'target_type': 'item',
+            'target_id': row.id,
+            'list_id': lst.id,
+            'details': f"date:{row.date}->{new_date}; reason=bulk"[:255],
+        }
+        for row in rows
+    ])
+    return len(rows)
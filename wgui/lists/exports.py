@@ -0,0 +1,196 @@
+import gzip
+import os
+import tempfile
+import zlib
+from contextlib import nullcontext
+from typing import Iterator
+
+from flask import current_app
+from sqlalchemy import event, inspect
+
+from ..extensions import db
+from ..ipnet import aggregate_cidrs
+from ..models import DataList, ListModel
+from .renderers import RENDERERS, ExportInfo
+
+
+def export_info(lst) -> ExportInfo:
+    """ExportInfo from a ListModel (or a row with the same attributes)."""
+    return ExportInfo(lst.id, lst.name, lst.type, lst.type_slug, lst.name_slug, lst.version)
+
+
+def build_export(executor, info: ExportInfo, variant: str = 'txt') -> bytes:
+    """Render the export body for one list.
+
+    ``executor`` is a session or connection, so the body can also be built
+    outside the request session (e.g. after a commit). ``variant`` is a
+    renderer format, or ``cidr`` for the txt format with Ip/Ip Range
+    entries collapsed into the minimal set of CIDR blocks.
+    """
+    if variant == 'cidr':
+        rows = executor.execute(
+            db.select(DataList.data).where(DataList.list_id == info.id)
+        ).scalars()
+        cidrs, invalid = aggregate_cidrs(rows)
+        return "\n".join([f"type={info.type_slug}", *cidrs, *invalid]).encode('utf-8')
+    renderer = RENDERERS[variant]
+    columns = [getattr(DataList, c) for c in renderer.columns]
+    rows = executor.execute(db.select(*columns).where(DataList.list_id == info.id))
+    return "".join(renderer.render(info, rows)).encode('utf-8')
+
+
+def stream_export(info: ExportInfo, fmt: str, encoding: str | None = None,
+                  batch_size: int = 5000, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield an export body in chunks without materializing the list.
+
+    Only the renderer's columns are selected and rows are fetched in
+    ``batch_size`` batches, so peak memory does not grow with list size.
+    ``encoding='gzip'`` compresses on the fly.
+    """
+    renderer = RENDERERS[fmt]
+    columns = [getattr(DataList, c) for c in renderer.columns]
+    stmt = (
+        db.select(*columns)
+        .where(DataList.list_id == info.id)
+        .execution_options(yield_per=batch_size)
+    )
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if encoding == 'gzip' else None
+    rows = db.session.execute(stmt)
+    try:
+        pending: list[str] = []
+        size = 0
+        for piece in renderer.render(info, rows):
+            pending.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                data = "".join(pending).encode('utf-8')
+                pending, size = [], 0
+                data = compressor.compress(data) if compressor else data
+                if data:
+                    yield data
+        data = "".join(pending).encode('utf-8')
+        if compressor:
+            data = compressor.compress(data) + compressor.flush()
+        if data:
+            yield data
+    finally:
+        rows.close()
+
+
+def _export_info_query():
+    return db.select(ListModel.id, ListModel.name, ListModel.type, ListModel.type_slug, ListModel.name_slug, ListModel.version)
+
+
+def export_file_path(directory: str, type_slug: str, name_slug: str) -> str:
+    return os.path.join(directory, type_slug, f"{name_slug}.txt")
+
+
+def write_export_file(directory: str, type_slug: str, name_slug: str, body: bytes) -> str:
+    """Atomically (temp file + rename) write a materialized export and its .gz."""
+    path = export_file_path(directory, type_slug, name_slug)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for target, data in ((path, body), (path + '.gz', gzip.compress(body, mtime=0))):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, target)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    return path
+
+
+def remove_export_file(directory: str, type_slug: str, name_slug: str) -> None:
+    path = export_file_path(directory, type_slug, name_slug)
+    for target in (path, path + '.gz'):
+        if os.path.exists(target):
+            os.remove(target)
+
+
+def materialize_list(app, conn, list_id: int) -> str | None:
+    """Rewrite the export file of one list from the database."""
+    directory = app.config.get('EXPORT_MATERIALIZE_DIR')
+    row = conn.execute(_export_info_query().where(ListModel.id == list_id)).first()
+    if not directory or row is None:
+        return None
+    body = build_export(conn, export_info(row))
+    return write_export_file(directory, row.type_slug, row.name_slug, body)
+
+
+def rebuild_export_files(app) -> int:
+    """Rewrite every materialized export file and drop orphans. Returns files written."""
+    directory = app.config.get('EXPORT_MATERIALIZE_DIR')
+    if not directory:
+        return 0
+    with app.app_context(), db.engine.connect() as conn:
+        ids = conn.execute(db.select(ListModel.id)).scalars().all()
+        for list_id in ids:
+            materialize_list(app, conn, list_id)
+        for path in check_export_files(app, conn)['orphaned']:
+            os.remove(path)
+            if os.path.exists(path + '.gz'):
+                os.remove(path + '.gz')
+    return len(ids)
+
+
+def check_export_files(app, conn=None) -> dict:
+    """Compare materialized files with the database.
+
+    Returns paths grouped as ``missing`` (no file), ``stale`` (content
+    differs) and ``orphaned`` (file without a list).
+    """
+    directory = app.config.get('EXPORT_MATERIALIZE_DIR')
+    report = {'missing': [], 'stale': [], 'orphaned': []}
+    if not directory:
+        return report
+    with app.app_context(), (db.engine.connect() if conn is None else nullcontext(conn)) as c:
+        expected = set()
+        rows = c.execute(_export_info_query()).all()
+        for row in rows:
+            path = export_file_path(directory, row.type_slug, row.name_slug)
+            expected.add(path)
+            if not os.path.isfile(path):
+                report['missing'].append(path)
+                continue
+            with open(path, 'rb') as f:
+                if f.read() != build_export(c, export_info(row)):
+                    report['stale'].append(path)
+    if os.path.isdir(directory):
+        for root, _dirs, files in os.walk(directory):
+            for fn in files:
+                path = os.path.join(root, fn)
+                if fn.endswith('.txt') and path not in expected:
+                    report['orphaned'].append(path)
+    return report
+
+
+@event.listens_for(db.session, 'after_commit')
+def _materialize_after_commit(session):
+    """Rewrite export files of lists changed in the committed transaction."""
+    changed = session.info.pop('changed_lists', set())
+    removed = session.info.pop('removed_export_slugs', set())
+    try:
+        app = current_app._get_current_object()
+    except RuntimeError:
+        return
+    directory = app.config.get('EXPORT_MATERIALIZE_DIR')
+    if not directory or not (changed or removed):
+        return
+    ids = {inspect(lst).identity[0] for lst in changed if inspect(lst).identity}
+    try:
+        for type_slug, name_slug in removed:
+            remove_export_file(directory, type_slug, name_slug)
+        with db.engine.connect() as conn:
+            for list_id in ids:
+                materialize_list(app, conn, list_id)
+    except Exception:
+        app.logger.exception('Failed to materialize list exports')
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_pending_exports(session, previous_transaction):
+    session.info.pop('changed_lists', None)
+    session.info.pop('removed_export_slugs', None)
@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, DateField, HiddenField
-from wtforms.validators import DataRequired
+from flask_wtf.file import FileAllowed, FileField, FileRequired
+from wtforms import BooleanField, StringField, DateField, HiddenField, IntegerField, SelectField
+from wtforms.validators import DataRequired, Length, NumberRange, Optional
 
 class AddItemForm(FlaskForm):
     data = StringField('Data', validators=[DataRequired()])
@@ -25,3 +26,36 @@ class EditItemForm(FlaskForm):
     data = StringField('Data', validators=[DataRequired()])
     description = StringField('Description')
     date = DateField('Date', validators=[DataRequired()], format='%Y-%m-%d')
+
+
+class ImportItemsForm(FlaskForm):
+    """Upload a text (one entry per line) or CSV file of entries."""
+    file = FileField('File', validators=[
+        FileRequired(),
+        FileAllowed(['txt', 'csv', 'list'], 'Text or CSV files only!'),
+    ])
+    description = StringField('Description')
+    date = DateField('Date', validators=[DataRequired()], format='%Y-%m-%d')
+
+
+class BulkActionForm(FlaskForm):
+    """Delete or renew many entries, picked by checkbox, regex or expiry window."""
+    action = SelectField('Action', choices=[('delete', 'Delete'), ('extend', 'Set expiry')])
+    scope = SelectField('Apply to', choices=[
+        ('selected', 'Selected entries'),
+        ('regex', 'Entries matching regex'),
+        ('window', 'Entries expiring between'),
+    ])
+    pattern = StringField('Regex')
+    date_from = DateField('From', validators=[Optional()], format='%Y-%m-%d')
+    date_to = DateField('To', validators=[Optional()], format='%Y-%m-%d')
+    new_date = DateField('New expiry', validators=[Optional()], format='%Y-%m-%d')
+
+
+class ListSourceForm(FlaskForm):
+    """Feed a list is synchronized from."""
+    url = StringField('Source URL or path', validators=[DataRequired(), Length(max=500)])
+    csv_format = BooleanField('CSV format')
+    interval_minutes = IntegerField('Refresh every (minutes)', default=60, validators=[DataRequired(), NumberRange(min=1)])
+    expire_days = IntegerField('Entries expire after (days)', default=365, validators=[DataRequired(), NumberRange(min=1)])
+    enabled = BooleanField('Enabled', default=True)
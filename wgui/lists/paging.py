@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List
+
+from sqlalchemy import tuple_
+
+from ..models import DataList, ListModel
+
+SORT_KEYS = ('id', 'data', 'date')
+
+
+@dataclass
+class Page:
+    items: List[DataList] = field(default_factory=list)
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+def encode_cursor(values: tuple) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str | None, sort: str) -> tuple | None:
+    """Sort key values from a cursor token, or None if it is missing or malformed."""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if sort == 'id':
+            return (int(values[0]),)
+        first = date.fromisoformat(values[0]) if sort == 'date' else str(values[0])
+        return first, int(values[1])
+    except (ValueError, TypeError, IndexError, KeyError):
+        return None
+
+
+def _key(item: DataList, sort: str) -> tuple:
+    return (item.id,) if sort == 'id' else (getattr(item, sort), item.id)
+
+
+def page_items(lst: ListModel, sort: str = 'id', per_page: int = 100, after: str | None = None,
+               before: str | None = None, where=None) -> Page:
+    """One page of ``lst`` entries in ``sort`` order, seeking past a cursor.
+
+    ``after`` pages forward and ``before`` backward; ids break ties so the
+    order is total. ``where`` is an optional SQL filter (see sql_regex).
+    """
+    if sort not in SORT_KEYS:
+        sort = 'id'
+    backward = before is not None and after is None
+    cursor = decode_cursor(before if backward else after, sort)
+    columns = [DataList.id] if sort == 'id' else [getattr(DataList, sort), DataList.id]
+    query = DataList.query.filter(DataList.list_id == lst.id)
+    if where is not None:
+        query = query.filter(where)
+    if cursor is not None:
+        key = DataList.id if sort == 'id' else tuple_(*columns)
+        bound = cursor[0] if sort == 'id' else cursor
+        query = query.filter(key < bound if backward else key > bound)
+    order = [c.desc() if backward else c.asc() for c in columns]
+    items = query.order_by(*order).limit(per_page + 1).all()
+
+    more = len(items) > per_page
+    items = items[:per_page]
+    page = Page(items=items[::-1] if backward else items)
+    # Coming from a cursor means there is something on the other side of it
+    has_next = cursor is not None if backward else more
+    has_prev = more if backward else cursor is not None
+    if page.items:
+        if has_next:
+            page.next_cursor = encode_cursor(_key(page.items[-1], sort))
+        if has_prev:
+            page.prev_cursor = encode_cursor(_key(page.items[0], sort))
+    return page
@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+import re
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Tuple
+
+from ..ipnet import IP_LIST_TYPES, interval_to_cidrs, merge_intervals, parse_entry
+from ..string_match import STRING_LIST_TYPES
+
+
+class ExportInfo(NamedTuple):
+    id: int
+    name: str
+    type: str
+    type_slug: str
+    name_slug: str
+    version: int
+
+
+class Renderer(NamedTuple):
+    fmt: str
+    mimetype: str
+    # DataList columns the renderer consumes, in row order
+    columns: Tuple[str, ...]
+    # List types the format applies to (None = all)
+    list_types: Tuple[str, ...] | None
+    render: Callable[[ExportInfo, Iterable[tuple]], Iterator[str]]
+    # False when the renderer must see every row before emitting output
+    streaming: bool = True
+
+    def supports(self, list_type: str) -> bool:
+        return self.list_types is None or list_type in self.list_types
+
+
+# Export formats keyed by URL extension; each renderer turns a list's rows
+# into text chunks, and the export route caches the result per list version.
+RENDERERS: Dict[str, Renderer] = {}
+
+
+def register_renderer(fmt: str, mimetype: str, columns=('data',), list_types=None, streaming=True):
+    def decorator(func):
+        RENDERERS[fmt] = Renderer(fmt, mimetype, tuple(columns), list_types, func, streaming)
+        return func
+    return decorator
+
+
+def get_renderer(fmt: str) -> Renderer | None:
+    return RENDERERS.get(fmt)
+
+
+@register_renderer('txt', 'text/plain')
+def render_txt(info: ExportInfo, rows: Iterable[tuple]) -> Iterator[str]:
+    yield f"type={info.type_slug}"
+    for (data,) in rows:
+        yield f"\n{data}"
+
+
+@register_renderer('json', 'application/json', columns=('data', 'description', 'date'))
+def render_json(info: ExportInfo, rows: Iterable[tuple]) -> Iterator[str]:
+    head = {'name': info.name, 'type': info.type, 'version': info.version}
+    yield json.dumps(head, ensure_ascii=False)[:-1] + ', "entries": ['
+    sep = ''
+    for data, description, expires in rows:
+        entry = {
+            'data': data,
+            'description': description,
+            'expires': expires.isoformat() if hasattr(expires, 'isoformat') else expires,
+        }
+        yield sep + json.dumps(entry, ensure_ascii=False)
+        sep = ', '
+    yield ']}'
+
+
+@register_renderer('csv', 'text/csv', columns=('data', 'description', 'date'))
+def render_csv(info: ExportInfo, rows: Iterable[tuple]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(['data', 'description', 'expires'])
+    for i, (data, description, expires) in enumerate(rows, 1):
+        writer.writerow([data, description or '', expires.isoformat() if hasattr(expires, 'isoformat') else expires])
+        if i % 1000 == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def _cidrs_by_family(rows: Iterable[tuple]) -> Tuple[list, list, list]:
+    """Split Ip entries into merged IPv4/IPv6 CIDRs plus unparseable values."""
+    intervals, invalid = [], []
+    for (data,) in rows:
+        parsed = parse_entry(data)
+        if parsed is None:
+            invalid.append(data)
+        else:
+            intervals.append(parsed)
+    v4, v6 = [], []
+    for ver, first, last in merge_intervals(intervals):
+        (v4 if ver == 4 else v6).extend(interval_to_cidrs(ver, first, last))
+    return v4, v6, invalid
+
+
+def _set_name(info: ExportInfo, suffix: str, limit: int) -> str:
+    base = re.sub(r'[^A-Za-z0-9_]', '_', info.name_slug)
+    return f"wgui_{base}"[:limit - len(suffix)] + suffix
+
+
+@register_renderer('nft', 'text/plain', list_types=IP_LIST_TYPES, streaming=False)
+def render_nft(info: ExportInfo, rows: Iterable[tuple]) -> Iterator[str]:
+    """nftables interval sets (one per address family), loadable with ``nft -f``."""
+    v4, v6, invalid = _cidrs_by_family(rows)
+    yield f"# {info.name} (version {info.version})\n"
+    for addrs, suffix, addr_type in ((v4, '_v4', 'ipv4_addr'), (v6, '_v6', 'ipv6_addr')):
+        yield f"set {_set_name(info, suffix, 255)} {{\n    type {addr_type}\n    flags interval\n"
+        if addrs:
+            yield "    elements = {\n"
+            for i in range(0, len(addrs), 500):
+                yield "        " + ",\n        ".join(addrs[i:i + 500]) + (",\n" if i + 500 < len(addrs) else "\n")
+            yield "    }\n"
+        yield "}\n"
+    for value in invalid:
+        yield f"# skipped: {value}\n"
+
+
+@register_renderer('ipset', 'text/plain', list_types=IP_LIST_TYPES, streaming=False)
+def render_ipset(info: ExportInfo, rows: Iterable[tuple]) -> Iterator[str]:
+    """``ipset restore`` input with hash:net sets per address family."""
+    v4, v6, invalid = _cidrs_by_family(rows)
+    for addrs, suffix, family in ((v4, '-v4', 'inet'), (v6, '-v6', 'inet6')):
+        name = _set_name(info, suffix, 31)
+        yield f"create {name} hash:net family {family} maxelem {max(65536, len(addrs))} -exist\n"
+        for addr in addrs:
+            yield f"add {name} {addr} -exist\n"
+    for value in invalid:
+        yield f"# skipped: {value}\n"
+
+
+_HOSTNAME = re.compile(r'^(\*\.)?([A-Za-z0-9_](?:[A-Za-z0-9_-]{0,61}[A-Za-z0-9_])?\.)*[A-Za-z0-9_](?:[A-Za-z0-9_-]{0,61}[A-Za-z0-9_])?\.?$')
+
+
+def _hostnames(rows: Iterable[tuple]) -> Iterator[Tuple[str, bool]]:
+    """Yield (hostname, valid) for String entries, normalised to lower case."""
+    for (data,) in rows:
+        host = (data or '').strip().lower().rstrip('.')
+        yield host, bool(host) and len(host) <= 253 and bool(_HOSTNAME.match(host))
+
+
+@register_renderer('hosts', 'text/plain', list_types=STRING_LIST_TYPES)
+def render_hosts(info: ExportInfo, rows: Iterable[tuple]) -> Iterator[str]:
+    yield f"# {info.name} (version {info.version})\n"
+    for host, valid in _hostnames(rows):
+        if valid and not host.startswith('*.'):
+            yield f"0.0.0.0 {host}\n"
+        else:
+            yield f"# skipped: {host}\n"
+
+
+@register_renderer('rpz', 'text/dns', list_types=STRING_LIST_TYPES)
+def render_rpz(info: ExportInfo, rows: Iterable[tuple]) -> Iterator[str]:
+    """Response Policy Zone answering NXDOMAIN for each domain and its subdomains."""
+    yield (
+        "$TTL 300\n"
+        f"@ IN SOA localhost. root.localhost. ({info.version} 3600 600 86400 300)\n"
+        "  IN NS localhost.\n"
+    )
+    for host, valid in _hostnames(rows):
+        if not valid:
+            yield f"; skipped: {host}\n"
+        elif host.startswith('*.'):
+            yield f"{host} CNAME .\n"
+        else:
+            yield f"{host} CNAME .\n*.{host} CNAME .\n"
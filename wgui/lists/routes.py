@@ -7,22 +7,41 @@ from flask import (
     request,
     abort,
     Response,
+    g,
+    current_app,
+    jsonify,
+    send_file,
+    stream_with_context,
 )
-from ..models import DataList, ListModel, AuditLog
+import os
+import re
+from ..models import DataList, ListModel, ListSource, slugify
 from ..extensions import db
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from .forms import AddItemForm, DeleteForm, AddListForm, EditListForm, EditItemForm
+from ..audit import audit
+from ..export_audit import get_export_audit
+from ..list_versions import changes_since
+from ..ipnet import IP_LIST_TYPES
+from ..ip_index import lookup_address
+from ..ip_match import get_ip_matcher
+from ..ip_trie import get_prefix_index
+from ..string_match import MATCH_MODES, get_string_matcher
+from ..sidebar import SIDEBAR_TYPES, get_sidebar_cache
+from ..sql_regex import PatternTooComplex, SearchTimeout, text_filter, time_budget
+from ..export_cache import GZIP_MIN_SIZE, ExportSnapshot, get_export_cache, export_etag
+from ..tasks import remove_feed_schedule, update_feed_schedule
+from ..auth_context import get_auth
+from .forms import AddItemForm, DeleteForm, AddListForm, EditListForm, EditItemForm, ImportItemsForm, BulkActionForm, ListSourceForm
 from .models import AddItemData, AddListData
+from .bulk import bulk_delete, bulk_set_expiry, canonicalize, import_entries, parse_import, select_items
+from .feeds import sync_source
+from .paging import SORT_KEYS, Page, page_items
+from .exports import build_export, export_file_path, export_info, materialize_list, stream_export
+from .renderers import RENDERERS, get_renderer
 
 
 lists_bp = Blueprint('lists', __name__, url_prefix='/lists')
 
 
-def slugify(text: str) -> str:
-    """Simple slugify function used for export URLs."""
-    return text.lower().replace(" ", "-")
-
-
 @lists_bp.app_template_filter("slugify")
 def slugify_filter(s: str) -> str:
     return slugify(s)
@@ -30,10 +49,10 @@ def slugify_filter(s: str) -> str:
 
 @lists_bp.app_context_processor
 def inject_lists():
-    lists_by_type = {'Ip': [], 'Ip Range': [], 'String': []}
-    for lst in ListModel.query.all():
-        lists_by_type.setdefault(lst.type, []).append(lst)
-    return {'lists_by_type': lists_by_type}
+    # The sidebar is only shown to signed-in users
+    if g.get('user_id') is None:
+        return {'lists_by_type': {t: [] for t in SIDEBAR_TYPES}}
+    return {'lists_by_type': get_sidebar_cache().get()}
 
 
 @lists_bp.before_request
@@ -41,12 +60,18 @@ def require_login():
     """Require authentication for all list routes except exports."""
     if request.endpoint == 'lists.export_list':
         return
-    try:
-        verify_jwt_in_request()
-    except Exception:
+    if not get_auth().authenticated:
         return redirect(url_for('auth.login'))
 
 
+def _slug_taken(list_type: str, name: str, exclude_id: int | None = None) -> bool:
+    """True if another list would export under the same /<type>/<name>.txt URL."""
+    q = ListModel.query.filter_by(type_slug=slugify(list_type), name_slug=slugify(name))
+    if exclude_id is not None:
+        q = q.filter(ListModel.id != exclude_id)
+    return q.first() is not None
+
+
 @lists_bp.route('/add', methods=['GET', 'POST'])
 def add_list():
     form = AddListForm()
@@ -58,27 +83,21 @@ def add_list():
         data = AddListData(name=form.name.data, type=form.list_type.data)
         if ListModel.query.filter_by(name=data.name).first():
             flash('List already exists', 'danger')
+        elif _slug_taken(data.type, data.name):
+            flash('Another list already uses this export URL', 'danger')
         else:
             new_list = ListModel(name=data.name, type=data.type)
             db.session.add(new_list)
             db.session.flush()
-            try:
-                verify_jwt_in_request()
-                from flask_jwt_extended import get_jwt_identity
-
-                uid = get_jwt_identity()
-            except Exception:
-                uid = None
-            db.session.add(
-                AuditLog(
-                    user_id=int(uid) if uid else None,
-                    actor_name=(db.session.get(User, int(uid)).username if uid else None),
-                    action='list_added',
-                    target_type='list',
-                    target_id=new_list.id,
-                    list_id=new_list.id,
-                    details=f"name={new_list.name}; type={new_list.type}",
-                )
+            uid = get_auth().user_id
+            audit(
+                user_id=uid,
+                actor_name=get_auth().username,
+                action='list_added',
+                target_type='list',
+                target_id=new_list.id,
+                list_id=new_list.id,
+                details=f"name={new_list.name}; type={new_list.type}",
             )
             db.session.commit()
             flash('List created', 'success')
@@ -101,11 +120,13 @@ def edit_list(list_id: int):
         if exists:
             flash('Another list with this name already exists', 'danger')
             return redirect(url_for('lists.edit_list', list_id=list_id))
+        if _slug_taken(lst.type, new_name, exclude_id=list_id):
+            flash('Another list already uses this export URL', 'danger')
+            return redirect(url_for('lists.edit_list', list_id=list_id))
         old_name = lst.name
         if new_name != old_name:
+            # Items reference the list by id, so a rename touches one row
             lst.name = new_name
-            # Update items category to match new list name
-            DataList.query.filter_by(category=old_name).update({DataList.category: new_name})
             db.session.commit()
             flash('List renamed', 'success')
         else:
@@ -126,29 +147,41 @@ def list_items(list_id: int):
     if not lst:
         abort(404)
     search = request.args.get('q', '').strip()
-    items = DataList.query.filter_by(category=lst.name).all()
-    if search:
-        import re
-        try:
-            regex = re.compile(search)
-            items = [
-                i
-                for i in items
-                if regex.search(i.data) or (i.description and regex.search(i.description))
-            ]
-        except re.error:
-            items = [
-                i
-                for i in items
-                if (search in i.data) or (i.description and search in i.description)
-            ]
+    sort = request.args.get('sort', 'id')
+    if sort not in SORT_KEYS:
+        sort = 'id'
+    default_size = current_app.config.get('LIST_PAGE_SIZE', 100)
+    per_page = request.args.get('per_page', default_size, type=int) or default_size
+    per_page = max(1, min(per_page, current_app.config.get('LIST_PAGE_SIZE_MAX', 1000)))
+    page = Page()
+    try:
+        where = text_filter([DataList.data, DataList.description], search) if search else None
+        with time_budget(current_app.config.get('SEARCH_TIMEOUT_MS') if search else None):
+            page = page_items(
+                lst,
+                sort=sort,
+                per_page=per_page,
+                after=request.args.get('after'),
+                before=request.args.get('before'),
+                where=where,
+            )
+    except PatternTooComplex:
+        flash('Search pattern is too complex', 'warning')
+    except SearchTimeout:
+        flash('Search took too long, try a more specific pattern', 'warning')
     delete_form = DeleteForm()
     return render_template(
         'list_items.html',
+        bulk_form=BulkActionForm(),
         list=lst,
-        items=items,
+        items=page.items,
+        page=page,
+        sort=sort,
+        per_page=per_page,
+        sort_keys=SORT_KEYS,
         delete_form=delete_form,
         search=search,
+        export_formats=[r.fmt for r in RENDERERS.values() if r.supports(lst.type)],
     )
 
 
@@ -159,41 +192,39 @@ def add_item(list_id: int):
         abort(404)
     form = AddItemForm()
     if form.validate_on_submit():
+        # stored in the same canonical form imports use, so duplicates are found
+        value = canonicalize(lst.type, form.data.data)
+        if value is None:
+            flash(f'Not a valid {lst.type} entry', 'danger')
+            return render_template('add_item.html', form=form, list=lst)
         data = AddItemData(
-            data=form.data.data,
+            data=value,
             description=form.description.data,
             date=form.date.data,
         )
-        exists = DataList.query.filter_by(category=lst.name, data=data.data).first()
+        exists = DataList.query.filter_by(list_id=lst.id, data=data.data).first()
         if exists:
             flash('Item already exists', 'danger')
         else:
             # Determine the current user from JWT
-            user_id = None
-            try:
-                verify_jwt_in_request()
-                user_id = get_jwt_identity()
-            except Exception:
-                user_id = None
+            user_id = get_auth().user_id
             item = DataList(
-                category=lst.name,
+                list_id=lst.id,
                 data=data.data,
                 description=data.description,
                 date=data.date,
-                creator_id=int(user_id) if user_id else None,
+                creator_id=user_id,
             )
             db.session.add(item)
             db.session.flush()
-            db.session.add(
-                AuditLog(
-                    user_id=int(user_id) if user_id else None,
-                    actor_name=(db.session.get(User, int(user_id)).username if user_id else None),
-                    action='item_added',
-                    target_type='item',
-                    target_id=item.id,
-                    list_id=lst.id,
-                    details=f"category={lst.name}; data={item.data}",
-                )
+            audit(
+                user_id=user_id,
+                actor_name=get_auth().username,
+                action='item_added',
+                target_type='item',
+                target_id=item.id,
+                list_id=lst.id,
+                details=f"category={lst.name}; data={item.data}",
             )
             db.session.commit()
             flash('Item added', 'success')
@@ -201,6 +232,196 @@ def add_item(list_id: int):
     return render_template('add_item.html', form=form, list=lst)
 
 
+@lists_bp.route('/<int:list_id>/import', methods=['GET', 'POST'])
+def import_items(list_id: int):
+    """Bulk add entries from an uploaded text or CSV file."""
+    lst = db.session.get(ListModel, list_id)
+    if not lst:
+        abort(404)
+    form = ImportItemsForm()
+    if form.validate_on_submit():
+        upload = form.file.data
+        filename = upload.filename or ''
+        rows = parse_import(
+            upload.stream,
+            form.date.data,
+            description=form.description.data or None,
+            csv_format=filename.lower().endswith('.csv'),
+        )
+        try:
+            result = import_entries(lst, rows, user_id=get_auth().user_id, source=filename,
+                                    actor_name=get_auth().username)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            flash('Import failed', 'danger')
+            return redirect(url_for('lists.import_items', list_id=list_id))
+        flash(
+            f'Imported {result.added} entries '
+            f'({result.duplicates} duplicates, {result.invalid} invalid skipped)',
+            'success' if result.added else 'info',
+        )
+        return redirect(url_for('lists.list_items', list_id=list_id))
+    for field_errors in form.errors.values():
+        for error in field_errors:
+            flash(error, 'danger')
+    return render_template('import_items.html', form=form, list=lst)
+
+
+@lists_bp.route('/<int:list_id>/bulk', methods=['POST'])
+def bulk_items(list_id: int):
+    """Delete entries or set their expiry in one set-based operation."""
+    lst = db.session.get(ListModel, list_id)
+    if not lst:
+        abort(404)
+    form = BulkActionForm()
+    back = redirect(url_for('lists.list_items', list_id=list_id))
+    if not form.validate_on_submit():
+        for field_errors in form.errors.values():
+            for error in field_errors:
+                flash(error, 'danger')
+        return back
+    if form.action.data == 'extend' and not form.new_date.data:
+        flash('New expiry date is required', 'danger')
+        return back
+    try:
+        with time_budget(current_app.config.get('SEARCH_TIMEOUT_MS')):
+            rows = _bulk_rows(lst, form)
+    except re.error:
+        flash('Invalid regex', 'danger')
+        return back
+    except PatternTooComplex:
+        flash('Regex is too complex', 'danger')
+        return back
+    except SearchTimeout:
+        flash('Regex took too long, try a more specific pattern', 'danger')
+        return back
+    if rows is None:
+        return back
+    user_id, actor = get_auth().user_id, get_auth().username
+    if form.action.data == 'delete':
+        count = bulk_delete(lst, rows, user_id=user_id, actor_name=actor)
+        message = f'Deleted {count} entries'
+    else:
+        count = bulk_set_expiry(lst, rows, form.new_date.data, user_id=user_id, actor_name=actor)
+        message = f'Updated expiry of {count} entries'
+    db.session.commit()
+    flash(message, 'success' if count else 'info')
+    return back
+
+
+def _bulk_rows(lst: ListModel, form: BulkActionForm) -> list | None:
+    """Rows picked by the bulk form's scope, or None (after flashing) if it is incomplete."""
+    if form.scope.data == 'selected':
+        ids = request.form.getlist('ids', type=int)
+        if not ids:
+            flash('No entries selected', 'warning')
+            return None
+        return select_items(lst, ids=ids)
+    if form.scope.data == 'regex':
+        if not form.pattern.data:
+            flash('Regex is required', 'danger')
+            return None
+        return select_items(lst, pattern=form.pattern.data)
+    if not form.date_from.data and not form.date_to.data:
+        flash('Expiry window is required', 'danger')
+        return None
+    return select_items(lst, date_from=form.date_from.data, date_to=form.date_to.data)
+
+
+@lists_bp.route('/<int:list_id>/source', methods=['GET', 'POST'])
+def list_source(list_id: int):
+    """Configure the feed (HTTP URL or local file) the list is synchronized from."""
+    lst = db.session.get(ListModel, list_id)
+    if not lst:
+        abort(404)
+    source = lst.source
+    form = ListSourceForm(obj=source)
+    # The server fetches the URL (or reads the file) and publishes every
+    # line through the public export, so only admins may choose it
+    if request.method == 'POST' and not get_auth().is_admin:
+        flash('Only admins can configure feed sources', 'danger')
+        return render_template('list_source.html', form=form, list=lst, source=source, delete_form=DeleteForm())
+    if form.validate_on_submit():
+        url = form.url.data.strip()
+        if source is None:
+            source = ListSource(list=lst)
+            db.session.add(source)
+        if source.url != url or source.csv_format != form.csv_format.data:
+            # A different feed must be fetched in full on the next sync
+            source.etag = source.last_modified = None
+        source.url = url
+        source.csv_format = form.csv_format.data
+        source.interval_minutes = form.interval_minutes.data
+        source.expire_days = form.expire_days.data
+        source.enabled = form.enabled.data
+        audit(
+            user_id=get_auth().user_id,
+            actor_name=get_auth().username,
+            action='list_edited',
+            target_type='list',
+            target_id=lst.id,
+            list_id=lst.id,
+            details=f"source={url}; every={source.interval_minutes}m; enabled={source.enabled}"[:255],
+        )
+        db.session.commit()
+        update_feed_schedule(current_app._get_current_object(), source)
+        flash('Source saved', 'success')
+        return redirect(url_for('lists.list_source', list_id=list_id))
+    for field_errors in form.errors.values():
+        for error in field_errors:
+            flash(error, 'danger')
+    return render_template('list_source.html', form=form, list=lst, source=source, delete_form=DeleteForm())
+
+
+@lists_bp.route('/<int:list_id>/source/sync', methods=['POST'])
+def sync_list_source(list_id: int):
+    """Synchronize the list with its feed now."""
+    form = DeleteForm()
+    lst = db.session.get(ListModel, list_id)
+    if not lst or lst.source is None:
+        abort(404)
+    if form.validate_on_submit():
+        source = lst.source
+        try:
+            result = sync_source(source, user_id=get_auth().user_id)
+        except Exception as exc:
+            db.session.rollback()
+            source.last_status = f"error: {exc}"[:255]
+            db.session.commit()
+            flash(f'Sync failed: {exc}', 'danger')
+        else:
+            flash(f'Sync finished: {result.summary()}', 'success' if result.status == 'updated' else 'info')
+    return redirect(url_for('lists.list_source', list_id=list_id))
+
+
+@lists_bp.route('/<int:list_id>/source/delete', methods=['POST'])
+def delete_list_source(list_id: int):
+    """Stop synchronizing the list; its entries are kept."""
+    form = DeleteForm()
+    lst = db.session.get(ListModel, list_id)
+    if not lst or lst.source is None:
+        abort(404)
+    if not get_auth().is_admin:
+        flash('Only admins can configure feed sources', 'danger')
+        return redirect(url_for('lists.list_source', list_id=list_id))
+    if form.validate_on_submit():
+        audit(
+            user_id=get_auth().user_id,
+            actor_name=get_auth().username,
+            action='list_edited',
+            target_type='list',
+            target_id=lst.id,
+            list_id=lst.id,
+            details=f"source removed: {lst.source.url}"[:255],
+        )
+        db.session.delete(lst.source)
+        db.session.commit()
+        remove_feed_schedule(list_id)
+        flash('Source removed', 'info')
+    return redirect(url_for('lists.list_items', list_id=list_id))
+
+
 @lists_bp.route('/delete/<int:item_id>', methods=['POST'])
 def delete_item(item_id: int):
     form = DeleteForm()
@@ -208,33 +429,23 @@ def delete_item(item_id: int):
         item = db.session.get(DataList, item_id)
         if not item:
             abort(404)
-        category = item.category
+        lst = item.list
+        category = lst.name
         # Audit before deletion to keep target_id
-        try:
-            verify_jwt_in_request()
-            from flask_jwt_extended import get_jwt_identity
-
-            uid = get_jwt_identity()
-        except Exception:
-            uid = None
-        db.session.add(
-            AuditLog(
-                user_id=int(uid) if uid else None,
-                actor_name=(db.session.get(User, int(uid)).username if uid else None),
-                action='item_deleted',
-                target_type='item',
-                target_id=item.id,
-                list_id=ListModel.query.filter_by(name=category).first().id if ListModel.query.filter_by(name=category).first() else None,
-                details=f"category={category}; data={item.data}",
-            )
+        uid = get_auth().user_id
+        audit(
+            user_id=uid,
+            actor_name=get_auth().username,
+            action='item_deleted',
+            target_type='item',
+            target_id=item.id,
+            list_id=lst.id,
+            details=f"category={category}; data={item.data}",
         )
         db.session.delete(item)
         db.session.commit()
         flash('Item deleted', 'info')
-        lst = ListModel.query.filter_by(name=category).first()
-        if lst:
-            return redirect(url_for('lists.list_items', list_id=lst.id))
-        return redirect(url_for('auth.index'))
+        return redirect(url_for('lists.list_items', list_id=lst.id))
     return redirect(url_for('auth.index'))
 
 
@@ -247,31 +458,24 @@ def delete_list(list_id: int):
         if not lst:
             abort(404)
         # Audit the deletion
-        try:
-            verify_jwt_in_request()
-            from flask_jwt_extended import get_jwt_identity
-
-            uid = get_jwt_identity()
-        except Exception:
-            uid = None
-        db.session.add(
-            AuditLog(
-                user_id=int(uid) if uid else None,
-                actor_name=(db.session.get(User, int(uid)).username if uid else None),
-                action='list_deleted',
-                target_type='list',
-                target_id=lst.id,
-                list_id=lst.id,
-                details=f"name={lst.name}; type={lst.type}",
-            )
+        uid = get_auth().user_id
+        audit(
+            user_id=uid,
+            actor_name=get_auth().username,
+            action='list_deleted',
+            target_type='list',
+            target_id=lst.id,
+            list_id=lst.id,
+            details=f"name={lst.name}; type={lst.type}",
         )
         # Delete all items in this list
-        items = DataList.query.filter_by(category=lst.name).all()
+        items = DataList.query.filter_by(list_id=lst.id).all()
         for item in items:
             db.session.delete(item)
-        # Delete the list itself
+        # Delete the list itself (and its feed source)
         db.session.delete(lst)
         db.session.commit()
+        remove_feed_schedule(list_id)
         flash('List deleted', 'info')
         return redirect(url_for('auth.index'))
     return redirect(url_for('auth.index'))
@@ -282,7 +486,7 @@ def edit_item(item_id: int):
     item = db.session.get(DataList, item_id)
     if not item:
         abort(404)
-    lst = ListModel.query.filter_by(name=item.category).first()
+    lst = item.list
     form = EditItemForm()
     if form.validate_on_submit():
         new_data = form.data.data.strip()
@@ -291,10 +495,14 @@ def edit_item(item_id: int):
         if not new_data:
             flash('Data is required', 'danger')
             return redirect(url_for('lists.edit_item', item_id=item_id))
-        # enforce uniqueness per (category, data)
+        new_data = canonicalize(lst.type, new_data)
+        if new_data is None:
+            flash(f'Not a valid {lst.type} entry', 'danger')
+            return redirect(url_for('lists.edit_item', item_id=item_id))
+        # enforce uniqueness per (list, data)
         exists = (
             DataList.query
-            .filter(DataList.category == item.category, DataList.data == new_data, DataList.id != item.id)
+            .filter(DataList.list_id == item.list_id, DataList.data == new_data, DataList.id != item.id)
             .first()
         )
         if exists:
@@ -319,43 +527,237 @@ def edit_item(item_id: int):
     return render_template('edit_item.html', form=form, list=lst, item=item)
 
 
-@lists_bp.route('/<list_type>/<list_name>.txt')
-def export_list(list_type: str, list_name: str):
-    """Export a list as plain text using type and name in the URL."""
-    def matches(lst: ListModel) -> bool:
-        return slugify(lst.type) == list_type and slugify(lst.name) == list_name
+@lists_bp.route('/lookup')
+def lookup_ip():
+    """JSON list of Ip/Ip Range entries covering ``?ip=<address>``.
 
-    lst = next((l for l in ListModel.query.all() if matches(l)), None)
-    if not lst:
+    ``longest`` holds the most specific covering prefix and the entries
+    that produce it (several when lists overlap exactly).
+    """
+    address = request.args.get('ip', '')
+    items = lookup_address(address)
+    if items is None:
+        return jsonify({'error': 'invalid IP address'}), 400
+    longest = None
+    best = get_prefix_index().longest_match(address)
+    if best is not None:
+        prefix, entries = best
+        keys = set(entries)
+        longest = {
+            'prefix': prefix,
+            'entries': [_lookup_entry(item) for item in items if (item.list_id, item.data) in keys],
+        }
+    return jsonify({
+        'ip': address.strip(),
+        'matches': [_lookup_entry(item) for item in items],
+        'longest': longest,
+    })
+
+
+def _lookup_entry(item: DataList) -> dict:
+    return {
+        'list_id': item.list_id,
+        'list': item.list.name,
+        'type': item.list.type,
+        'item_id': item.id,
+        'data': item.data,
+        'description': item.description,
+        'expires': item.date.isoformat(),
+    }
+
+
+@lists_bp.route('/match', methods=['POST'])
+def match_ips():
+    """Bulk membership check against all Ip/Ip Range lists.
+
+    Accepts a JSON array (or ``{"addresses": [...]}``) or newline separated
+    text and returns the list names covering each matching address.
+    """
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get('addresses')
+        if not isinstance(payload, list) or not all(isinstance(a, str) for a in payload):
+            return jsonify({'error': 'expected a list of addresses'}), 400
+        addresses = [a.strip() for a in payload]
+    else:
+        addresses = request.get_data(as_text=True).split()
+    addresses = [a for a in addresses if a]
+    max_batch = int(current_app.config.get('MATCH_MAX_BATCH', 200000))
+    if len(addresses) > max_batch:
+        return jsonify({'error': f'at most {max_batch} addresses per request'}), 413
+    matches, invalid = get_ip_matcher().match(addresses)
+    return jsonify({'checked': len(addresses), 'matches': matches, 'invalid': invalid})
+
+
+@lists_bp.route('/match/strings', methods=['POST'])
+def match_strings():
+    """Bulk match of hostnames/URLs or text lines against all String lists.
+
+    ``mode=domain`` (default) matches entries as domain suffixes of each
+    input's hostname; ``mode=substring`` finds entries anywhere in the
+    input. Accepts the same bodies as ``/match``; JSON may also carry
+    ``mode``.
+    """
+    mode = request.args.get('mode', 'domain')
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            mode = payload.get('mode', mode)
+            payload = payload.get('items')
+        if not isinstance(payload, list) or not all(isinstance(t, str) for t in payload):
+            return jsonify({'error': 'expected a list of strings'}), 400
+        texts = payload
+    else:
+        texts = request.get_data(as_text=True).splitlines()
+    texts = [t for t in texts if t.strip()]
+    if mode not in MATCH_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MATCH_MODES)}"}), 400
+    max_batch = int(current_app.config.get('MATCH_MAX_BATCH', 200000))
+    if len(texts) > max_batch:
+        return jsonify({'error': f'at most {max_batch} items per request'}), 413
+    matches = get_string_matcher().match(texts, mode)
+    return jsonify({
+        'checked': len(texts),
+        'mode': mode,
+        'matches': {
+            text: [{'list': name, 'data': data} for name, data in found]
+            for text, found in matches.items()
+        },
+    })
+
+
+@lists_bp.route('/<list_type>/<list_name>.<fmt>')
+def export_list(list_type: str, list_name: str, fmt: str):
+    """Export a list using type, name and format extension in the URL.
+
+    Formats come from the renderer registry (txt, json, csv, nft, ipset,
+    hosts, rpz); each is only offered for the list types it fits.
+    For txt, ``?since=<version>`` returns only the entries added
+    (``+entry``) or removed (``-entry``) after that version, falling back
+    to a full export when the change journal no longer covers it, and
+    ``?mode=cidr`` collapses Ip/Ip Range entries into the minimal set of
+    CIDR blocks. Clients sending ``Accept-Encoding: gzip`` get a
+    precompressed body. Lists with at least EXPORT_STREAM_MIN_ROWS
+    entries (or ``?stream=1``) are streamed in batches instead of being
+    rendered into the cache. With EXPORT_SERVE_MODE ``accel``/``sendfile``
+    plain exports are served from the materialized file in
+    EXPORT_MATERIALIZE_DIR.
+    """
+    renderer = get_renderer(fmt)
+    if renderer is None:
         abort(404)
-    items = DataList.query.filter_by(category=lst.name).all()
-    header = f"type={slugify(lst.type)}"
-    lines = [header] + [item.data for item in items]
-    content = "\n".join(lines)
-    # Audit export (optional auth)
-    try:
-        verify_jwt_in_request(optional=True)
-        uid = get_jwt_identity()
-    except Exception:
-        uid = None
-    try:
-        from ..models import AuditLog
-        db.session.add(
-            AuditLog(
-                user_id=int(uid) if uid else None,
-                actor_name=(db.session.get(User, int(uid)).username if uid else None),
-                action='list_exported',
-                target_type='list',
-                target_id=lst.id,
-                list_id=lst.id,
-                details=f"name={lst.name}; type={lst.type}; ip={request.remote_addr}",
-            )
+    lst = ListModel.query.filter_by(type_slug=list_type, name_slug=list_name).first()
+    if not lst or not renderer.supports(lst.type):
+        abort(404)
+    since = request.args.get('since', type=int)
+    if 'since' in request.args and (since is None or fmt != 'txt'):
+        abort(400)
+    list_id, version, name = lst.id, lst.version, lst.name
+    _audit_export(lst)
+    if since is not None:
+        delta = changes_since(lst, since)
+        if delta is not None:
+            lines = [f"type={list_type}", f"version={version}"]
+            lines += [f"{op}{data}" for op, data in delta]
+            resp = Response("\n".join(lines), mimetype="text/plain")
+            resp.headers['X-List-Version'] = str(version)
+            resp.headers['X-Export-Mode'] = 'delta'
+            return resp
+    mode = request.args.get('mode', 'txt')
+    if mode not in ('txt', 'cidr') or (mode == 'cidr' and (fmt != 'txt' or lst.type not in IP_LIST_TYPES)):
+        abort(400)
+    variant = 'cidr' if mode == 'cidr' else fmt
+    encoding = 'gzip' if request.accept_encodings.quality('gzip') > 0 else None
+    serve_mode = current_app.config.get('EXPORT_SERVE_MODE', 'app')
+    if variant == 'txt' and serve_mode in ('accel', 'sendfile') and current_app.config.get('EXPORT_MATERIALIZE_DIR'):
+        return _serve_export_file(lst, serve_mode, encoding)
+    etag = export_etag(list_id, version, variant, encoding)
+    # Bodies under GZIP_MIN_SIZE go out uncompressed with the identity tag
+    tags = [etag, export_etag(list_id, version, variant)] if encoding else [etag]
+    matched = next((tag for tag in tags if request.if_none_match.contains(tag)), None)
+    if matched:
+        resp = Response(status=304)
+        resp.set_etag(matched)
+        resp.vary.add('Accept-Encoding')
+        return resp
+    snap = get_export_cache().get(list_id, version, variant)
+    cache_state = 'hit'
+    if snap is None and variant != 'cidr' and renderer.streaming and _should_stream(lst):
+        resp = Response(
+            stream_with_context(stream_export(export_info(lst), fmt, encoding)),
+            mimetype=renderer.mimetype,
+            headers={"Content-Disposition": f"attachment; filename={name}.{fmt}"},
         )
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
-    return Response(
-        content,
-        mimetype="text/plain",
-        headers={"Content-Disposition": f"attachment; filename={lst.name}.txt"},
+        if encoding:
+            resp.headers['Content-Encoding'] = encoding
+        resp.vary.add('Accept-Encoding')
+        resp.set_etag(etag)
+        resp.headers['X-Export-Cache'] = 'stream'
+        resp.headers['X-List-Version'] = str(version)
+        resp.headers['X-Export-Mode'] = 'full'
+        return resp
+    if snap is None:
+        cache_state = 'miss'
+        body = build_export(db.session, export_info(lst), variant)
+        snap = get_export_cache().put(ExportSnapshot(list_id, version, variant, body))
+    if encoding and len(snap.body) < GZIP_MIN_SIZE:
+        encoding = None
+    resp = Response(
+        snap.encoded(encoding) if encoding else snap.body,
+        mimetype=renderer.mimetype,
+        headers={"Content-Disposition": f"attachment; filename={name}.{fmt}"},
+    )
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    resp.vary.add('Accept-Encoding')
+    resp.set_etag(export_etag(list_id, version, variant, encoding))
+    resp.headers['X-Export-Cache'] = cache_state
+    resp.headers['X-List-Version'] = str(version)
+    resp.headers['X-Export-Mode'] = 'full'
+    return resp
+
+
+def _should_stream(lst: ListModel) -> bool:
+    """Stream instead of caching when asked to or when the list is large.
+
+    Streamed bodies are not kept in the snapshot cache, so every download
+    of a large list reads it again (a 304 still needs no read); materialized
+    files avoid that for plain exports.
+    """
+    if request.args.get('stream') == '1':
+        return True
+    return lst.item_count >= int(current_app.config.get('EXPORT_STREAM_MIN_ROWS', 50000))
+
+
+def _serve_export_file(lst: ListModel, serve_mode: str, encoding: str | None) -> Response:
+    """Hand a materialized export to nginx (X-Accel-Redirect) or the WSGI file wrapper."""
+    directory = current_app.config['EXPORT_MATERIALIZE_DIR']
+    path = export_file_path(directory, lst.type_slug, lst.name_slug)
+    if not os.path.isfile(path):
+        materialize_list(current_app, db.session, lst.id)
+    filename = f"{lst.name}.txt"
+    if serve_mode == 'accel':
+        prefix = current_app.config.get('EXPORT_ACCEL_PREFIX', '/_wgui_exports').rstrip('/')
+        resp = Response(b'', mimetype='text/plain')
+        resp.headers['X-Accel-Redirect'] = f"{prefix}/{lst.type_slug}/{lst.name_slug}.txt"
+        resp.headers['Content-Disposition'] = f"attachment; filename={filename}"
+        return resp
+    if encoding and os.path.isfile(path + '.gz'):
+        resp = send_file(path + '.gz', mimetype='text/plain', as_attachment=True, download_name=filename)
+        resp.headers['Content-Encoding'] = encoding
+    else:
+        resp = send_file(path, mimetype='text/plain', as_attachment=True, download_name=filename)
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+
+def _audit_export(lst: ListModel) -> None:
+    """Queue a list_exported audit hit; rows are coalesced and written in bulk."""
+    get_export_audit().record(
+        lst.id,
+        lst.name,
+        lst.type,
+        request.remote_addr,
+        getattr(g, 'user_id', None),
     )
@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for
 from ..i18n import _
-from flask_jwt_extended import verify_jwt_in_request
+from ..auth_context import get_auth
 from ..models import AuditLog, User, ListModel
 from sqlalchemy import or_, and_, cast, String
 from datetime import datetime, timedelta
@@ -12,6 +12,7 @@ logs_bp = Blueprint('logs', __name__, url_prefix='/logs')
 ACTIONS = [
     'list_added', 'list_deleted', 'list_edited',
     'item_added', 'item_deleted', 'item_edited',
+    'items_imported', 'feed_synced',
     # admin/user and settings actions
     'user_added', 'user_deleted',
     'email_settings_updated', 'schedule_updated', 'backup_schedule_updated', 'audit_schedule_updated', 'audit_retention_updated',
@@ -38,6 +39,8 @@ def humanize_action(value: str) -> str:
         'item_added': 'item added',
         'item_deleted': 'item deleted',
         'item_edited': 'item edited',
+        'items_imported': 'items imported',
+        'feed_synced': 'feed synced',
         'user_added': 'user added',
         'user_deleted': 'user deleted',
         'email_settings_updated': 'email settings updated',
@@ -132,9 +135,7 @@ def target_display(row) -> str:
 
 @logs_bp.before_request
 def require_login():
-    try:
-        verify_jwt_in_request()
-    except Exception:
+    if not get_auth().authenticated:
         return redirect(url_for('auth.login'))
 
 
@@ -1,5 +1,11 @@
 from .extensions import db
 from sqlalchemy import func
+from sqlalchemy.orm import validates
+
+
+def slugify(text: str) -> str:
+    """Simple slugify function used for export URLs."""
+    return text.lower().replace(" ", "-")
 
 
 class User(db.Model):
@@ -18,26 +24,111 @@ class ListModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     type = db.Column(db.String(20), nullable=False)
+    # Bumped on every change to the list or its items (see list_versions)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Journal entries up to this version have been compacted away
+    journal_floor = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Number of entries, kept up to date by list_versions and the bulk helpers
+    item_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Persisted export URL parts, kept in sync with type/name
+    type_slug = db.Column(db.String(20), nullable=False)
+    name_slug = db.Column(db.String(50), nullable=False)
+    __table_args__ = (
+        db.UniqueConstraint('type_slug', 'name_slug', name='uix_list_slug'),
+    )
+
+    @validates('name')
+    def _sync_name_slug(self, key, value):
+        self.name_slug = slugify(value)
+        return value
+
+    @validates('type')
+    def _sync_type_slug(self, key, value):
+        self.type_slug = slugify(value)
+        return value
 
     def __repr__(self) -> str:
         return f"<List {self.name}>"
 
 class DataList(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    category = db.Column(db.String(20), nullable=False)
+    list_id = db.Column(db.Integer, db.ForeignKey('list_model.id'), nullable=False)
     data = db.Column(db.String(255), nullable=False)
     description = db.Column(db.String(255))
     date = db.Column(db.Date, nullable=False)
     creator_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     creator = db.relationship('User', lazy='joined')
+    list = db.relationship('ListModel', lazy='joined')
+    # Address range covered by Ip/Ip Range entries (see ipnet.address_key)
+    ip_start = db.Column(db.LargeBinary(16))
+    ip_end = db.Column(db.LargeBinary(16))
     __table_args__ = (
-        db.UniqueConstraint('category', 'data', name='uix_category_data'),
+        # Leading list_id doubles as the index for per-list lookups
+        db.UniqueConstraint('list_id', 'data', name='uix_list_data'),
+        db.Index('ix_data_list_ip_range', 'ip_start', 'ip_end'),
+        # Keyset pagination of list pages by id and by expiry
+        db.Index('ix_data_list_list_id_id', 'list_id', 'id'),
+        db.Index('ix_data_list_list_id_date', 'list_id', 'date', 'id'),
     )
 
+    @property
+    def category(self) -> str | None:
+        """Name of the owning list."""
+        return self.list.name if self.list is not None else None
+
     def __repr__(self) -> str:
         return f"<DataList {self.category} {self.data}>"
 
 
+class ListChange(db.Model):
+    """Journal of entry additions/removals, used for delta exports."""
+    id = db.Column(db.Integer, primary_key=True)
+    list_id = db.Column(db.Integer, db.ForeignKey('list_model.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(1), nullable=False)  # '+' or '-'
+    data = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    __table_args__ = (
+        db.Index('ix_list_change_list_version', 'list_id', 'version'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ListChange {self.list_id}@{self.version} {self.op}{self.data}>"
+
+
+class ListSource(db.Model):
+    """Upstream feed (HTTP URL or local file) a list is kept in sync with."""
+    id = db.Column(db.Integer, primary_key=True)
+    list_id = db.Column(db.Integer, db.ForeignKey('list_model.id'), unique=True, nullable=False)
+    list = db.relationship(
+        'ListModel',
+        backref=db.backref('source', uselist=False, cascade='all, delete-orphan'),
+    )
+    url = db.Column(db.String(500), nullable=False)
+    csv_format = db.Column(db.Boolean, nullable=False, default=False)
+    interval_minutes = db.Column(db.Integer, nullable=False, default=60)
+    # Expiry given to entries added from the feed, in days from the sync
+    expire_days = db.Column(db.Integer, nullable=False, default=365)
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
+    # Validators from the last applied fetch, sent back to skip unchanged feeds
+    etag = db.Column(db.String(255))
+    last_modified = db.Column(db.String(64))
+    last_sync_at = db.Column(db.DateTime)
+    last_status = db.Column(db.String(255))
+
+    def __repr__(self) -> str:
+        return f"<ListSource {self.list_id} {self.url}>"
+
+
+class VersionCounter(db.Model):
+    # Named, monotonically increasing counters shared by all workers
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<VersionCounter {self.name}={self.value}>"
+
+
 class EmailSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     from_email = db.Column(db.String(120), nullable=False)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import List
+
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, func, inspect, or_, text
+
+from .extensions import db
+from .models import DataList
+from .sql_regex import SearchTimeout, time_budget
+
+FTS_TABLE = 'data_list_fts'
+
+# FTS5's trigram tokenizer (substring matching) needs SQLite 3.34+
+FTS_AVAILABLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+# Shorter queries have no trigram to look up and fall back to a scan
+MIN_INDEXED_QUERY = 3
+
+# Markers put around matches by SQLite, swapped for <mark> after escaping
+_OPEN, _CLOSE = '\x02', '\x03'
+
+SQLITE_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "data, description, content='data_list', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS data_list_fts_ai AFTER INSERT ON data_list BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, data, description) VALUES (new.id, new.data, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS data_list_fts_ad AFTER DELETE ON data_list BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, data, description) "
+    f"VALUES ('delete', old.id, old.data, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS data_list_fts_au AFTER UPDATE OF data, description ON data_list BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, data, description) "
+    f"VALUES ('delete', old.id, old.data, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, data, description) VALUES (new.id, new.data, new.description); END",
+]
+
+POSTGRES_TRGM_DDL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ix_data_list_data_trgm ON data_list USING gin (data gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_data_list_description_trgm ON data_list USING gin (description gin_trgm_ops)',
+]
+
+
+def _sqlite_fts(ddl, target, bind, **kw) -> bool:
+    return bind.dialect.name == 'sqlite' and FTS_AVAILABLE
+
+
+# Databases built with create_all (tests, in-memory) get the same index
+# as migrated ones; triggers keep it in step with bulk statements too
+for _stmt in SQLITE_FTS_DDL:
+    event.listen(DataList.__table__, 'after_create', DDL(_stmt).execute_if(callable_=_sqlite_fts))
+for _stmt in POSTGRES_TRGM_DDL:
+    event.listen(DataList.__table__, 'after_create', DDL(_stmt).execute_if(dialect='postgresql'))
+event.listen(
+    DataList.__table__, 'before_drop',
+    DDL(f'DROP TABLE IF EXISTS {FTS_TABLE}').execute_if(callable_=_sqlite_fts),
+)
+
+
+@dataclass
+class SearchHit:
+    item: DataList
+    data: Markup
+    description: Markup | None
+
+
+@dataclass
+class SearchResults:
+    hits: List[SearchHit]
+    has_more: bool
+    # False when results are in index order rather than by relevance
+    ranked: bool
+
+
+def _mark(value: str | None) -> Markup | None:
+    """Escape SQLite highlight() output and turn its markers into <mark> tags."""
+    if value is None:
+        return None
+    return Markup(str(escape(value)).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>'))
+
+
+def highlight(value: str | None, q: str) -> Markup | None:
+    """``value`` with case-insensitive occurrences of ``q`` wrapped in <mark>."""
+    if value is None:
+        return None
+    return _mark(re.sub(re.escape(q), lambda m: f'{_OPEN}{m.group(0)}{_CLOSE}', value, flags=re.IGNORECASE))
+
+
+def _fts_ready(bind) -> bool:
+    return FTS_AVAILABLE and bind.dialect.name == 'sqlite' and inspect(bind).has_table(FTS_TABLE)
+
+
+def _load(ids: List[int]) -> dict:
+    return {item.id: item for item in DataList.query.filter(DataList.id.in_(ids))} if ids else {}
+
+
+def _fts_page(q: str, per_page: int, offset: int, ranked: bool) -> list:
+    order = f'ORDER BY bm25({FTS_TABLE}, 2.0, 1.0) ' if ranked else ''
+    return db.session.execute(
+        text(
+            f"SELECT rowid, highlight({FTS_TABLE}, 0, :o, :c), "
+            f"snippet({FTS_TABLE}, 1, :o, :c, '…', 64) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q {order}LIMIT :n OFFSET :off"
+        ),
+        {'o': _OPEN, 'c': _CLOSE, 'q': '"' + q.replace('"', '""') + '"', 'n': per_page + 1, 'off': offset},
+    ).all()
+
+
+def search_items(q: str, page: int = 1, per_page: int = 50, rank_budget_ms: int | None = None) -> SearchResults:
+    """Entries of any list whose data or description contains ``q``, with matches highlighted.
+
+    SQLite uses the FTS5 trigram index, best bm25 matches first (data
+    weighted over description). Ranking scores every match, so when it
+    exceeds ``rank_budget_ms`` (very common terms on large tables) the
+    page is served unranked in index order instead. PostgreSQL uses the
+    pg_trgm indexes through ILIKE, ranked by similarity. Other cases scan
+    with a substring match.
+    """
+    offset = (max(page, 1) - 1) * per_page
+    bind = db.session.get_bind()
+    if len(q) >= MIN_INDEXED_QUERY and _fts_ready(bind):
+        ranked = True
+        try:
+            with time_budget(rank_budget_ms):
+                rows = _fts_page(q, per_page, offset, ranked=True)
+        except SearchTimeout:
+            ranked = False
+            rows = _fts_page(q, per_page, offset, ranked=False)
+        items = _load([row[0] for row in rows[:per_page]])
+        hits = [
+            SearchHit(items[row[0]], _mark(row[1]), _mark(row[2]) if items[row[0]].description else None)
+            for row in rows[:per_page]
+            if row[0] in items
+        ]
+        return SearchResults(hits, len(rows) > per_page, ranked)
+
+    pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    query = DataList.query.filter(or_(
+        DataList.data.ilike(pattern, escape='\\'),
+        DataList.description.ilike(pattern, escape='\\'),
+    ))
+    ranked = bind.dialect.name == 'postgresql'
+    if ranked:
+        query = query.order_by(func.greatest(
+            func.similarity(DataList.data, q),
+            func.similarity(func.coalesce(DataList.description, ''), q),
+        ).desc(), DataList.id)
+    else:
+        query = query.order_by(DataList.list_id, DataList.data)
+    items = query.limit(per_page + 1).offset(offset).all()
+    hits = [SearchHit(item, highlight(item.data, q), highlight(item.description, q)) for item in items[:per_page]]
+    return SearchResults(hits, len(items) > per_page, ranked)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List
+
+from flask import current_app
+
+from .extensions import db
+from .list_versions import current_version
+from .models import ListModel
+
+SIDEBAR_TYPES = ('Ip', 'Ip Range', 'String')
+
+
+@dataclass(frozen=True)
+class SidebarList:
+    id: int
+    name: str
+    type: str
+    item_count: int
+
+
+def build_lists_by_type() -> Dict[str, List[SidebarList]]:
+    lists_by_type: Dict[str, List[SidebarList]] = {t: [] for t in SIDEBAR_TYPES}
+    rows = db.session.execute(
+        db.select(ListModel.id, ListModel.name, ListModel.type, ListModel.item_count).order_by(ListModel.id)
+    )
+    for row in rows:
+        lists_by_type.setdefault(row.type, []).append(SidebarList(row.id, row.name, row.type, row.item_count or 0))
+    return lists_by_type
+
+
+class SidebarCache:
+    """Lists grouped by type for the navigation sidebar.
+
+    Rebuilt when the shared list version counter moves, which happens on
+    every list or entry change in any worker.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._value: Dict[str, List[SidebarList]] | None = None
+
+    def get(self) -> Dict[str, List[SidebarList]]:
+        version = current_version(db.session)
+        with self._lock:
+            if version == self._version and self._value is not None:
+                return self._value
+        value = build_lists_by_type()
+        with self._lock:
+            self._version, self._value = version, value
+        return value
+
+
+def init_sidebar_cache(app) -> None:
+    app.extensions['sidebar_cache'] = SidebarCache()
+
+
+def get_sidebar_cache() -> SidebarCache:
+    return current_app.extensions['sidebar_cache']
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import functools
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Sequence
+
+from sqlalchemy import event, func, or_
+from sqlalchemy.exc import DBAPIError
+
+from .extensions import db
+
+try:
+    from re import _parser as _sre
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre
+
+try:
+    # Optional engine whose matches can be given a timeout
+    import regex as _regex
+except ImportError:
+    _regex = None
+
+_REPEATS = (_sre.MAX_REPEAT, _sre.MIN_REPEAT, _sre.POSSESSIVE_REPEAT)
+
+_local = threading.local()
+
+
+class PatternTooComplex(ValueError):
+    pass
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: str):
+    return (_regex or re).compile(pattern)
+
+
+def _first_chars(items) -> set | None:
+    """Characters a sequence can start with, or None when that is not known."""
+    for op, av in items:
+        if op is _sre.AT:
+            continue
+        if op is _sre.LITERAL:
+            return {av}
+        if op is _sre.IN:
+            chars = set()
+            for in_op, in_av in av:
+                if in_op is _sre.LITERAL:
+                    chars.add(in_av)
+                elif in_op is _sre.RANGE and in_av[1] - in_av[0] < 256:
+                    chars.update(range(in_av[0], in_av[1] + 1))
+                else:
+                    return None
+            return chars
+        if op is _sre.SUBPATTERN:
+            return _first_chars(av[-1])
+        if op in _REPEATS and av[0] > 0:
+            return _first_chars(av[2])
+        return None
+    return None
+
+
+def _check_repeats(items, outer: bool | None) -> None:
+    r"""Reject ambiguous repetition.
+
+    ``outer`` is None outside repeated groups, else whether the enclosing
+    repeat is unbounded. Inside one, a variable repeat (when either is
+    unbounded) or alternatives that can start alike let the engine split
+    the input in exponentially many ways, e.g. ``(a+)+`` or ``(a|aa)+``;
+    bounded nesting such as ``(\d{1,3}\.){3}`` is fine.
+    """
+    for op, av in items:
+        if op in _REPEATS:
+            lo, hi, sub = av
+            unbounded = hi == _sre.MAXREPEAT
+            if outer is not None and lo != hi and (outer or unbounded):
+                raise PatternTooComplex('nested quantifiers are not allowed')
+            _check_repeats(sub, (bool(outer) or unbounded) if hi > 1 else outer)
+        elif op is _sre.BRANCH:
+            if outer is not None:
+                seen: set = set()
+                for alternative in av[1]:
+                    chars = _first_chars(alternative)
+                    if chars is None or chars & seen:
+                        raise PatternTooComplex('overlapping alternatives cannot be repeated')
+                    seen |= chars
+            for alternative in av[1]:
+                _check_repeats(alternative, outer)
+        elif op is _sre.GROUPREF_EXISTS:
+            _check_repeats(av[1], outer)
+            if av[2] is not None:
+                _check_repeats(av[2], outer)
+        elif op is _sre.ATOMIC_GROUP:
+            _check_repeats(av, outer)
+        elif op in (_sre.SUBPATTERN, _sre.ASSERT, _sre.ASSERT_NOT):
+            _check_repeats(av[-1], outer)
+
+
+def compile_pattern(pattern: str):
+    """Compiled ``pattern``; raises ``re.error`` or PatternTooComplex."""
+    _check_repeats(_sre.parse(pattern), None)
+    return _compile(pattern)
+
+
+def _regexp(pattern: str, value: str | None) -> bool:
+    deadline = getattr(_local, 'deadline', None)
+    if deadline is not None and time.monotonic() > deadline:
+        raise SearchTimeout()
+    if value is None:
+        return False
+    if _regex is None:
+        return _compile(pattern).search(value) is not None
+    # With the regex engine a single runaway match is bounded by the budget too
+    timeout = max(deadline - time.monotonic(), 0.001) if deadline is not None else None
+    try:
+        return _compile(pattern).search(value, timeout=timeout) is not None
+    except TimeoutError:
+        raise SearchTimeout() from None
+
+
+def _register_functions(dbapi_connection, connection_record) -> None:
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        # Replaces the uncached REGEXP SQLAlchemy's pysqlite dialect installs
+        dbapi_connection.create_function('regexp', 2, _regexp, deterministic=True)
+
+
+def init_sql_regex(app) -> None:
+    """Install the REGEXP function on the app's SQLite connections."""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite' and not event.contains(engine, 'connect', _register_functions):
+        event.listen(engine, 'connect', _register_functions)
+
+
+def text_filter(columns: Sequence, search: str):
+    """SQL condition matching ``search`` in any of ``columns``.
+
+    Valid regexes run in the database (REGEXP on SQLite, ``~`` on
+    PostgreSQL); anything else is a plain substring, matched with
+    ``instr``/``strpos`` so no per-row Python call is needed. Raises
+    PatternTooComplex for patterns that could backtrack without bound.
+    """
+    dialect = db.session.get_bind().dialect.name
+    literal = re.escape(search) == search
+    if not literal:
+        try:
+            compile_pattern(search)
+        except re.error:
+            literal = True
+    if literal:
+        find = func.strpos if dialect == 'postgresql' else func.instr
+        return or_(*(find(col, search) > 0 for col in columns))
+    return or_(*(col.regexp_match(search) for col in columns))
+
+
+@contextmanager
+def time_budget(ms: int | None) -> Iterator[None]:
+    """Abort database work in the block after ``ms`` milliseconds.
+
+    SQLite is interrupted through a progress handler and the REGEXP
+    function checks the deadline before each row (and passes it to the
+    match itself when the ``regex`` package is installed); PostgreSQL uses a
+    transaction-local statement_timeout. Raises SearchTimeout.
+    """
+    if not ms:
+        yield
+        return
+    conn = db.session.connection()
+    deadline = time.monotonic() + ms / 1000
+    raw = conn.connection.dbapi_connection if conn.dialect.name == 'sqlite' else None
+    if raw is not None:
+        raw.set_progress_handler(lambda: int(time.monotonic() > deadline), 10000)
+        _local.deadline = deadline
+    elif conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(f'SET LOCAL statement_timeout = {int(ms)}')
+    try:
+        yield
+    except DBAPIError as exc:
+        interrupted = isinstance(exc.orig, sqlite3.OperationalError) and 'interrupt' in str(exc.orig)
+        if interrupted or time.monotonic() > deadline:
+            db.session.rollback()
+            raise SearchTimeout() from exc
+        raise
+    else:
+        if conn.dialect.name == 'postgresql':
+            conn.exec_driver_sql('SET LOCAL statement_timeout TO DEFAULT')
+    finally:
+        if raw is not None:
+            raw.set_progress_handler(None, 0)
+            _local.deadline = None
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+from urllib.parse import urlsplit
+
+from flask import current_app
+
+from .extensions import db
+from .models import DataList, ListModel
+
+STRING_LIST_TYPES = ('String',)
+
+MATCH_MODES = ('domain', 'substring')
+
+# (list_id, entry data) reported for a match
+_Value = Tuple[int, str]
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher (case-insensitive)."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, _Value]]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[_Value, ...]] = [()]
+        for pattern, value in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] += (value,)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def search(self, text: str) -> Set[_Value]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[_Value] = set()
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class DomainTrie:
+    """Trie of domain labels stored right to left (``com`` -> ``example``).
+
+    ``example.com`` matches the domain and all its subdomains, while
+    ``*.example.com`` only matches subdomains.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, _Value]]) -> None:
+        # node: [children, values for domain+subdomains, values for subdomains only]
+        self._root: list = [{}, (), ()]
+        for pattern, value in patterns:
+            subdomains_only = pattern.startswith('*.')
+            labels = pattern[2:] if subdomains_only else pattern.lstrip('.')
+            node = self._root
+            for label in reversed(labels.split('.')):
+                node = node[0].setdefault(label, [{}, (), ()])
+            node[2 if subdomains_only else 1] += (value,)
+
+    def search(self, host: str) -> Set[_Value]:
+        found: Set[_Value] = set()
+        labels = host.split('.')
+        node = self._root
+        for depth in range(len(labels) - 1, -1, -1):
+            node = node[0].get(labels[depth])
+            if node is None:
+                break
+            if node[1]:
+                found.update(node[1])
+            if node[2] and depth:
+                found.update(node[2])
+        return found
+
+
+def normalize_host(text: str) -> str:
+    """Hostname from a bare host or URL, lower-cased without a trailing dot."""
+    text = text.strip()
+    if '://' in text:
+        text = urlsplit(text).hostname or ''
+    else:
+        text = text.split('/', 1)[0].rsplit('@', 1)[-1].split(':', 1)[0]
+    return text.lower().rstrip('.')
+
+
+class StringMatcher:
+    """Matches hostnames/text against every String list.
+
+    Entries are cached per list version so only changed lists are read
+    again; the combined automaton and domain trie are rebuilt when any
+    String list's version changes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # list_id -> (version, [(normalized pattern, entry data)])
+        self._entries: Dict[int, Tuple[int, List[Tuple[str, str]]]] = {}
+        self._key: frozenset | None = None
+        self._engines: Tuple[AhoCorasick, DomainTrie, Dict[int, str]] | None = None
+
+    def _refresh(self) -> Tuple[AhoCorasick, DomainTrie, Dict[int, str]]:
+        lists = db.session.execute(
+            db.select(ListModel.id, ListModel.name, ListModel.version)
+            .where(ListModel.type.in_(STRING_LIST_TYPES))
+        ).all()
+        key = frozenset((row.id, row.version) for row in lists)
+        if key == self._key:
+            return self._engines
+        with self._lock:
+            if key == self._key:
+                return self._engines
+            entries = {}
+            for row in lists:
+                cached = self._entries.get(row.id)
+                if cached is None or cached[0] != row.version:
+                    data = db.session.execute(
+                        db.select(DataList.data).where(DataList.list_id == row.id)
+                    ).scalars().all()
+                    cached = (row.version, [(d.strip().lower(), d) for d in data if d and d.strip()])
+                entries[row.id] = cached
+            self._entries = entries
+            patterns = [
+                (pattern, (list_id, data))
+                for list_id, (_version, values) in entries.items()
+                for pattern, data in values
+            ]
+            self._engines = (
+                AhoCorasick(patterns),
+                DomainTrie((p.rstrip('.'), v) for p, v in patterns),
+                {row.id: row.name for row in lists},
+            )
+            self._key = key
+            return self._engines
+
+    def match(self, texts: Iterable[str], mode: str = 'domain') -> Dict[str, List[Tuple[str, str]]]:
+        """Return {input: [(list name, entry)]} for inputs with at least one match."""
+        automaton, trie, names = self._refresh()
+        matches: Dict[str, List[Tuple[str, str]]] = {}
+        for text in texts:
+            if mode == 'domain':
+                found = trie.search(normalize_host(text))
+            else:
+                found = automaton.search(text)
+            if found:
+                matches[text] = sorted((names[list_id], entry) for list_id, entry in found)
+        return matches
+
+
+def init_string_matcher(app) -> None:
+    app.extensions['string_matcher'] = StringMatcher()
+
+
+def get_string_matcher() -> StringMatcher:
+    return current_app.extensions['string_matcher']
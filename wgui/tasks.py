@@ -4,10 +4,13 @@ from email.message import EmailMessage
 
 from flask import current_app
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import func
 
 from .extensions import db, scheduler
-from .models import DataList, EmailSettings, ScheduleSettings, AuditLog, AuditSettings, BackupSettings, ListModel, User
+from .models import DataList, EmailSettings, ScheduleSettings, AuditLog, AuditSettings, BackupSettings, ListModel, ListChange, ListSource, User
 from .backup_utils import write_backup_file, prune_backups
+from .audit import audit
+from .actor_names import get_actor_names
 
 
 def send_email(subject: str, body: str) -> None:
@@ -71,23 +74,17 @@ def delete_expired_items(initiator_user_id: int | None = None) -> None:
                 user_id_for_audit = sys_user.id if sys_user else None
                 actor_name = 'system'
             else:
-                u = db.session.get(User, int(user_id_for_audit))
-                actor_name = u.username if u else None
-            # Preload list ids by name to avoid repeated queries
-            lists = {l.name: l.id for l in ListModel.query.all()}
+                actor_name = get_actor_names().get(user_id_for_audit)
             # Log and delete each expired item
             for item in expired:
-                list_id = lists.get(item.category)
-                db.session.add(
-                    AuditLog(
-                        user_id=user_id_for_audit,
-                        actor_name=actor_name,
-                        action='item_deleted',
-                        target_type='item',
-                        target_id=item.id,
-                        list_id=list_id,
-                        details=f"category={item.category}; data={item.data}; reason=expired",
-                    )
+                audit(
+                    user_id=user_id_for_audit,
+                    actor_name=actor_name,
+                    action='item_deleted',
+                    target_type='item',
+                    target_id=item.id,
+                    list_id=item.list_id,
+                    details=f"category={item.category}; data={item.data}; reason=expired",
                 )
                 db.session.delete(item)
             db.session.commit()
@@ -98,15 +95,13 @@ def _job(app):
         delete_expired_items(initiator_user_id=None)
         # Audit: scheduled job run
         try:
-            db.session.add(
-                AuditLog(
-                    user_id=None,
-                    actor_name='system',
-                    action='cleanup_job_run',
-                    target_type='job',
-                    target_id=None,
-                    details='trigger=schedule',
-                )
+            audit(
+                user_id=None,
+                actor_name='system',
+                action='cleanup_job_run',
+                target_type='job',
+                target_id=None,
+                details='trigger=schedule',
             )
             db.session.commit()
         except Exception:
@@ -134,15 +129,13 @@ def run_backup_task(app) -> None:
                 bdir = cfg.directory
                 bkeep = cfg.keep
             path = write_backup_file(app, directory=bdir)
-            db.session.add(
-                AuditLog(
-                    user_id=None,
-                    actor_name='system',
-                    action='backup_created',
-                    target_type='backup',
-                    target_id=None,
-                    details=f"path={path}; trigger=schedule",
-                )
+            audit(
+                user_id=None,
+                actor_name='system',
+                action='backup_created',
+                target_type='backup',
+                target_id=None,
+                details=f"path={path}; trigger=schedule",
             )
             db.session.commit()
             prune_backups(app, directory=bdir, keep=bkeep)
@@ -162,16 +155,42 @@ def run_audit_purge_task(app) -> None:
                 .delete(synchronize_session=False))
             db.session.commit()
             # optional: audit a purge run row (no sensitive details)
-            db.session.add(
-                AuditLog(
-                    user_id=None,
-                    actor_name='system',
-                    action='audit_purge_run',
-                    target_type='audit',
-                    target_id=None,
-                    details=f"removed={deleted}",
-                )
+            audit(
+                user_id=None,
+                actor_name='system',
+                action='audit_purge_run',
+                target_type='audit',
+                target_id=None,
+                details=f"removed={deleted}",
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+
+
+def compact_list_journal(app) -> None:
+    """Drop journal entries older than LIST_JOURNAL_RETENTION_DAYS.
+
+    Each list's journal_floor is raised to the newest compacted version so
+    delta exports older than that fall back to a full export.
+    """
+    with app.app_context():
+        try:
+            days = int(app.config.get('LIST_JOURNAL_RETENTION_DAYS', 30))
+            cutoff = datetime.utcnow() - timedelta(days=days)
+            floors = (
+                db.session.query(ListChange.list_id, func.max(ListChange.version))
+                .filter(ListChange.created_at < cutoff)
+                .group_by(ListChange.list_id)
+                .all()
             )
+            for list_id, floor in floors:
+                (ListModel.query
+                    .filter(ListModel.id == list_id, ListModel.journal_floor < floor)
+                    .update({ListModel.journal_floor: floor}, synchronize_session=False))
+                (ListChange.query
+                    .filter(ListChange.list_id == list_id, ListChange.version <= floor)
+                    .delete(synchronize_session=False))
             db.session.commit()
         except Exception:
             db.session.rollback()
@@ -193,8 +212,54 @@ def update_audit_purge_schedule(app) -> None:
     scheduler.add_job(lambda: run_audit_purge_task(app), CronTrigger(hour=hour, minute=minute), id='audit_purge_job', replace_existing=True)
 
 
+def run_feed_sync(app, list_id: int) -> None:
+    """Scheduled sync of one list with its feed; failures are kept on the source."""
+    from .lists.feeds import sync_source
+
+    with app.app_context():
+        source = ListSource.query.filter_by(list_id=list_id).first()
+        if source is None or not source.enabled:
+            return
+        try:
+            sync_source(source)
+        except Exception as exc:
+            db.session.rollback()
+            try:
+                source = ListSource.query.filter_by(list_id=list_id).first()
+                if source is not None:
+                    source.last_sync_at = datetime.utcnow()
+                    source.last_status = f"error: {exc}"[:255]
+                    db.session.commit()
+            except Exception:
+                db.session.rollback()
+
+
+def feed_job_id(list_id: int) -> str:
+    return f'feed_sync_{list_id}'
+
+
+def update_feed_schedule(app, source: ListSource) -> None:
+    """(Re)register the sync job of ``source``, or drop it when disabled."""
+    if not source.enabled:
+        remove_feed_schedule(source.list_id)
+        return
+    list_id = source.list_id
+    scheduler.add_job(lambda: run_feed_sync(app, list_id), 'interval', minutes=max(1, source.interval_minutes),
+                      id=feed_job_id(list_id), replace_existing=True)
+
+
+def remove_feed_schedule(list_id: int) -> None:
+    if scheduler.get_job(feed_job_id(list_id)):
+        scheduler.remove_job(feed_job_id(list_id))
+
+
 def schedule_tasks(app) -> None:
     """Register scheduled jobs at startup."""
     update_cleanup_schedule(app)
     update_backup_schedule(app)
     update_audit_purge_schedule(app)
+    scheduler.add_job(lambda: compact_list_journal(app), 'interval', hours=1, id='journal_compact_job', replace_existing=True)
+    with app.app_context():
+        sources = ListSource.query.all()
+    for source in sources:
+        update_feed_schedule(app, source)